@@ -5,17 +5,35 @@ waits for results, and moves on.
 """
 
 import uiautomator2 as u2
-import time
 import random
 import csv
 import os
 import logging
 import threading
-import collections
+import coordinator
+from cadence import CADENCE_NAME, CadenceModel
+from calibration import CALIBRATION_NAME, load_profile
+from capture import parse_hierarchy
+from classifier import OTHER, GiveawayClassifier, class_limit
+from clock import RealClock
+from experiments import EXPERIMENT_NAME, Experiment, ExperimentLog
+from filestore import locked, replace_file
+from governor import Governor, GovernedDevice
+from launcher import DeepLinkLauncher
+from logpipe import get_pipeline
+from ocr import viewer_ocr
+from observation import (
+    StreamObservation, grid_cards, parse_viewer_text,
+)
+from opportunities import OpportunityQueue
+from recorder import SessionRecorder, RecordingDevice
+from tracing import NULL_TRACER, Tracer, TracingClock, TracingDevice, traced
+from watchers import PopupWatcher, WatchedDevice
+from worker import BotStats
 from config import (
-    DEFAULT_CONFIG,
-    POLL_INTERVAL, NO_GIVEAWAY_TIMEOUT,
-    ACTION_DELAY, ENTRY_DELAY, TRANSITION_DELAY,
+    DEFAULT_CONFIG, APP_PACKAGE,
+    ACTION_DELAY, ENTRY_DELAY, TRANSITION_DELAY, PANEL_WAIT, ENTRY_VERIFY_DELAY,
+    OPPORTUNITY_JUMPS, OPPORTUNITY_VIEWER_SLACK,
 )
 
 logging.basicConfig(
@@ -27,96 +45,247 @@ log = logging.getLogger("whatnot-bot")
 
 # How often to check if a giveaway is still running (seconds)
 GIVEAWAY_CHECK_INTERVAL = (8, 13)
-
-# How long to wait after a giveaway ends to see if a new one starts (seconds)
-NEW_GIVEAWAY_WAIT = (45, 60)
+# Giveaway panel entry buttons, most specific first
+ENTRY_TEXTS = ("Follow Host & Enter Giveaway", "Enter Giveaway", "Enter")
 
 # Log file for giveaway history
 LOG_FILE = os.path.join(os.path.dirname(__file__), "giveaway_log.csv")
-
-
-class DequeLogHandler(logging.Handler):
-    """Pushes formatted log lines to a shared deque for SSE streaming."""
-
-    def __init__(self, deque):
-        super().__init__()
-        self.deque = deque
-
-    def emit(self, record):
-        try:
-            self.deque.append(self.format(record))
-        except Exception:
-            pass
-
-
-def rand(range_tuple):
-    return random.uniform(range_tuple[0], range_tuple[1])
-
-
-def sleep(range_tuple):
-    duration = rand(range_tuple)
-    time.sleep(duration)
-    return duration
+LOG_FIELDS = ["timestamp", "streamer", "type", "wait_time", "viewers"]
+# Header of logs written before giveaway classes (see _init_log)
+OLD_LOG_FIELDS = ["timestamp", "streamer", "is_pack", "wait_time", "viewers"]
 
 
 class WhatnotBot:
-    def __init__(self, config=None, stop_event=None, log_deque=None):
+    def __init__(self, config=None, stop_event=None, log_deque=None,
+                 device=None, clock=None, rng=None, log_file=LOG_FILE,
+                 bot_id=None, stats=None, serial=None, fleet=None, device_index=0):
         # Merge provided config over defaults
         self.cfg = dict(DEFAULT_CONFIG)
         if config:
             self.cfg.update(config)
 
         self.stop_event = stop_event or threading.Event()
-
-        # Attach deque log handler if provided
-        if log_deque is not None:
-            handler = DequeLogHandler(log_deque)
-            handler.setFormatter(logging.Formatter(
-                "%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S"
-            ))
-            log.addHandler(handler)
-            self._deque_handler = handler
-        else:
-            self._deque_handler = None
-
-        log.info("Connecting to device...")
-        self.d = u2.connect_usb()
-        log.info(f"Connected: {self.d.info.get('productName', 'Unknown')}")
+        # All waiting and randomness goes through these so the simulator
+        # can run the bot in virtual time with a seeded RNG
+        self.clock = clock or RealClock()
+        self.rng = rng or random.Random()
+        self.log_file = log_file
+
+        # Each bot logs through its own child logger; records are queued
+        # and formatted off-thread by the log pipeline, and log_deque (if
+        # given) only receives this bot's lines
+        self.bot_id = bot_id or serial or "default"
+        self.log = logging.getLogger(f"whatnot-bot.{self.bot_id}")
+        self._log_sink = log_deque
+        get_pipeline().attach(self.log, log_deque)
+
+        if device is None:
+            self.log.info(f"Connecting to device {serial or ''}...")
+            device = u2.connect_usb(serial)
+        self.d = device
+        self.log.info(f"Connected: {self.d.info.get('productName', 'Unknown')}")
+
+        # Record mode: wrap the device so every dump and action is archived
+        self.recorder = None
+        if self.cfg.get("record"):
+            self.recorder = SessionRecorder(
+                screenshots=self.cfg.get("record_screenshots", False),
+                clock=self.clock.time)
+            self.d = RecordingDevice(self.d, self.recorder)
+            self.recorder.event("session_start", config=self.cfg)
+            self.log.info(f"Recording session to {self.recorder.path}")
+
+        # Tracing: time every stage, device call and sleep (see tracing.py)
+        self.tracer = NULL_TRACER
+        if self.cfg.get("trace"):
+            self.tracer = Tracer(self.clock.time, name=self.bot_id)
+            self.clock = TracingClock(self.clock, self.tracer)
+            self.d = TracingDevice(self.d, self.tracer)
+        # Adaptive pacing: delays and action rate follow how well the
+        # device keeps up (see governor.py)
+        self.governor = None
+        if self.cfg.get("adaptive_pacing"):
+            self.governor = Governor(self.clock, self.log)
+            self.d = GovernedDevice(self.d, self.governor)
+        if self.cfg.get("throttle", 1.0) != 1.0:
+            self.log.info(f"Throttled: scan and poll delays x{self.cfg['throttle']:g} "
+                          f"(off-peak hours)")
+        # Popup watchers: dialogs covering the app are dismissed before
+        # anything reads the screen (see watchers.py)
+        self.popups = None
+        if self.cfg.get("popup_watchers"):
+            self.popups = PopupWatcher(self.clock, self.log)
+            if self.popups.install_native(self.d):
+                self.log.info("Popup rules also running as a uiautomator2 watcher")
+            self.d = WatchedDevice(self.d, self.popups)
+        # Counters live in a stats object so a worker process can share
+        # them with the server through shared memory
+        self.stats = stats or BotStats()
         self.giveaways_entered = 0
         self.streams_checked = 0
+        # Recently evaluated streams, keyed by streamer name and grid card.
+        # Shared with the other devices when running as part of a fleet
+        self.fleet = coordinator.connect(fleet, self.clock)
+        # Screenshot OCR for viewer counts missing from the hierarchy
+        self.ocr = viewer_ocr()
+        self.classifier = GiveawayClassifier()
+        self.launcher = DeepLinkLauncher(self.d, self.log, clock=self.clock)
+        data_dir = os.path.dirname(os.path.abspath(log_file))
+        # Per-host follow-up giveaway history, kept next to the CSV log
+        self.cadence = CadenceModel(os.path.join(data_dir, CADENCE_NAME),
+                                    log_path=log_file)
+        # Detector regions and gestures for this screen (see calibration.py),
+        # cached per device serial
+        self.serial = serial or getattr(device, "serial", None)
+        self.screen, self._screen_cache = load_profile(
+            self.d, self.serial, os.path.join(data_dir, CALIBRATION_NAME), log=self.log)
+        self.log.info(f"Screen {self.screen.width}x{self.screen.height}, "
+                      f"{self.screen.source} profile")
+        # Giveaway streams seen but not entered, revisited after a giveaway
+        self.opportunities = OpportunityQueue(self.clock)
+        self.revisit_hits = 0
+        # Set when a revisit left the feed the scan loops work from
+        self._off_feed = False
+        # A/B experiment: the config arm changes every slice, and each
+        # slice's results are logged next to the CSV log (see experiments.py)
+        self.experiment = Experiment.from_config(self.cfg.get("experiment"))
+        self.experiment_log = ExperimentLog(os.path.join(data_dir, EXPERIMENT_NAME))
+        self.device_index = device_index
+        self._base_cfg = dict(self.cfg)
+        self._slice = None
+        # When the giveaway badge was first seen gone in stay_for_giveaway
+        self._gone_since = None
+        # (label, bounds) of the entry button on the open giveaway panel
+        self._entry = None
+        # (keys, name, info) of the giveaway stream being handled
+        self._current_stream = ([], None, {})
         self._init_log()
 
+    @property
+    def giveaways_entered(self):
+        return self.stats.giveaways_entered
+
+    @giveaways_entered.setter
+    def giveaways_entered(self, value):
+        self.stats.giveaways_entered = value
+
+    @property
+    def streams_checked(self):
+        return self.stats.streams_checked
+
+    @streams_checked.setter
+    def streams_checked(self, value):
+        self.stats.streams_checked = value
+
     def _stopped(self):
         """Check if the stop event has been set."""
         return self.stop_event.is_set()
 
+    def _rand(self, range_tuple):
+        return self.rng.uniform(range_tuple[0], range_tuple[1])
+
+    def _sleep(self, range_tuple, throttled=True):
+        """
+        Sleep a random time from the range, scaled by the governor and,
+        for scan and poll pacing, by the schedule's throttle. The entry
+        path passes throttled=False: a slow hour shouldn't enter late.
+        """
+        duration = self._rand(range_tuple)
+        if self.governor:
+            duration *= self.governor.scale
+        if throttled:
+            duration *= self.cfg.get("throttle", 1.0)
+        self.clock.sleep(duration)
+        return duration
+
     def cleanup(self):
-        """Remove the deque log handler when done."""
-        if self._deque_handler:
-            log.removeHandler(self._deque_handler)
-            self._deque_handler = None
+        """Write the trace, detach the log sink and close the recorder."""
+        self._end_slice()
+        if self.opportunities.taken:
+            self.log.info(f"Opportunities: {self.opportunities.added} queued, "
+                          f"{self.opportunities.taken} revisited, "
+                          f"{self.revisit_hits} with a giveaway to enter")
+        if self.popups:
+            PopupWatcher.uninstall_native(self.d)
+            if self.popups.counts:
+                self.log.info(f"Popups dismissed: {self.popups.describe()}")
+        if self.governor:
+            self.log.info(f"Pacing x{self.governor.scale:.2f} at exit "
+                          f"({self.governor.describe()}), "
+                          f"{self.governor.throttled:.0f}s waiting on the action budget")
+        if self.tracer.enabled:
+            path = os.path.join(self.recorder.path, "trace.json") if self.recorder else None
+            path = self.tracer.save(path)
+            for line in self.tracer.format_summary():
+                self.log.info(line)
+            self.log.info(f"Trace saved to: {path}")
+            self.tracer = NULL_TRACER
+        if self._log_sink is not None:
+            get_pipeline().detach(self.log, self._log_sink)
+            self._log_sink = None
+        try:
+            self.fleet.release(self.bot_id)
+        except Exception:
+            pass
+        try:
+            self.cadence.save()
+        except OSError as e:
+            self.log.warning(f"Could not save giveaway cadence history: {e}")
+        if self.recorder:
+            self.recorder.event("session_end",
+                                giveaways_entered=self.giveaways_entered,
+                                streams_checked=self.streams_checked)
+            self.recorder.close()
+            self.recorder = None
+
+    def _record(self, kind, **fields):
+        """Add a bot-level event (detections, decisions) to the session."""
+        if self.recorder:
+            self.recorder.event(kind, **fields)
 
     def _init_log(self):
-        """Create CSV log file with headers if it doesn't exist."""
-        if not os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["timestamp", "streamer", "is_pack", "wait_time", "viewers"])
+        """
+        Create CSV log file with headers if it doesn't exist. A log from
+        before giveaway classes gets its "is_pack" header renamed: its
+        "pack"/"other" values are class names already. Fleet bots share
+        the log, so this and every append hold its lock.
+        """
+        try:
+            with locked(self.log_file):
+                if not os.path.exists(self.log_file):
+                    with open(self.log_file, "w", newline="") as f:
+                        csv.writer(f).writerow(LOG_FIELDS)
+                    return
+                with open(self.log_file, newline="") as f:
+                    header = f.readline()
+                    if next(csv.reader([header]), None) != OLD_LOG_FIELDS:
+                        return
+                    rest = f.read()
+
+                def write(f):
+                    csv.writer(f).writerow(LOG_FIELDS)
+                    f.write(rest)
+                replace_file(self.log_file, write, newline="")
+        except OSError as e:
+            self.log.warning(f"Couldn't prepare giveaway log {self.log_file}: {e}")
+            return
+        self.log.info(f"Renamed the is_pack column of {self.log_file} to type")
 
-    def _log_giveaway(self, streamer, is_pack, wait_seconds, capped, viewers):
+    def _log_giveaway(self, streamer, gw_class, wait_seconds, capped, viewers):
         """Append a giveaway entry to the CSV log."""
         wait_str = f"{int(wait_seconds)}+" if capped else str(int(wait_seconds))
-        pack_str = "pack" if is_pack else "other"
-        with open(LOG_FILE, "a", newline="") as f:
+        with locked(self.log_file), open(self.log_file, "a", newline="") as f:
             writer = csv.writer(f)
             writer.writerow([
-                time.strftime("%Y-%m-%d %H:%M:%S"),
+                self.clock.strftime("%Y-%m-%d %H:%M:%S"),
                 streamer,
-                pack_str,
+                gw_class,
                 wait_str,
                 viewers or "?",
             ])
-        log.info(f"Logged: {streamer} | {pack_str} | {wait_str}s | {viewers or '?'} viewers")
+        self.log.info(f"Logged: {streamer} | {gw_class} | {wait_str}s | {viewers or '?'} viewers")
+        self._record("giveaway_logged", streamer=streamer, type=gw_class,
+                     wait=wait_str, viewers=viewers)
 
     # ── Navigation ──
 
@@ -129,40 +298,42 @@ class WhatnotBot:
         ]:
             if selector.exists:
                 selector.click()
-                sleep(ACTION_DELAY)
+                self._sleep(ACTION_DELAY)
                 return True
         return False
 
+    @traced
     def go_home(self):
         # Try pressing back to exit any screens
         for _ in range(5):
             if self._stopped():
                 return False
             if self._find_and_click_home():
-                log.info("Navigated to Home")
+                self.log.info("Navigated to Home")
                 return True
             self.d.press("back")
-            time.sleep(random.uniform(0.8, 1.5))
+            self._sleep((0.8, 1.5))
         # Fallback: press the Android home button and re-open app
         self.d.press("home")
-        time.sleep(random.uniform(1.5, 2.5))
-        self.d.app_start("com.whatnot.whatnot")
-        time.sleep(random.uniform(4.0, 6.0))
+        self._sleep((1.5, 2.5))
+        self.d.app_start(APP_PACKAGE)
+        self._sleep((4.0, 6.0))
         if self._find_and_click_home():
-            log.info("Navigated to Home (via app restart)")
+            self.log.info("Navigated to Home (via app restart)")
             return True
         # Last resort: try pressing back a few more times after app restart
         for _ in range(3):
             if self._stopped():
                 return False
             self.d.press("back")
-            time.sleep(random.uniform(0.8, 1.5))
+            self._sleep((0.8, 1.5))
             if self._find_and_click_home():
-                log.info("Navigated to Home (after back)")
+                self.log.info("Navigated to Home (after back)")
                 return True
-        log.warning("Could not get to Home screen")
+        self.log.warning("Could not get to Home screen")
         return False
 
+    @traced
     def go_to_category(self, use_followed=False):
         """
         Navigate to a category on the Home screen.
@@ -176,93 +347,123 @@ class WhatnotBot:
           use_followed=True:  Followed Hosts (same as normal)
         """
         category = self.cfg["category"]
-        mode = self.cfg["mode"]
 
         if use_followed:
             cat = self.d(text="Followed Hosts")
             if cat.exists:
                 cat.click()
-                time.sleep(random.uniform(3.0, 5.0))
-                log.info("Tapped category: Followed Hosts")
+                self._sleep((3.0, 5.0))
+                self.log.info("Tapped category: Followed Hosts")
                 return True
-            log.warning("'Followed Hosts' category not found")
+            self.log.warning("'Followed Hosts' category not found")
             return False
 
         cat = self.d(text=category)
         if cat.exists:
             cat.click()
-            time.sleep(random.uniform(3.0, 5.0))
-            log.info(f"Tapped category: {category}")
-
-            if mode == "lowest_viewer":
-                # Tap Filter button (identified by contentDescription)
-                filter_btn = self.d(description="Filter")
-                if not filter_btn.exists:
-                    filter_btn = self.d(text="Filter")
-                if filter_btn.exists:
-                    filter_btn.click()
-                    time.sleep(random.uniform(2.0, 3.5))
-                    log.info("Opened Filter panel")
-
-                    # Look for viewer-count sort inside filter panel
-                    # The text label isn't clickable — the checkbox/radio
-                    # next to it is. Find the label, get its bounds, then
-                    # click the clickable element to its left.
-                    sort_selected = False
-                    for viewer_opt in ["Viewers: low to high",
-                                       "Viewers: Low to High",
-                                       "Viewers: low",
-                                       "Low to High"]:
-                        opt = self.d(textContains=viewer_opt)
-                        if opt.exists:
-                            bounds = opt.info.get("bounds", {})
-                            cy = (bounds.get("top", 0) + bounds.get("bottom", 0)) // 2
-                            # Click to the left of the label where the
-                            # radio/checkbox sits
-                            cx = max(bounds.get("left", 60) - 40, 30)
-                            self.d.click(cx, cy)
-                            time.sleep(random.uniform(1.5, 2.5))
-                            log.info(f"Selected sort: {viewer_opt} (clicked at {cx},{cy})")
-                            sort_selected = True
-                            break
-                    if not sort_selected:
-                        log.warning("Viewer sort not found in filter panel")
-
-                    # Apply / close filter if there's an apply button
-                    for apply_text in ["Apply", "Show Results", "Done"]:
-                        apply_btn = self.d(text=apply_text)
-                        if apply_btn.exists:
-                            apply_btn.click()
-                            time.sleep(random.uniform(2.0, 3.5))
-                            log.info(f"Applied filter ({apply_text})")
-                            break
-                    else:
-                        # Close panel if no apply button
-                        self.d.press("back")
-                        time.sleep(random.uniform(1.0, 2.0))
+            self._sleep((3.0, 5.0))
+            self.log.info(f"Tapped category: {category}")
+
+            self._choose_feed()
+            return True
+        self.log.warning(f"Category '{category}' not found")
+        return False
+
+    def _choose_feed(self):
+        """
+        On a category page, switch to the feed the mode scans: viewer
+        sort in lowest_viewer mode, New And Noteworthy otherwise.
+        """
+        mode = self.cfg["mode"]
+        if mode == "lowest_viewer":
+            # Tap Filter button (identified by contentDescription)
+            filter_btn = self.d(description="Filter")
+            if not filter_btn.exists:
+                filter_btn = self.d(text="Filter")
+            if filter_btn.exists:
+                filter_btn.click()
+                self._sleep((2.0, 3.5))
+                self.log.info("Opened Filter panel")
+
+                # Look for viewer-count sort inside filter panel
+                # The text label isn't clickable — the checkbox/radio
+                # next to it is. Find the label, get its bounds, then
+                # click the clickable element to its left.
+                sort_selected = False
+                for viewer_opt in ["Viewers: low to high",
+                                   "Viewers: Low to High",
+                                   "Viewers: low",
+                                   "Low to High"]:
+                    opt = self.d(textContains=viewer_opt)
+                    if opt.exists:
+                        bounds = opt.info.get("bounds", {})
+                        cy = (bounds.get("top", 0) + bounds.get("bottom", 0)) // 2
+                        # Click to the left of the label where the
+                        # radio/checkbox sits
+                        cx = max(bounds.get("left", 60) - self.screen.radio_offset, 30)
+                        self.d.click(cx, cy)
+                        self._sleep((1.5, 2.5))
+                        self.log.info(f"Selected sort: {viewer_opt} (clicked at {cx},{cy})")
+                        sort_selected = True
+                        break
+                if not sort_selected:
+                    self.log.warning("Viewer sort not found in filter panel")
+
+                # Apply / close filter if there's an apply button
+                for apply_text in ["Apply", "Show Results", "Done"]:
+                    apply_btn = self.d(text=apply_text)
+                    if apply_btn.exists:
+                        apply_btn.click()
+                        self._sleep((2.0, 3.5))
+                        self.log.info(f"Applied filter ({apply_text})")
+                        break
                 else:
-                    log.warning("Filter button not found, "
-                                "falling back to New And Noteworthy")
-                    tab = self.d(text="New And Noteworthy")
-                    tab.wait(timeout=5)
-                    if tab.exists:
-                        tab.click()
-                        time.sleep(random.uniform(2.0, 3.5))
-                        log.info("Switched to New And Noteworthy (fallback)")
+                    # Close panel if no apply button
+                    self.d.press("back")
+                    self._sleep((1.0, 2.0))
             else:
-                # Normal mode: use New And Noteworthy
+                self.log.warning("Filter button not found, "
+                                 "falling back to New And Noteworthy")
                 tab = self.d(text="New And Noteworthy")
                 tab.wait(timeout=5)
                 if tab.exists:
                     tab.click()
-                    time.sleep(random.uniform(2.0, 3.5))
-                    log.info("Switched to New And Noteworthy")
-                else:
-                    log.warning("'New And Noteworthy' tab not found")
-            return True
-        log.warning(f"Category '{category}' not found")
-        return False
+                    self._sleep((2.0, 3.5))
+                    self.log.info("Switched to New And Noteworthy (fallback)")
+        else:
+            # Normal mode: use New And Noteworthy
+            tab = self.d(text="New And Noteworthy")
+            tab.wait(timeout=5)
+            if tab.exists:
+                tab.click()
+                self._sleep((2.0, 3.5))
+                self.log.info("Switched to New And Noteworthy")
+            else:
+                self.log.warning("'New And Noteworthy' tab not found")
 
+    @traced
+    def open_feed(self, use_followed=False):
+        """
+        Get to the feed the scan loops start from: by deep link when one
+        is configured and still working, else Home + the category taps.
+        """
+        category = self.cfg["category"]
+        self._off_feed = False
+        if use_followed:
+            if self.launcher.open("followed", category):
+                return True
+        else:
+            if (self.cfg["mode"] == "lowest_viewer"
+                    and self.launcher.open("category_sorted", category)):
+                return True
+            if self.launcher.open("category", category):
+                self._choose_feed()
+                return True
+        self.go_home()
+        self._sleep(ACTION_DELAY)
+        return self.go_to_category(use_followed=use_followed)
+
+    @traced
     def enter_first_stream(self):
         for attempt in range(3):
             if self._stopped():
@@ -271,141 +472,128 @@ class WhatnotBot:
             if thumbnail.wait(timeout=10):
                 try:
                     thumbnail.click()
-                    time.sleep(random.uniform(2.0, 3.5))
-                    log.info("Entered first stream")
+                    self._sleep((2.0, 3.5))
+                    self.log.info("Entered first stream")
                     return True
                 except Exception:
-                    log.warning(f"Stale thumbnail, retrying ({attempt + 1}/3)...")
-                    time.sleep(random.uniform(1.0, 2.0))
+                    self.log.warning(f"Stale thumbnail, retrying ({attempt + 1}/3)...")
+                    self._sleep((1.0, 2.0))
                     continue
-        for node in self.d.xpath("//*").all():
-            text = node.info.get("text", "")
-            if text.startswith("Live"):
-                node.click()
-                time.sleep(random.uniform(2.0, 3.5))
-                log.info("Entered stream via Live badge")
+        for info in self._snapshot():
+            if info["text"].startswith("Live"):
+                self._click_bounds(info["bounds"])
+                self._sleep((2.0, 3.5))
+                self.log.info("Entered stream via Live badge")
                 return True
-        log.warning("No streams found after waiting")
+        self.log.warning("No streams found after waiting")
         return False
 
     def scroll_to_next_stream(self):
-        start_x = random.randint(400, 680)
-        self.d.swipe(start_x, 2100, start_x, 200, duration=random.uniform(0.15, 0.3))
-        time.sleep(random.uniform(1.5, 2.5))
+        start_x = self.rng.randint(*self.screen.stream_swipe_x)
+        from_y, to_y = self.screen.stream_swipe_y
+        self.d.swipe(start_x, from_y, start_x, to_y, duration=self.rng.uniform(0.15, 0.3))
+        self._sleep((1.5, 2.5))
         self.streams_checked += 1
 
     def leave_stream(self):
         leave_btn = self.d(description="Leave")
         if leave_btn.exists:
             leave_btn.click()
-            sleep(ACTION_DELAY)
-            log.info("Left stream")
+            self._sleep(ACTION_DELAY)
+            self.log.info("Left stream")
             return
         self.d.press("back")
-        sleep(ACTION_DELAY)
-        log.info("Left stream via back")
+        self._sleep(ACTION_DELAY)
+        self.log.info("Left stream via back")
 
     # ── Giveaway detection ──
 
+    def _snapshot(self):
+        """Dump the UI hierarchy once and parse it locally."""
+        return parse_hierarchy(self.d.dump_hierarchy())
+
+    def _click_bounds(self, bounds):
+        """Click the center of a parsed node's bounds."""
+        self.d.click((bounds.get("left", 0) + bounds.get("right", 0)) // 2,
+                     (bounds.get("top", 0) + bounds.get("bottom", 0)) // 2)
+
+    def observe(self):
+        """Lazy, memoized observation of the stream on screen."""
+        return StreamObservation(self.d, self.clock, self.ocr, self.screen)
+
+    def _calibrate(self, obs):
+        """
+        Fit the screen profile to the first stream screen seen (a scaled
+        profile is only a guess) and cache the result.
+        """
+        if self.screen.source == "captured" or not self.screen.refine(obs.nodes):
+            return
+        self.log.info(f"Calibrated screen from a stream capture: viewer count "
+                      f"right of x={self.screen.viewer_min_left}, top bar above "
+                      f"y={self.screen.top_bar_bottom}")
+        self._save_screen()
+
+    def _save_screen(self):
+        if self._screen_cache:
+            try:
+                self._screen_cache.put(self.serial, self.screen)
+            except OSError as e:
+                self.log.warning("Couldn't save screen profile: %s", e)
+
     def has_giveaway(self):
         return self.d(text="Giveaway").exists
 
-    @staticmethod
-    def _parse_viewer_text(text):
-        """Parse viewer count strings like '5', '1.3k', '1.3K', '12K'."""
-        text = text.strip().lower()
-        if text.endswith("k"):
-            try:
-                return int(float(text[:-1]) * 1000)
-            except ValueError:
-                return None
-        if text.isdigit():
-            return int(text)
-        return None
+    _parse_viewer_text = staticmethod(parse_viewer_text)
 
     def get_viewer_count(self):
-        for attempt in range(2):
-            for node in self.d.xpath("//*").all():
-                info = node.info
-                text = info.get("text", "")
-                bounds = info.get("bounds", {})
-                if (bounds.get("left", 0) > 700
-                        and bounds.get("top", 0) < 300):
-                    count = self._parse_viewer_text(text)
-                    if count is not None:
-                        return count
-            if attempt == 0:
-                time.sleep(1.5)  # wait for UI to load, retry
-        return None
+        # Waits once for the UI to load if the count is missing
+        return self.observe().settled_viewers()
 
     def get_streamer_name(self):
-        for node in self.d.xpath("//*").all():
-            info = node.info
-            desc = info.get("contentDescription", "")
-            bounds = info.get("bounds", {})
-            if (desc and bounds.get("left", 0) < 200
-                    and 80 < bounds.get("top", 0) < 300
-                    and desc not in ("Leave", "Ship Time")):
-                return desc
-        return "unknown"
-
-    def check_is_pack_giveaway(self):
-        for node in self.d.xpath("//*").all():
-            info = node.info
-            text = info.get("text", "").lower()
-            bounds = info.get("bounds", {})
-            if bounds.get("top", 0) < 400 and "pack" in text:
-                return True
-        return False
+        return self.observe().name
 
-    def enter_giveaway(self, viewers=None):
+    def classify_giveaway(self, nodes=None):
+        """Class of the giveaway whose panel is open (see classifier.py)."""
+        return self.classifier.classify(nodes or self._snapshot(), self.screen)
+
+    def _limit(self, kind, gw_class):
+        """Per-class limit: kind is max_viewers, max_wait or ended_checks."""
+        return class_limit(self.cfg, kind, gw_class)
+
+    def _scan_max_viewers(self):
         """
-        Open giveaway panel, check type, apply viewer limits, enter.
-        Returns (entered, is_pack, skipped).
+        Viewer cap while scanning. The giveaway class is only known once
+        its panel is open, so streams are kept if any class would allow them.
         """
-        max_viewers_other = self.cfg["max_viewers_other"]
+        return max(self._limit("max_viewers", c) for c in self.classifier.names)
 
-        giveaway_el = self.d(text="Giveaway")
-        if not giveaway_el.exists:
-            return False, False, False
-
-        try:
-            giveaway_el.click()
-        except Exception:
-            log.warning("Giveaway badge went stale, skipping...")
-            return False, False, False
-        sleep(ENTRY_DELAY)
+    @traced
+    def enter_giveaway(self, viewers=None):
+        """
+        Open giveaway panel, classify it, apply its viewer limit, enter.
+        Returns (entered, gw_class, skipped).
+        """
+        nodes = self._open_giveaway_panel(ENTRY_DELAY)
+        if nodes is None:
+            return False, None, False
 
-        is_pack = self.check_is_pack_giveaway()
-        giveaway_type = "PACK" if is_pack else "other"
+        gw_class = self.classify_giveaway(nodes)
+        self._record("giveaway_panel", type=gw_class, viewers=viewers)
 
         # Check viewer limit BEFORE entering
-        if not is_pack and viewers is not None and viewers > max_viewers_other:
-            log.info(f"Non-pack giveaway with {viewers} viewers (>{max_viewers_other}), skipping...")
+        max_viewers = self._limit("max_viewers", gw_class)
+        if viewers is not None and viewers > max_viewers:
+            self.log.info(f"{gw_class.capitalize()} giveaway with {viewers} viewers "
+                          f"(>{max_viewers}), skipping...")
             self._close_giveaway_panel()
-            return False, is_pack, True
-
-        entry_texts = [
-            "Follow Host & Enter Giveaway",
-            "Enter Giveaway",
-            "Enter",
-        ]
-        for text in entry_texts:
-            btn = self.d(text=text)
-            if btn.exists:
-                try:
-                    btn.click()
-                except Exception:
-                    log.warning("Entry button went stale, retrying...")
-                    continue
-                self.giveaways_entered += 1
-                log.info(f"ENTERED {giveaway_type} GIVEAWAY! (total: {self.giveaways_entered})")
-                sleep(ACTION_DELAY)
-                return True, is_pack, False
+            return False, gw_class, True
+
+        if self._find_entry(nodes) and self._click_entry(gw_class):
+            return True, gw_class, False
 
-        log.warning("No entry button found (maybe already entered?)")
+        self.log.warning("No entry button found (maybe already entered?)")
         self._close_giveaway_panel()
-        return False, is_pack, False
+        return False, gw_class, False
 
     def is_giveaway_still_active(self):
         return self.d(text="Giveaway").exists or self.d(text="Entries").exists
@@ -420,16 +608,121 @@ class WhatnotBot:
                 self.d.press("back")
         except Exception:
             self.d.press("back")
-        time.sleep(random.uniform(0.5, 1.0))
+        self._sleep((0.5, 1.0), throttled=False)
+
+    # ── Giveaway panel fast path ──
+
+    def _open_giveaway_panel(self, delay):
+        """
+        Tap the Giveaway badge and return a snapshot of the panel, or None
+        if the badge is gone. Once this device's panel has been seen the
+        bot waits for its Close button instead of sleeping `delay`. The
+        snapshot is needed anyway to classify the giveaway, so the entry
+        tap uses the bounds found in it; the cached entry button only
+        tells that waiting for Close is enough.
+        """
+        giveaway_el = self.d(text="Giveaway")
+        if not giveaway_el.exists:
+            return None
+        try:
+            giveaway_el.click()
+        except Exception:
+            self.log.warning("Giveaway badge went stale")
+            return None
+        if self.screen.entry_label is None or not self.d(description="Close").wait(
+                timeout=PANEL_WAIT):
+            self._sleep(delay, throttled=False)
+        return self._snapshot()
+
+    def _find_entry(self, nodes):
+        """
+        Find the entry button in a panel snapshot for _click_entry. False
+        if the panel has none.
+        """
+        button = next((info for text in ENTRY_TEXTS for info in nodes
+                       if info["text"] == text), None)
+        if button is None:
+            self._entry = None
+            return False
+        b = button["bounds"]
+        bounds = (b.get("left", 0), b.get("top", 0), b.get("right", 0), b.get("bottom", 0))
+        self._entry = (button["text"], bounds)
+        return True
+
+    def _click_entry(self, gw_class):
+        """
+        Tap the entry button _find_entry found, by its coordinates, then
+        check it took: the button should be gone. One retry through the
+        selector if it isn't. Returns True if entered. The button is
+        cached in the screen profile after the tap, off the entry path.
+        """
+        if self._entry is None:
+            return False
+        entry, self._entry = self._entry, None
+        label, (left, top, right, bottom) = entry
+        self.d.click((left + right) // 2, (top + bottom) // 2)
+        if (self.screen.entry_label, self.screen.entry_bounds) != entry:
+            self.screen.entry_label, self.screen.entry_bounds = entry
+            self._save_screen()
+        self._sleep(ENTRY_VERIFY_DELAY, throttled=False)
+        btn = self.d(text=label)
+        if btn.exists:
+            self.log.info("Entry tap didn't take, retrying...")
+            try:
+                btn.click()
+            except Exception:
+                self.log.warning("Entry button went stale")
+                return False
+            self._sleep(ENTRY_VERIFY_DELAY, throttled=False)
+            if btn.exists:
+                self.log.warning("Entry button still there after retry")
+                return False
+        self.giveaways_entered += 1
+        self.log.info("ENTERED %s GIVEAWAY! (total: %d)", gw_class.upper(), self.giveaways_entered)
+        self._record("entered", total=self.giveaways_entered)
+        self._sleep(ACTION_DELAY, throttled=False)
+        return True
 
     # ── Main logic ──
 
+    def _claim(self, keys):
+        """Claim a stream before evaluating it. Returns None, or why it's taken."""
+        return self.fleet.claim(keys, self.bot_id)
+
+    def _remember(self, keys, name, result, **info):
+        """Publish a stream evaluation under its name and/or grid card key."""
+        self.fleet.publish(keys, self.bot_id, name, result, **info)
+
+    def _skip_reason(self, cached):
+        if cached.get("by") not in (None, self.bot_id):
+            return f"{cached['result']} by {cached['by']}"
+        return cached["result"]
+
+    def _grid_cards(self, page):
+        """
+        Thumbnails on the grid from one dump. Each card gets a key from
+        the caption text under its thumbnail (viewer counts and Live
+        badges left out, since they change), or its position if it has
+        no caption, and the viewer count and host name when shown.
+        """
+        cards = []
+        for card in grid_cards(self._snapshot()):
+            texts = card["captions"]
+            key = "card:" + "|".join(texts) if texts else f"pos:{page}:{len(cards)}"
+            # The last caption line is the host's username
+            cards.append({"key": key, "bounds": card["bounds"], "viewers": card["viewers"],
+                          "name": texts[-1] if texts else None})
+        return cards
+
+    @traced
     def find_giveaway_stream(self):
         """
         Scroll through streams looking for one with an active giveaway.
         Detects when stuck on the same stream and bails early.
+        Streams evaluated recently, or claimed by another device (see
+        self.fleet), are scrolled past.
         """
-        max_viewers_pack = self.cfg["max_viewers_pack"]
+        max_viewers = self._scan_max_viewers()
         max_scrolls = 30
         last_name = None
         stuck_count = 0
@@ -438,217 +731,261 @@ class WhatnotBot:
             if self._stopped():
                 return False, None
 
-            name = self.get_streamer_name()
-            viewers = self.get_viewer_count()
-            has_gw = self.has_giveaway()
-
-            log.info(f"Stream #{self.streams_checked}: {name} "
-                     f"({viewers or '?'} viewers) "
-                     f"{'GIVEAWAY!' if has_gw else 'no giveaway'}")
+            # Name comes first here — stuck detection and the fleet
+            # claim need it, and the badge is then read from the same
+            # dump. The viewer retry wait is only paid for candidates.
+            obs = self.observe()
+            self._calibrate(obs)
+            name = obs.name
 
             # Stuck detection — same name means swipe didn't move
             if name == last_name:
                 stuck_count += 1
                 if stuck_count >= 3:
-                    log.info(f"Stuck on {name} for {stuck_count} scrolls, refreshing...")
+                    self.log.info(f"Stuck on {name} for {stuck_count} scrolls, refreshing...")
                     return False, None
             else:
                 stuck_count = 0
             last_name = name
 
+            cached = self._claim([name])
+            if cached is not None:
+                self.log.info("Stream #%d: %s checked recently (%s), skipping",
+                              self.streams_checked, name, self._skip_reason(cached))
+                self.scroll_to_next_stream()
+                continue
+
+            has_gw = obs.has_giveaway
+            viewers = obs.settled_viewers() if has_gw else obs.viewers
+
+            self.log.info("Stream #%d: %s (%s viewers) %s",
+                          self.streams_checked, name, viewers or "?",
+                          "GIVEAWAY!" if has_gw else "no giveaway")
+            self._record("stream", name=name, viewers=viewers, has_giveaway=has_gw)
+
             if has_gw:
-                if viewers is not None and viewers > max_viewers_pack:
-                    log.info(f"Too many viewers ({viewers}), skipping...")
+                if viewers is not None and viewers > max_viewers:
+                    self.log.info("Too many viewers (%s), skipping...", viewers)
+                    self._remember([name], name, "too many viewers",
+                                   viewers=viewers, has_giveaway=True)
+                    self._note_opportunity(name, viewers)
                     self.scroll_to_next_stream()
                     continue
 
-                log.info(f"Found giveaway stream: {name}")
+                self.log.info(f"Found giveaway stream: {name}")
+                self._current_stream = ([name], name, {"viewers": viewers})
                 return True, viewers
 
+            self._remember([name], name, "no giveaway", viewers=viewers,
+                           has_giveaway=False)
             self.scroll_to_next_stream()
 
-        log.info("Checked many streams, refreshing...")
+        self.log.info("Checked many streams, refreshing...")
         return False, None
 
+    @traced
     def find_giveaway_stream_grid(self):
         """
         Grid-based stream finder for lowest_viewer mode.
         Clicks each thumbnail from the category grid, checks for giveaway
-        inside the stream, and goes back if none found.
+        inside the stream, and goes back if none found. The grid is re-read
+        from one dump after every visit, so reordering doesn't cause
+        re-opens, and cards evaluated recently or claimed by another device
+        (see self.fleet) are skipped.
         Returns (found, viewers) — when found=True the bot is inside the stream.
         """
-        max_viewers_pack = self.cfg["max_viewers_pack"]
+        max_viewers = self._scan_max_viewers()
         max_checks = 30
+        max_scrolls = 20
         checked = 0
+        scrolls = 0
         stale_scrolls = 0
+        seen = set()
+
+        thumbnails = self.d(resourceId="show_item_thumbnail")
+        if not thumbnails.wait(timeout=10):
+            self.log.info("No thumbnails visible on grid after waiting 10s")
+            return False, None
 
         while checked < max_checks:
             if self._stopped():
                 return False, None
 
-            thumbnails = self.d(resourceId="show_item_thumbnail")
-            if not thumbnails.wait(timeout=10):
-                log.info("No thumbnails visible on grid after waiting 10s")
+            cards = self._grid_cards(scrolls)
+            if not cards and scrolls == 0:
+                self.log.info("No thumbnails visible on grid")
                 return False, None
-            count = thumbnails.count
 
-            if count == 0:
-                log.info("No thumbnails visible on grid")
-                return False, None
-
-            for i in range(count):
-                if self._stopped():
-                    return False, None
-                if checked >= max_checks:
+            card = None
+            for c in cards:
+                if c["key"] in seen:
+                    continue
+                seen.add(c["key"])
+                cached = self._claim([c["key"]])
+                if cached is None:
+                    card = c
                     break
+                self.log.info("Skipping %s (checked recently: %s)",
+                              cached["name"], self._skip_reason(cached))
 
-                # Re-fetch thumbnails in case UI shifted
-                thumbnails = self.d(resourceId="show_item_thumbnail")
-                if i >= thumbnails.count:
+            if card is None:
+                # Nothing new on screen — scroll grid down to load more
+                if scrolls >= max_scrolls:
                     break
+                visible = {c["key"] for c in cards}
+                self.d.swipe(*self.screen.grid_swipe, duration=self.rng.uniform(0.3, 0.5))
+                self._sleep((2.0, 3.5))
+                scrolls += 1
+
+                after = {c["key"] for c in self._grid_cards(scrolls)}
+                if not after or after == visible:
+                    stale_scrolls += 1
+                else:
+                    stale_scrolls = 0
 
-                try:
-                    thumbnails[i].click()
-                except Exception:
-                    log.warning(f"Stale thumbnail at index {i}, skipping")
-                    continue
-                time.sleep(random.uniform(2.0, 3.5))
-
-                self.streams_checked += 1
-                checked += 1
-
-                name = self.get_streamer_name()
-                viewers = self.get_viewer_count()
-                has_gw = self.has_giveaway()
+                if stale_scrolls >= 2:
+                    self.log.info("No more streams to load, refreshing...")
+                    return False, None
+                continue
 
-                log.info(f"Stream #{self.streams_checked}: {name} "
-                         f"({viewers or '?'} viewers) "
-                         f"{'GIVEAWAY!' if has_gw else 'no giveaway'}")
+            self._click_bounds(card["bounds"])
+            self._sleep((2.0, 3.5))
 
-                if has_gw:
-                    if viewers is not None and viewers > max_viewers_pack:
-                        log.info(f"Too many viewers ({viewers}), skipping...")
-                        self.leave_stream()
-                        time.sleep(random.uniform(1.5, 2.5))
-                        continue
+            self.streams_checked += 1
+            checked += 1
 
-                    log.info(f"Found giveaway stream: {name}")
-                    return True, viewers
+            obs = self.observe()
+            self._calibrate(obs)
+            has_gw = obs.has_giveaway
+            name = obs.name
+            viewers = obs.settled_viewers() if has_gw else obs.viewers
 
-                # No giveaway — go back to grid
-                self.leave_stream()
-                time.sleep(random.uniform(1.5, 2.5))
+            self.log.info("Stream #%d: %s (%s viewers) %s",
+                          self.streams_checked, name, viewers or "?",
+                          "GIVEAWAY!" if has_gw else "no giveaway")
+            self._record("stream", name=name, viewers=viewers,
+                         has_giveaway=has_gw, card=card["key"])
 
-            # Scroll grid down to load more thumbnails
-            self.d.swipe(540, 1800, 540, 600, duration=random.uniform(0.3, 0.5))
-            time.sleep(random.uniform(2.0, 3.5))
+            if has_gw:
+                if viewers is not None and viewers > max_viewers:
+                    self.log.info("Too many viewers (%s), skipping...", viewers)
+                    self._remember([card["key"], name], name, "too many viewers",
+                                   viewers=viewers, has_giveaway=True)
+                    self._note_opportunity(name, viewers)
+                    self.leave_stream()
+                    self._sleep((1.5, 2.5))
+                    continue
 
-            new_count = self.d(resourceId="show_item_thumbnail").count
-            if new_count == 0:
-                stale_scrolls += 1
-            else:
-                stale_scrolls = 0
+                self.log.info(f"Found giveaway stream: {name}")
+                self._current_stream = ([card["key"], name], name,
+                                        {"viewers": viewers})
+                # The low-viewer cards left on this page are worth a look later
+                if self.cfg.get("opportunities"):
+                    for c in cards:
+                        if (c["key"] not in seen and c["name"]
+                                and (c["viewers"] or 0) <= max_viewers):
+                            self.opportunities.add(c["name"], "card", c["viewers"])
+                return True, viewers
 
-            if stale_scrolls >= 2:
-                log.info("No more streams to load, refreshing...")
-                return False, None
+            # No giveaway — go back to grid
+            self._remember([card["key"], name], name, "no giveaway",
+                           viewers=viewers, has_giveaway=False)
+            self.leave_stream()
+            self._sleep((1.5, 2.5))
 
-        log.info("Checked many streams from grid, refreshing...")
+        self.log.info("Checked many streams from grid, refreshing...")
         return False, None
 
     def check_can_enter_again(self):
-        """Click giveaway badge to check if a new giveaway started."""
-        giveaway_el = self.d(text="Giveaway")
-        if not giveaway_el.exists:
-            return False, False
+        """
+        Click giveaway badge to check if a new giveaway started. When one
+        has, the panel is left open with its entry button found, for
+        _click_entry.
+        """
+        nodes = self._open_giveaway_panel((1.0, 1.5))
+        if nodes is None:
+            return False, None
 
-        try:
-            giveaway_el.click()
-        except Exception:
-            log.warning("Giveaway badge went stale during check")
-            return False, False
-        time.sleep(random.uniform(1.0, 1.5))
-
-        is_pack = self.check_is_pack_giveaway()
-
-        entry_texts = [
-            "Follow Host & Enter Giveaway",
-            "Enter Giveaway",
-            "Enter",
-        ]
-        for text in entry_texts:
-            btn = self.d(text=text)
-            if btn.exists:
-                log.info(f"New giveaway available! ({'pack' if is_pack else 'other'})")
-                return True, is_pack
+        gw_class = self.classify_giveaway(nodes)
+        if self._find_entry(nodes):
+            self.log.info("New giveaway available! (%s)", gw_class)
+            return True, gw_class
 
         self._close_giveaway_panel()
-        return False, False
+        return False, None
 
-    def stay_for_giveaway(self, is_pack):
+    @traced
+    def stay_for_giveaway(self, gw_class):
         """
         Stay until giveaway ends or max wait hit.
         Two check mechanisms:
           1. Passive (every 8-13s): read badge text without clicking
           2. Active (every ~20s): click badge, check if we can enter again
-        Returns (wait_seconds, capped, new_is_pack).
+        Returns (wait_seconds, capped, new_class). self._gone_since is
+        left at the time the badge was first seen gone, if it was.
         """
-        max_wait = self.cfg["max_wait_pack"] if is_pack else self.cfg["max_wait_other"]
-        ended_checks = self.cfg["ended_checks_pack"] if is_pack else self.cfg["ended_checks_other"]
-        giveaway_type = "pack" if is_pack else "other"
-        start = time.time()
+        max_wait = self._limit("max_wait", gw_class)
+        ended_checks = self._limit("ended_checks", gw_class)
+        start = self.clock.time()
         capped = False
         gone_count = 0
-        last_active_check = time.time()
+        self._gone_since = None
+        last_active_check = self.clock.time()
         ACTIVE_CHECK_INTERVAL = 20  # seconds between active checks
 
-        log.info(f"Staying for {giveaway_type} giveaway (max {max_wait // 60}min, "
-                 f"{ended_checks} confirm checks)...")
+        self.log.info(f"Staying for {gw_class} giveaway (max {max_wait // 60}min, "
+                      f"{ended_checks} confirm checks)...")
 
         while True:
             if self._stopped():
-                wait_seconds = time.time() - start
+                wait_seconds = self.clock.time() - start
                 return wait_seconds, False, None
 
-            sleep(GIVEAWAY_CHECK_INTERVAL)
-            elapsed = time.time() - start
+            self._sleep(GIVEAWAY_CHECK_INTERVAL)
+            elapsed = self.clock.time() - start
 
             if elapsed >= max_wait:
-                log.info(f"Max wait reached ({max_wait // 60}min), moving on.")
+                self.log.info(f"Max wait reached ({max_wait // 60}min), moving on.")
                 capped = True
                 break
 
             # Active check: click badge every ~20s to verify we're still entered
-            if time.time() - last_active_check >= ACTIVE_CHECK_INTERVAL:
-                last_active_check = time.time()
+            if self.clock.time() - last_active_check >= ACTIVE_CHECK_INTERVAL:
+                last_active_check = self.clock.time()
                 if self.has_giveaway():
-                    new_available, new_is_pack = self.check_can_enter_again()
+                    new_available, new_class = self.check_can_enter_again()
                     if new_available:
-                        wait_seconds = time.time() - start
-                        return wait_seconds, False, new_is_pack
+                        wait_seconds = self.clock.time() - start
+                        return wait_seconds, False, new_class
                     gone_count = 0
-                    log.info(f"Still entered, giveaway active ({int(elapsed)}s elapsed)")
+                    self._gone_since = None
+                    self.log.info("Still entered, giveaway active (%ds elapsed)", elapsed)
                     continue
                 else:
                     gone_count += 1
-                    log.info(f"Giveaway badge gone (check {gone_count}/{ended_checks})")
+                    if gone_count == 1:
+                        self._gone_since = self.clock.time()
+                    self.log.info("Giveaway badge gone (check %d/%d)", gone_count, ended_checks)
                     if gone_count >= ended_checks:
-                        log.info("Giveaway confirmed ended.")
+                        self.log.info("Giveaway confirmed ended.")
                         break
                     continue
 
             # Passive check: just read badge text without clicking
             if self.is_giveaway_still_active():
                 gone_count = 0
-                log.info(f"Giveaway still active... ({int(elapsed)}s elapsed)")
+                self._gone_since = None
+                self.log.info("Giveaway still active... (%ds elapsed)", elapsed)
             else:
                 gone_count += 1
-                log.info(f"Giveaway badge gone (check {gone_count}/{ended_checks})")
+                if gone_count == 1:
+                    self._gone_since = self.clock.time()
+                self.log.info("Giveaway badge gone (check %d/%d)", gone_count, ended_checks)
                 if gone_count >= ended_checks:
-                    log.info("Giveaway confirmed ended.")
+                    self.log.info("Giveaway confirmed ended.")
                     break
 
-        wait_seconds = time.time() - start
+        wait_seconds = self.clock.time() - start
         return wait_seconds, capped, None
 
     # ── Giveaway stay + enter helpers ──
@@ -657,84 +994,90 @@ class WhatnotBot:
         """
         Shared logic for both modes: enter giveaway, stay, handle re-entries.
         Bot must already be inside the stream. Returns when done with this stream.
+        How long to wait for a follow-up giveaway comes from the host's
+        history (see cadence.py), which every wait here adds to.
         """
-        entered, is_pack, skipped = self.enter_giveaway(viewers=viewers)
+        entered, gw_class, skipped = self.enter_giveaway(viewers=viewers)
+        self._current_stream[2]["type"] = gw_class
 
         if skipped:
-            log.info(f"Stats: {self.giveaways_entered} entered, "
-                     f"{self.streams_checked} checked")
+            self.log.info(f"Stats: {self.giveaways_entered} entered, "
+                          f"{self.streams_checked} checked")
             return "skipped"
 
         if not entered:
             if not self.is_giveaway_still_active():
-                log.info("Giveaway already ended, moving on.")
-                log.info(f"Stats: {self.giveaways_entered} entered, "
-                         f"{self.streams_checked} checked")
+                self.log.info("Giveaway already ended, moving on.")
+                self.log.info(f"Stats: {self.giveaways_entered} entered, "
+                              f"{self.streams_checked} checked")
                 return "ended"
-            log.info("Already entered this giveaway, staying to wait it out...")
+            self.log.info("Already entered this giveaway, staying to wait it out...")
 
         streamer = self.get_streamer_name()
-        current_is_pack = is_pack
+        current_class = gw_class or OTHER
 
         while not self._stopped():
-            wait_seconds, capped, new_is_pack = self.stay_for_giveaway(current_is_pack)
+            wait_seconds, capped, new_class = self.stay_for_giveaway(current_class)
+            missed = False
+            if new_class is not None:
+                # Enter first; the last giveaway can be logged after
+                missed = not self._click_entry(new_class)
+                if missed:
+                    self._close_giveaway_panel()
 
             current_viewers = self.get_viewer_count()
-            self._log_giveaway(streamer, current_is_pack, wait_seconds, capped, current_viewers)
+            self._log_giveaway(streamer, current_class, wait_seconds, capped, current_viewers)
 
             if self._stopped():
                 break
 
-            if new_is_pack is not None:
-                entry_texts = [
-                    "Follow Host & Enter Giveaway",
-                    "Enter Giveaway",
-                    "Enter",
-                ]
-                for text in entry_texts:
-                    btn = self.d(text=text)
-                    if btn.exists:
-                        btn.click()
-                        self.giveaways_entered += 1
-                        gw_type = "PACK" if new_is_pack else "other"
-                        log.info(f"ENTERED {gw_type} GIVEAWAY! (total: {self.giveaways_entered})")
-                        sleep(ACTION_DELAY)
-                        break
-                current_is_pack = new_is_pack
+            gone_since = self._gone_since
+            if missed:
+                if gone_since:
+                    now = self.clock.time()
+                    self.cadence.observe_none(streamer, now - gone_since, now)
+                self.log.info("Couldn't enter the new giveaway, moving on from this stream.")
+                break
+            if new_class is not None:
+                # The next giveaway came up before the last one was confirmed over
+                now = self.clock.time()
+                self.cadence.observe_followup(streamer, now - gone_since if gone_since else 0.0, now)
+                current_class = new_class
                 continue
 
-            max_viewers = self.cfg["max_viewers_pack"] if current_is_pack else self.cfg["max_viewers_other"]
+            max_viewers = self._limit("max_viewers", current_class)
             if capped or (current_viewers is not None and current_viewers > max_viewers):
-                log.info("Moving on from this stream.")
+                if gone_since and not capped:
+                    now = self.clock.time()
+                    self.cadence.observe_none(streamer, now - gone_since, now)
+                self.log.info("Moving on from this stream.")
                 break
 
-            log.info("Waiting to see if new giveaway starts...")
-            wait_start = time.time()
-            wait_time = rand(NEW_GIVEAWAY_WAIT)
+            # Watching for a follow-up started when the badge disappeared
+            ended_at = gone_since or self.clock.time()
+            wait_time, poll = self.cadence.plan(streamer)
+            history = self.cadence.describe(streamer)
             found_new = False
+            if self.clock.time() - ended_at < wait_time:
+                self.log.info(f"Waiting up to {ended_at + wait_time - self.clock.time():.0f}s "
+                              f"for a new giveaway ({history})...")
+            else:
+                self.log.info(f"Watched {self.clock.time() - ended_at:.0f}s already, "
+                              f"not waiting for another ({history})")
 
-            while time.time() - wait_start < wait_time:
+            while self.clock.time() - ended_at < wait_time:
                 if self._stopped():
                     break
-                time.sleep(random.uniform(3, 6))
+                self._sleep(poll)
                 if self.has_giveaway():
-                    new_available, new_pk = self.check_can_enter_again()
+                    new_available, new_class = self.check_can_enter_again()
                     if new_available:
-                        entry_texts = [
-                            "Follow Host & Enter Giveaway",
-                            "Enter Giveaway",
-                            "Enter",
-                        ]
-                        for text in entry_texts:
-                            btn = self.d(text=text)
-                            if btn.exists:
-                                btn.click()
-                                self.giveaways_entered += 1
-                                gw_type = "PACK" if new_pk else "other"
-                                log.info(f"ENTERED {gw_type} GIVEAWAY! (total: {self.giveaways_entered})")
-                                sleep(ACTION_DELAY)
-                                break
-                        current_is_pack = new_pk
+                        if not self._click_entry(new_class):
+                            self._close_giveaway_panel()
+                            break
+                        now = self.clock.time()
+                        self.cadence.observe_followup(streamer, now - ended_at, now)
+                        current_class = new_class
                         found_new = True
                         break
 
@@ -742,14 +1085,156 @@ class WhatnotBot:
                 break
 
             if not found_new:
-                log.info("No new giveaway, done with this stream.")
+                now = self.clock.time()
+                self.cadence.observe_none(streamer, now - ended_at, now)
+                self.log.info("No new giveaway, done with this stream.")
                 break
 
-        log.info("Done with this stream.")
-        log.info(f"Stats: {self.giveaways_entered} entered, "
-                 f"{self.streams_checked} checked")
+        self.log.info("Done with this stream.")
+        self.log.info(f"Stats: {self.giveaways_entered} entered, "
+                      f"{self.streams_checked} checked")
         return "done"
 
+    # ── Opportunities ──
+
+    def _note_opportunity(self, name, viewers, gw_class=None):
+        """Queue a giveaway passed over for its viewers, if it was near the cap."""
+        if not self.cfg.get("opportunities"):
+            return
+        cap = self._limit("max_viewers", gw_class) if gw_class else self._scan_max_viewers()
+        if viewers is None or viewers <= cap * OPPORTUNITY_VIEWER_SLACK:
+            self.opportunities.add(name, "giveaway", viewers, gw_class)
+
+    def _search_host(self, name):
+        """From Home: Search → type `name` → tap the matching result."""
+        search = self.d(description="Search")
+        if not search.exists:
+            search = self.d(text="Search")
+        if not search.exists:
+            self.log.warning("Search not found on Home")
+            return False
+        field_bottom = search.info.get("bounds", {}).get("bottom", 0)
+        search.click()
+        self._sleep(ACTION_DELAY)
+        self.d.send_keys(name, clear=True)
+        self._sleep(ACTION_DELAY)
+        # The search field holds the same text; results are below it
+        for info in self._snapshot():
+            if info["text"] == name and info["bounds"].get("top", 0) >= field_bottom:
+                self._click_bounds(info["bounds"])
+                return self.d(text=name).wait(timeout=5)
+        self.log.info("No search result for %s", name)
+        return False
+
+    @traced
+    def open_host_stream(self, name):
+        """
+        Go to `name`'s profile (deep link, else search) and open their
+        live stream from it. True if the bot is now in the stream.
+        """
+        if not self.launcher.open_host(name):
+            if not self.go_home() or not self._search_host(name):
+                return False
+        for info in self._snapshot():
+            if info["text"].startswith("Live"):
+                self._click_bounds(info["bounds"])
+                self._sleep((2.0, 3.5))
+                return self.d(description="Leave").exists
+        self.log.info("%s isn't live any more", name)
+        return False
+
+    @traced
+    def visit_opportunities(self):
+        """
+        After a giveaway: try the best fresh streams seen earlier (see
+        opportunities.py) before scanning again. Returns (found, viewers)
+        like the scan loops — when found the bot is inside the stream.
+        """
+        if not self.cfg.get("opportunities"):
+            return False, None
+        max_viewers = self._scan_max_viewers()
+        for _ in range(OPPORTUNITY_JUMPS):
+            if self._stopped():
+                break
+            opp = self.opportunities.pop()
+            if opp is None:
+                break
+            cached = self.fleet.lookup(opp.name)
+            if cached is not None and cached.get("by") not in (None, self.bot_id):
+                continue  # another device has been there since
+            self.log.info("Revisiting %s (%s, %s viewers, seen %.0fs ago)", opp.name, opp.kind,
+                          opp.viewers or "?", self.clock.time() - opp.seen_at)
+            self._off_feed = True
+            if not self.open_host_stream(opp.name):
+                continue
+            self.streams_checked += 1
+            obs = self.observe()
+            name = obs.name
+            has_gw = obs.has_giveaway
+            viewers = obs.settled_viewers() if has_gw else obs.viewers
+            self._record("stream", name=name, viewers=viewers, has_giveaway=has_gw,
+                         revisit=opp.kind)
+            # A giveaway skipped for its class cap is likely still running
+            cap = self._limit("max_viewers", opp.gw_class) if opp.gw_class else max_viewers
+            if has_gw and (viewers is None or viewers <= cap):
+                self.revisit_hits += 1
+                self.log.info("Found giveaway stream: %s (revisited)", name)
+                self._current_stream = ([name], name, {"viewers": viewers})
+                return True, viewers
+            self.log.info("Revisit: %s (%s viewers) %s", name, viewers or "?",
+                          "too many viewers" if has_gw else "no giveaway")
+            self._remember([name], name, "too many viewers" if has_gw else "no giveaway",
+                           viewers=viewers, has_giveaway=has_gw)
+        return False, None
+
+    def _after_giveaway(self, result):
+        """
+        Remember the stream just handled, then try the opportunity queue.
+        Returns (found, viewers) from visit_opportunities.
+        """
+        keys, name, info = self._current_stream
+        self._remember(keys, name, result, has_giveaway=True, **info)
+        self.opportunities.discard(name)
+        found = self.visit_opportunities()
+        if result == "skipped":
+            # Queued after the visit so it isn't revisited straight away
+            self._note_opportunity(name, info.get("viewers"), info.get("type"))
+        return found
+
+    # ── Experiments ──
+
+    def _start_slice(self):
+        """Switch to the experiment arm for now and start counting for it."""
+        now = self.clock.time()
+        arm = self.experiment.arm_at(now, self.device_index)
+        self.cfg = self.experiment.config_for(self._base_cfg, arm)
+        end = self.experiment.slice_end(now)
+        self._slice = {"arm": arm, "start": now, "end": end,
+                       "entries": self.giveaways_entered,
+                       "streams": self.streams_checked}
+        self.log.info(f"Experiment {self.experiment.name}: arm {arm} for "
+                      f"{(end - now) / 60:.0f}min (mode {self.cfg['mode']})")
+        self._record("experiment_arm", experiment=self.experiment.name, arm=arm)
+
+    def _slice_over(self):
+        return self._slice is not None and self.clock.time() >= self._slice["end"]
+
+    def _end_slice(self):
+        """Log what the current arm did in its slice."""
+        s, self._slice = self._slice, None
+        if s is None:
+            return
+        seconds = self.clock.time() - s["start"]
+        entries = self.giveaways_entered - s["entries"]
+        streams = self.streams_checked - s["streams"]
+        self.log.info(f"Arm {s['arm']}: {entries} entered, {streams} checked "
+                      f"in {seconds / 60:.0f}min")
+        try:
+            self.experiment_log.append(s["start"], self.experiment.name, self.bot_id,
+                                       s["arm"], seconds, entries, streams)
+        except OSError as e:
+            self.log.warning(f"Could not log experiment slice: {e}")
+
     # ── Run modes ──
 
     def _run_normal(self, mode):
@@ -757,158 +1242,174 @@ class WhatnotBot:
         if self._stopped():
             return
         if not self.enter_first_stream():
-            log.error("Could not enter a stream, aborting")
+            self.log.error("Could not enter a stream, aborting")
             return
 
         use_followed = False
-        while not self._stopped():
-            found, viewers = self.find_giveaway_stream()
+        pending = None  # (found, viewers) to handle instead of scanning
+        while not self._stopped() and not self._slice_over():
+            found, viewers = pending or self.find_giveaway_stream()
+            pending = None
 
             if self._stopped():
                 break
 
             if not found:
                 self.leave_stream()
-                sleep(TRANSITION_DELAY)
+                self._sleep(TRANSITION_DELAY)
                 use_followed = not use_followed
                 if use_followed:
-                    log.info("Falling back to Followed Hosts...")
+                    self.log.info("Falling back to Followed Hosts...")
                 else:
-                    log.info("Switching back to New And Noteworthy...")
+                    self.log.info("Switching back to New And Noteworthy...")
                 # Keep retrying until we get back in
                 for attempt in range(5):
                     if self._stopped():
                         break
-                    self.go_home()
-                    sleep(ACTION_DELAY)
-                    self.go_to_category(use_followed=use_followed)
-                    sleep(ACTION_DELAY)
+                    self.open_feed(use_followed=use_followed)
+                    self._sleep(ACTION_DELAY)
                     if self.enter_first_stream():
                         break
-                    log.warning(f"Could not re-enter streams (attempt {attempt + 1}/5), waiting...")
-                    time.sleep(random.uniform(5, 10))
+                    self.log.warning(f"Could not re-enter streams (attempt {attempt + 1}/5), waiting...")
+                    self._sleep((5, 10))
                 else:
                     if self._stopped():
                         break
-                    log.warning("All 5 attempts failed, trying other category...")
+                    self.log.warning("All 5 attempts failed, trying other category...")
                     use_followed = not use_followed
-                    self.go_home()
-                    sleep(ACTION_DELAY)
-                    self.go_to_category(use_followed=use_followed)
-                    sleep(ACTION_DELAY)
+                    self.open_feed(use_followed=use_followed)
+                    self._sleep(ACTION_DELAY)
                     if not self.enter_first_stream():
-                        log.warning("Still can't enter, waiting 30s and retrying...")
-                        time.sleep(30)
+                        self.log.warning("Still can't enter, waiting 30s and retrying...")
+                        self.clock.sleep(30)
                         continue
                 continue
 
             result = self._handle_giveaway_in_stream(viewers)
-
-            if result == "skipped" or result == "ended":
-                self.scroll_to_next_stream()
+            found, viewers = self._after_giveaway(result)
+            if found:
+                pending = (found, viewers)
+                continue
+            if self._off_feed:
+                # Revisits led off the feed; start it over
+                self.open_feed(use_followed=use_followed)
+                self._sleep(ACTION_DELAY)
+                if not self.enter_first_stream():
+                    pending = (False, None)
                 continue
 
-            # "done" — finished with giveaway, move to next stream
+            # Finished with this stream, move to the next one
             self.scroll_to_next_stream()
 
     def _run_lowest_viewer(self, mode):
         """Lowest-viewer mode: stay on grid, click thumbnails one by one."""
         use_followed = False
-        while not self._stopped():
-            found, viewers = self.find_giveaway_stream_grid()
+        pending = None  # (found, viewers) to handle instead of scanning
+        while not self._stopped() and not self._slice_over():
+            found, viewers = pending or self.find_giveaway_stream_grid()
+            pending = None
 
             if self._stopped():
                 break
 
             if not found:
-                sleep(TRANSITION_DELAY)
+                self._sleep(TRANSITION_DELAY)
                 use_followed = not use_followed
                 if use_followed:
-                    log.info("Falling back to Followed Hosts...")
+                    self.log.info("Falling back to Followed Hosts...")
                 else:
-                    log.info("Switching back to viewer-count sort...")
+                    self.log.info("Switching back to viewer-count sort...")
                 for attempt in range(5):
                     if self._stopped():
                         break
-                    self.go_home()
-                    sleep(ACTION_DELAY)
-                    self.go_to_category(use_followed=use_followed)
-                    sleep(ACTION_DELAY)
+                    self.open_feed(use_followed=use_followed)
+                    self._sleep(ACTION_DELAY)
                     # Grid mode — just need category to load, check thumbnails
                     thumbnails = self.d(resourceId="show_item_thumbnail")
                     if thumbnails.wait(timeout=10) and thumbnails.count > 0:
                         break
-                    log.warning(f"No streams on grid (attempt {attempt + 1}/5), waiting...")
-                    time.sleep(random.uniform(5, 10))
+                    self.log.warning(f"No streams on grid (attempt {attempt + 1}/5), waiting...")
+                    self._sleep((5, 10))
                 else:
                     if self._stopped():
                         break
-                    log.warning("All 5 attempts failed, trying other category...")
+                    self.log.warning("All 5 attempts failed, trying other category...")
                     use_followed = not use_followed
-                    self.go_home()
-                    sleep(ACTION_DELAY)
-                    self.go_to_category(use_followed=use_followed)
-                    sleep(ACTION_DELAY)
+                    self.open_feed(use_followed=use_followed)
+                    self._sleep(ACTION_DELAY)
                     thumbnails = self.d(resourceId="show_item_thumbnail")
                     if not (thumbnails.wait(timeout=10) and thumbnails.count > 0):
-                        log.warning("Still no streams, waiting 30s and retrying...")
-                        time.sleep(30)
+                        self.log.warning("Still no streams, waiting 30s and retrying...")
+                        self.clock.sleep(30)
                         continue
                 continue
 
             # Bot is inside the giveaway stream
-            self._handle_giveaway_in_stream(viewers)
+            result = self._handle_giveaway_in_stream(viewers)
+            found, viewers = self._after_giveaway(result)
+            if found:
+                pending = (found, viewers)
+                continue
+            if self._off_feed:
+                self.open_feed(use_followed=use_followed)
+                self._sleep(ACTION_DELAY)
+                continue
 
             # Go back to grid
             self.leave_stream()
-            time.sleep(random.uniform(1.5, 2.5))
+            self._sleep((1.5, 2.5))
 
     def run(self):
-        max_viewers_pack = self.cfg["max_viewers_pack"]
-        max_viewers_other = self.cfg["max_viewers_other"]
-        max_wait_pack = self.cfg["max_wait_pack"]
-        max_wait_other = self.cfg["max_wait_other"]
         category = self.cfg["category"]
         mode = self.cfg["mode"]
 
-        log.info("=" * 50)
-        log.info("Whatnot Giveaway Bot Starting")
-        log.info(f"Mode: {mode}")
-        log.info(f"Pack: ≤{max_viewers_pack} viewers, {max_wait_pack // 60}min max")
-        log.info(f"Other: ≤{max_viewers_other} viewers, {max_wait_other // 60}min max")
-        log.info(f"Category: {category}")
-        log.info("=" * 50)
-
+        self.log.info("=" * 50)
+        self.log.info("Whatnot Giveaway Bot Starting")
+        self.log.info(f"Mode: {mode}")
+        if self.experiment:
+            self.log.info(f"Experiment {self.experiment.describe()}")
+        for gw_class in self.classifier.names:
+            self.log.info(f"{gw_class}: ≤{self._limit('max_viewers', gw_class)} viewers, "
+                          f"{self._limit('max_wait', gw_class) // 60}min max")
+        self.log.info(f"Category: {category}")
+        self.log.info("=" * 50)
+
+        self.stats.state = "running"
         try:
-            if self._stopped():
-                return
-            self.go_home()
-            sleep(ACTION_DELAY)
-
-            if self._stopped():
-                return
-            if not self.go_to_category():
-                log.error("Could not find category, aborting")
-                return
-
-            sleep(ACTION_DELAY)
-
-            if mode == "lowest_viewer":
-                self._run_lowest_viewer(mode)
-            else:
-                self._run_normal(mode)
+            while not self._stopped():
+                if self.experiment:
+                    self._start_slice()
+                    mode = self.cfg["mode"]
+                if not self.open_feed():
+                    self.log.error("Could not find category, aborting")
+                    return
+
+                self._sleep(ACTION_DELAY)
+
+                if mode == "lowest_viewer":
+                    self._run_lowest_viewer(mode)
+                else:
+                    self._run_normal(mode)
+                if not self.experiment:
+                    break
+                self._end_slice()
 
         except KeyboardInterrupt:
-            log.info("\nBot stopped by user")
+            self.log.info("\nBot stopped by user")
         except Exception as e:
-            log.error(f"Error: {e}", exc_info=True)
+            self.stats.state = "error"
+            self.log.error(f"Error: {e}", exc_info=True)
         finally:
-            log.info(f"\nFinal: {self.giveaways_entered} giveaways entered, "
-                     f"{self.streams_checked} streams checked")
-            log.info(f"Giveaway log saved to: {LOG_FILE}")
+            if self.stats.state != "error":
+                self.stats.state = "stopped"
+            self.log.info(f"\nFinal: {self.giveaways_entered} giveaways entered, "
+                          f"{self.streams_checked} streams checked")
+            self.log.info(f"Giveaway log saved to: {self.log_file}")
             self.cleanup()
 
 
 if __name__ == "__main__":
-    bot = WhatnotBot()
+    import sys
+    bot = WhatnotBot(config={"record": "--record" in sys.argv,
+                             "trace": "--trace" in sys.argv})
     bot.run()
@@ -0,0 +1,61 @@
+"""Small in-memory caches used by the bot."""
+
+import collections
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire `ttl` seconds after they were
+    last set. The oldest entries are evicted first when full. Time comes
+    from the bot's clock so expiry also works in virtual time.
+    """
+
+    def __init__(self, maxsize, ttl, clock):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = collections.OrderedDict()  # key -> (expires_at, value)
+
+    def _evict_expired(self, now):
+        # Entries are kept in set order and share one TTL, so expired
+        # ones are always at the front
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+
+    def get(self, key, default=None):
+        now = self.clock.time()
+        self._evict_expired(now)
+        entry = self._data.get(key)
+        return entry[1] if entry else default
+
+    def set(self, key, value):
+        now = self.clock.time()
+        self._evict_expired(now)
+        self._data.pop(key, None)
+        self._data[key] = (now + self.ttl, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= self.clock.time():
+            return default
+        return entry[1]
+
+    def items(self):
+        """Live (key, value) pairs, oldest first."""
+        self._evict_expired(self.clock.time())
+        return [(key, value) for key, (_, value) in self._data.items()]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        self._evict_expired(self.clock.time())
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
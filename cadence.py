@@ -0,0 +1,169 @@
+"""
+Per-streamer follow-up cadence: how soon after a giveaway ends does
+this host start the next one, and is it worth waiting for?
+
+Each host's follow-up gaps are modelled as exponential with an unknown
+rate, given a Gamma prior worth CADENCE_PRIOR_EVENTS follow-ups spread
+over CADENCE_PRIOR_GAP seconds each. Every post-giveaway wait adds to a
+host's exposure (seconds watched after a giveaway ended) and, if a new
+giveaway showed up, one event; the estimated rate is
+(prior events + events) / (prior exposure + exposure). Waits that end
+without a follow-up count too, so one-shot hosts drift towards zero.
+
+Because exponential gaps are memoryless, the chance of a follow-up in
+the next second stays rate * exp(-rate * t) after t seconds of waiting.
+The bot waits while that beats SCAN_FIND_RATE, the rate at which
+scanning finds a giveaway elsewhere:
+    wait = ln(rate / SCAN_FIND_RATE) / rate
+clamped to FOLLOWUP_WAIT, and polls about four times per expected gap,
+within FOLLOWUP_POLL.
+
+History is kept in cadence.json next to the giveaway log. Saving
+merges what this bot saw into the file as it is on disk, so several
+bots can share one. When there's no file yet, history is seeded from
+the giveaway CSV log.
+"""
+
+import csv
+import json
+import math
+import time
+
+from config import (
+    CADENCE_PRIOR_GAP, CADENCE_PRIOR_EVENTS, SCAN_FIND_RATE,
+    FOLLOWUP_WAIT, FOLLOWUP_POLL,
+)
+from filestore import locked, replace_file
+
+CADENCE_NAME = "cadence.json"
+# Hosts remembered at most (least recently seen dropped first)
+MAX_HOSTS = 5000
+# Seeding from the CSV log: rows of one host closer than this belong to
+# one visit, and the bot then always waited at least LEGACY_WAIT seconds
+# for a follow-up after the last one
+VISIT_GAP = 900
+LEGACY_WAIT = 45
+
+
+class CadenceModel:
+    def __init__(self, path=None, log_path=None, prior_gap=CADENCE_PRIOR_GAP,
+                 prior_events=CADENCE_PRIOR_EVENTS, scan_rate=SCAN_FIND_RATE):
+        self.path = path
+        self.prior_events = prior_events
+        self.prior_exposure = prior_events * prior_gap
+        self.scan_rate = scan_rate
+        self.hosts = {}   # name -> [events, exposure, last_seen]
+        self._new = {}    # same, only what this bot observed
+        if path:
+            self.load(log_path)
+
+    # ── Estimates ──
+
+    def rate(self, name):
+        """Estimated follow-ups per second for `name`."""
+        events, exposure, _ = self.hosts.get(name, (0, 0.0, 0))
+        return (self.prior_events + events) / (self.prior_exposure + exposure)
+
+    def plan(self, name):
+        """(seconds to wait after a giveaway ends, poll interval range)."""
+        rate = self.rate(name)
+        wait = math.log(rate / self.scan_rate) / rate if rate > self.scan_rate else 0.0
+        wait = min(max(wait, FOLLOWUP_WAIT[0]), FOLLOWUP_WAIT[1])
+        lo, hi = FOLLOWUP_POLL
+        poll = min(max(0.25 / rate, lo), hi)
+        return wait, (max(lo, poll * 0.75), poll)
+
+    def describe(self, name):
+        events, exposure, _ = self.hosts.get(name, (0, 0.0, 0))
+        if not events and not exposure:
+            return "no history"
+        return f"{events} follow-ups in {exposure:.0f}s watched"
+
+    # ── Observations ──
+
+    def observe_followup(self, name, gap, now):
+        """A new giveaway started `gap` seconds after the last one ended."""
+        for table in (self.hosts, self._new):
+            _add(table, name, 1, max(gap, 0.0), now)
+
+    def observe_none(self, name, waited, now):
+        """Watched `waited` seconds after a giveaway ended; nothing started."""
+        for table in (self.hosts, self._new):
+            _add(table, name, 0, max(waited, 0.0), now)
+
+    # ── Persistence ──
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return {k: list(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            return None
+
+    def load(self, log_path=None):
+        """Read the history file, or seed it from the giveaway CSV log."""
+        hosts = self._read()
+        if hosts is None and log_path:
+            hosts = seed_from_log(log_path)
+        self.hosts = hosts or {}
+
+    def save(self):
+        """Merge this bot's observations into the file and write it."""
+        if not self.path or not self._new:
+            return
+        # Re-read under the lock so observations other bots saved
+        # meanwhile are kept (fleet bots all save when Stop is pressed)
+        with locked(self.path):
+            hosts = self._read()
+            if hosts is None:
+                hosts = self.hosts
+            else:
+                for name, (events, exposure, seen) in self._new.items():
+                    _add(hosts, name, events, exposure, seen)
+            if len(hosts) > MAX_HOSTS:
+                keep = sorted(hosts, key=lambda k: hosts[k][2])[-MAX_HOSTS:]
+                hosts = {k: hosts[k] for k in keep}
+            replace_file(self.path, lambda f: json.dump(hosts, f))
+        self.hosts = hosts
+        self._new = {}
+
+
+def _add(table, name, events, exposure, seen):
+    entry = table.setdefault(name, [0, 0.0, 0])
+    entry[0] += events
+    entry[1] += exposure
+    entry[2] = max(entry[2], seen)
+
+
+def seed_from_log(path):
+    """
+    Per-host [events, exposure, last_seen] from the giveaway CSV log.
+    Rows are logged when a giveaway ends, wait_time after it started.
+    """
+    rows = []
+    try:
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    end = time.mktime(time.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S"))
+                    wait = float(row["wait_time"].rstrip("+"))
+                except (KeyError, ValueError, AttributeError):
+                    continue
+                rows.append((row["streamer"], end, end - wait))
+    except OSError:
+        return {}
+
+    hosts = {}
+    last = {}  # name -> end of its previous giveaway
+    for name, end, start in sorted(rows, key=lambda r: r[1]):
+        prev_end = last.get(name)
+        if prev_end is None:
+            _add(hosts, name, 0, 0.0, end)
+        elif start - prev_end <= VISIT_GAP:
+            _add(hosts, name, 1, max(start - prev_end, 0.0), end)
+        else:
+            _add(hosts, name, 0, LEGACY_WAIT, end)  # waited, then left
+        last[name] = end
+    for name in last:
+        hosts[name][1] += LEGACY_WAIT
+    return hosts
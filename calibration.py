@@ -0,0 +1,240 @@
+"""
+Screen calibration — where the detectors look and where the gestures
+go on this particular phone.
+
+Everything was first tuned on a 1080x2400 screen (REFERENCE). A
+ScreenProfile turns that layout into pixels for another screen:
+    top bar     streamer avatar on the left, viewer count and Leave on
+                the right. The app lays it out in dp, so it scales with
+                pixel density (displaySizeDpX when the device reports
+                it, else width / 1080) and stays anchored to the top
+    gestures    swipes span the screen, so they scale with its size
+A profile built that way is "scaled". The first stream screen the bot
+sees is then used as a reference capture: the actual bounds of the
+Leave button, the avatar and the viewer count replace the scaled guesses
+and the profile becomes "captured". The giveaway panel's entry button
+(label and bounds) is added the first time the bot sees one.
+
+Profiles are cached per device serial in calibration.json next to the
+giveaway log, and reused as long as the screen size hasn't changed.
+"""
+
+import json
+
+from filestore import locked, replace_file
+
+CALIBRATION_NAME = "calibration.json"
+REFERENCE_SIZE = (1080, 2400)
+# Pixels per dp of the reference phone (1080 px over 411 dp)
+REFERENCE_DENSITY = 2.625
+
+# The reference layout, in reference pixels
+REFERENCE = {
+    # Viewer count: left edge beyond this, top above top_bar_bottom
+    "viewer_min_left": 700,
+    "top_bar_bottom": 300,
+    # Avatar (streamer name): left edge before this, top between these
+    "name_max_left": 200,
+    "name_min_top": 80,
+    # Giveaway panel title texts sit above this
+    "title_max_top": 400,
+    # The filter panel's sort radio sits this far left of its label
+    "radio_offset": 40,
+    # Next stream: swipe up from y 2100 to 200, x anywhere in this range
+    "stream_swipe_x": (400, 680),
+    "stream_swipe_y": (2100, 200),
+    # Grid: scroll a page-ish down the middle
+    "grid_swipe": (540, 1800, 540, 600),
+}
+# Margins around the captured top bar elements, in reference pixels
+# (what the reference layout leaves around its own)
+VIEWER_MARGIN = 120
+NAME_MARGIN = (40, 170)
+BAR_MARGIN = 100
+# Extra room around the viewer area for the OCR crop (reference pixels)
+OCR_MARGIN = (30, 12)
+
+FIELDS = ("width", "height", "scale", "source", "entry_label",
+          "entry_bounds") + tuple(REFERENCE)
+
+
+class ScreenProfile:
+    """Detector regions and gesture coordinates for one screen, in pixels."""
+
+    def __init__(self, width=REFERENCE_SIZE[0], height=REFERENCE_SIZE[1], scale=None):
+        self.width = width
+        self.height = height
+        self.scale = width / REFERENCE_SIZE[0] if scale is None else scale
+        self.source = "scaled"
+        # Giveaway panel entry button, once seen: label and (l, t, r, b)
+        self.entry_label = None
+        self.entry_bounds = None
+
+        def dp(v):
+            return round(v * self.scale)
+
+        def sx(v):
+            return round(v * width / REFERENCE_SIZE[0])
+
+        def sy(v):
+            return round(v * height / REFERENCE_SIZE[1])
+
+        ref = REFERENCE
+        self.viewer_min_left = width - dp(REFERENCE_SIZE[0] - ref["viewer_min_left"])
+        self.top_bar_bottom = dp(ref["top_bar_bottom"])
+        self.name_max_left = dp(ref["name_max_left"])
+        self.name_min_top = dp(ref["name_min_top"])
+        self.title_max_top = dp(ref["title_max_top"])
+        self.radio_offset = dp(ref["radio_offset"])
+        self.stream_swipe_x = tuple(sx(v) for v in ref["stream_swipe_x"])
+        self.stream_swipe_y = tuple(sy(v) for v in ref["stream_swipe_y"])
+        fx, fy, tx, ty = ref["grid_swipe"]
+        self.grid_swipe = (sx(fx), sy(fy), sx(tx), sy(ty))
+
+    def __repr__(self):
+        return (f"<ScreenProfile {self.width}x{self.height} x{self.scale:.2f} "
+                f"{self.source}>")
+
+    # ── Detector regions ──
+
+    def in_viewer_area(self, bounds):
+        return (bounds.get("left", 0) > self.viewer_min_left
+                and bounds.get("top", 0) < self.top_bar_bottom)
+
+    def in_name_area(self, bounds):
+        return (bounds.get("left", 0) < self.name_max_left
+                and self.name_min_top < bounds.get("top", 0) < self.top_bar_bottom)
+
+    def viewer_region(self):
+        """The viewer area as screen fractions (l, t, r, b), for OCR crops."""
+        mx, my = (round(m * self.scale) for m in OCR_MARGIN)
+        return (max(self.viewer_min_left - mx, 0) / self.width, 0.0,
+                1.0, min(self.top_bar_bottom + my, self.height) / self.height)
+
+    # ── Reference capture ──
+
+    def refine(self, nodes):
+        """
+        Fit the top bar regions to a stream screen (parsed snapshot).
+        Returns False, leaving the profile alone, if `nodes` isn't one.
+        """
+        from observation import parse_viewer_text
+
+        def dp(v):
+            return round(v * self.scale)
+
+        leave = next((n["bounds"] for n in nodes
+                      if n["contentDescription"] == "Leave"), None)
+        if not leave or leave.get("left", 0) < self.width // 2:
+            return False
+        bar_bottom = leave.get("bottom", 0) + dp(BAR_MARGIN)
+
+        # The count sits just left of Leave; the avatar far to the left
+        counts = [n["bounds"] for n in nodes
+                  if n["bounds"].get("top", 0) < bar_bottom
+                  and self.width // 2 < n["bounds"].get("left", 0) < leave.get("left", 0)
+                  and parse_viewer_text(n["text"]) is not None]
+        avatars = [n["bounds"] for n in nodes
+                   if n["contentDescription"]
+                   and n["contentDescription"] not in ("Leave", "Ship Time")
+                   and n["bounds"].get("top", 0) < bar_bottom
+                   and n["bounds"].get("left", 0) < self.width // 3]
+        if not counts or not avatars:
+            return False
+        count = max(counts, key=lambda b: b.get("left", 0))
+        avatar = min(avatars, key=lambda b: b.get("left", 0))
+
+        self.top_bar_bottom = bar_bottom
+        self.viewer_min_left = count.get("left", 0) - dp(VIEWER_MARGIN)
+        self.name_min_top = max(avatar.get("top", 0) - dp(NAME_MARGIN[0]), 0)
+        self.name_max_left = avatar.get("left", 0) + dp(NAME_MARGIN[1])
+        self.source = "captured"
+        return True
+
+    # ── Persistence ──
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls(data["width"], data["height"], data["scale"])
+        for k in FIELDS:
+            value = data.get(k, getattr(profile, k))
+            setattr(profile, k, tuple(value) if isinstance(value, list) else value)
+        return profile
+
+
+REFERENCE_SCREEN = ScreenProfile()
+
+
+def measure(d):
+    """Scaled profile for a device from its window size and density."""
+    width, height = d.window_size()
+    scale = None
+    info = getattr(d, "info", None) or {}
+    dp_width = info.get("displaySizeDpX")
+    if dp_width and info.get("displayWidth"):
+        scale = info["displayWidth"] / dp_width / REFERENCE_DENSITY
+    return ScreenProfile(width, height, scale)
+
+
+def from_capture(nodes):
+    """Profile for a saved stream capture; its size comes from the root node."""
+    root = nodes[0]["bounds"] if nodes else {}
+    profile = ScreenProfile(root.get("right") or REFERENCE_SIZE[0],
+                            root.get("bottom") or REFERENCE_SIZE[1])
+    profile.refine(nodes)
+    return profile
+
+
+class ProfileCache:
+    """Screen profiles by device serial, in one JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, serial, width, height):
+        """The cached profile for `serial`, if it's for this screen size."""
+        data = self._read().get(serial)
+        if not data or (data.get("width"), data.get("height")) != (width, height):
+            return None
+        try:
+            return ScreenProfile.from_dict(data)
+        except (KeyError, TypeError):
+            return None
+
+    def put(self, serial, profile):
+        # Under the lock, so profiles other devices just saved are kept
+        with locked(self.path):
+            profiles = self._read()
+            profiles[serial] = profile.to_dict()
+            replace_file(self.path, lambda f: json.dump(profiles, f, indent=1))
+
+
+def load_profile(d, serial=None, path=None, log=None):
+    """
+    (profile, cache) for a device: the cached profile when there is one
+    for its current screen size, else a freshly scaled one. Without a
+    serial or path nothing is cached (cache is None). A profile that
+    can't be saved is still used; `log` gets a warning.
+    """
+    cache = ProfileCache(path) if serial and path else None
+    width, height = d.window_size()
+    profile = cache.get(serial, width, height) if cache else None
+    if profile is None:
+        profile = measure(d)
+        if cache:
+            try:
+                cache.put(serial, profile)
+            except OSError as e:
+                if log:
+                    log.warning(f"Couldn't save screen profile: {e}")
+    return profile, cache
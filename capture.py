@@ -0,0 +1,126 @@
+"""
+Shared screen capture helpers for the discovery scripts.
+
+A capture writes three files to ./discovery/:
+    NAME_TS.png            screenshot
+    NAME_TS.xml            raw UI hierarchy
+    NAME_TS_elements.json  summary of text / described / clickable nodes
+
+The screenshot is taken while the hierarchy is being dumped, and the
+elements summary is built by parsing the dumped XML locally instead of
+asking the device for every node's info.
+"""
+
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+DISCOVERY_DIR = os.path.join(os.path.dirname(__file__), "discovery")
+
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def parse_bounds(text):
+    """Parse '[l,t][r,b]' into uiautomator2's bounds dict."""
+    m = _BOUNDS_RE.match(text or "")
+    if not m:
+        return {}
+    left, top, right, bottom = (int(v) for v in m.groups())
+    return {"left": left, "top": top, "right": right, "bottom": bottom}
+
+
+def parse_hierarchy(xml):
+    """
+    Parse a dump_hierarchy() string into a flat list of node dicts,
+    in document order. Keys mirror uiautomator2's node.info so callers
+    can use either interchangeably.
+    """
+    root = ET.fromstring(xml)
+    nodes = []
+    for el in root.iter("node"):
+        a = el.attrib
+        nodes.append({
+            "text": a.get("text", ""),
+            "contentDescription": a.get("content-desc", ""),
+            "className": a.get("class", ""),
+            "resourceName": a.get("resource-id", ""),
+            "packageName": a.get("package", ""),
+            "clickable": a.get("clickable") == "true",
+            "enabled": a.get("enabled") == "true",
+            "selected": a.get("selected") == "true",
+            "bounds": parse_bounds(a.get("bounds")),
+        })
+    return nodes
+
+
+def summarize(nodes):
+    """Keep nodes with text, a content description, or a click handler."""
+    elements = []
+    for info in nodes:
+        if info["text"] or info["contentDescription"] or info["clickable"]:
+            elements.append({
+                "text": info["text"],
+                "content_desc": info["contentDescription"],
+                "class": info["className"],
+                "resource_id": info["resourceName"],
+                "clickable": info["clickable"],
+                "bounds": info["bounds"],
+            })
+    return elements
+
+
+def print_summary(elements, limit=30):
+    for el in elements[:limit]:
+        text = el["text"] or el["content_desc"] or el["resource_id"]
+        if text:
+            click = " [clickable]" if el["clickable"] else ""
+            print(f"  - {text}{click}")
+    if len(elements) > limit:
+        print(f"  ... and {len(elements) - limit} more (see JSON)")
+
+
+def capture(d, name, out_dir=DISCOVERY_DIR):
+    """
+    Capture screenshot, hierarchy XML and elements summary for the
+    current screen. Returns (prefix_path, elements).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = os.path.join(out_dir, f"{name}_{int(time.time())}")
+    ss_path = f"{prefix}.png"
+
+    # Screenshot runs alongside the dump — both are independent RPCs
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        shot = pool.submit(d.screenshot, ss_path)
+        xml = d.dump_hierarchy()
+        shot.result()
+
+    with open(f"{prefix}.xml", "w") as f:
+        f.write(xml)
+
+    elements = summarize(parse_hierarchy(xml))
+    with open(f"{prefix}_elements.json", "w") as f:
+        json.dump(elements, f, indent=2)
+
+    return prefix, elements
+
+
+def capture_batch(d, names, delay=None, out_dir=DISCOVERY_DIR, limit=30):
+    """
+    Capture a named sequence of screens. Between captures, waits for
+    Enter (navigate in the app first) or sleeps `delay` seconds.
+    Returns {name: elements}.
+    """
+    results = {}
+    for i, name in enumerate(names):
+        if delay is None:
+            input(f"[{i + 1}/{len(names)}] Open '{name}' and press Enter...")
+        elif i > 0:
+            time.sleep(delay)
+        prefix, elements = capture(d, name, out_dir=out_dir)
+        print(f"Captured '{name}': {prefix}.png ({len(elements)} elements)")
+        print_summary(elements, limit)
+        results[name] = elements
+    return results
@@ -0,0 +1,336 @@
+"""
+Searchable index of the discovery/ capture corpus.
+
+Every NAME_TS.xml capture is parsed once into SQLite: one row per node
+with its text, content-desc, resource-id, class and bounds, plus an
+FTS5 full-text index over the string fields. Indexing is incremental —
+only new or changed captures are parsed, and deleted ones are dropped.
+
+Usage:
+    python catalog.py index
+    python catalog.py search "Enter Giveaway" --region 0,0,1080,400
+    python catalog.py search --rid show_item_thumbnail --captures
+    python catalog.py search --desc Leave --screen stream --clickable
+    python catalog.py --dir other_captures/ stats
+
+Search terms combine with AND. The positional query is full-text (FTS5
+syntax; plain words match as a phrase), --text/--desc/--rid/--class are
+exact, and --region keeps nodes whose center lies inside l,t,r,b.
+"""
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+
+from capture import DISCOVERY_DIR, parse_hierarchy
+
+CATALOG_NAME = "catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    prefix TEXT UNIQUE NOT NULL,
+    name TEXT,
+    ts INTEGER,
+    mtime REAL,
+    size INTEGER,
+    has_png INTEGER,
+    nodes INTEGER
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    capture_id INTEGER NOT NULL REFERENCES captures(id) ON DELETE CASCADE,
+    idx INTEGER,
+    text TEXT,
+    content_desc TEXT,
+    resource_id TEXT,
+    class TEXT,
+    package TEXT,
+    clickable INTEGER,
+    left INTEGER, top INTEGER, right INTEGER, bottom INTEGER
+);
+CREATE INDEX IF NOT EXISTS nodes_capture ON nodes(capture_id);
+CREATE INDEX IF NOT EXISTS nodes_text ON nodes(text);
+CREATE INDEX IF NOT EXISTS nodes_desc ON nodes(content_desc);
+CREATE INDEX IF NOT EXISTS nodes_rid ON nodes(resource_id);
+CREATE INDEX IF NOT EXISTS nodes_class ON nodes(class);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts USING fts5(
+    text, content_desc, resource_id, class, tokenize='unicode61'
+);
+"""
+
+
+def split_prefix(prefix):
+    """'stream_1712345678' -> ('stream', 1712345678)."""
+    name, _, ts = os.path.basename(prefix).rpartition("_")
+    if ts.isdigit() and name:
+        return name, int(ts)
+    return os.path.basename(prefix), None
+
+
+def _fts_query(text):
+    """Plain words become one phrase; anything with FTS syntax passes through."""
+    if any(c in text for c in '"*:()') or any(
+            w in text.split() for w in ("AND", "OR", "NOT", "NEAR")):
+        return text
+    return '"' + text.replace('"', '""') + '"'
+
+
+class Catalog:
+    def __init__(self, capture_dir=DISCOVERY_DIR, path=None):
+        self.capture_dir = capture_dir
+        self.path = path or os.path.join(capture_dir, CATALOG_NAME)
+        self._dir_mtime = None
+        with self.session() as db:
+            db.executescript(_SCHEMA)
+            try:
+                db.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:  # SQLite built without FTS5
+                self.fts = False
+
+    @contextlib.contextmanager
+    def session(self):
+        """
+        A fresh connection for one unit of work, committed and closed on
+        exit — SQLite connections can't be shared across threads.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA foreign_keys = ON")
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    # ── Indexing ──
+
+    def _drop(self, db, capture_id):
+        if self.fts:
+            db.execute("DELETE FROM nodes_fts WHERE rowid IN "
+                       "(SELECT id FROM nodes WHERE capture_id = ?)", (capture_id,))
+        db.execute("DELETE FROM captures WHERE id = ?", (capture_id,))
+
+    def _ingest(self, db, prefix, st):
+        with open(prefix + ".xml", encoding="utf-8") as f:
+            xml = f.read()
+        try:
+            nodes = parse_hierarchy(xml)
+        except ET.ParseError as e:
+            # Still recorded (with no nodes) so it isn't retried until it changes
+            print(f"  {os.path.basename(prefix)}: unreadable hierarchy ({e})")
+            nodes = []
+        name, ts = split_prefix(prefix)
+        cur = db.execute(
+            "INSERT INTO captures (prefix, name, ts, mtime, size, has_png, nodes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.path.basename(prefix), name, ts, st.st_mtime, st.st_size,
+             int(os.path.exists(prefix + ".png")), len(nodes)))
+        capture_id = cur.lastrowid
+        rows = []
+        for i, n in enumerate(nodes):
+            b = n["bounds"]
+            rows.append((capture_id, i, n["text"], n["contentDescription"],
+                         n["resourceName"], n["className"], n["packageName"],
+                         int(n["clickable"]), b.get("left"), b.get("top"),
+                         b.get("right"), b.get("bottom")))
+        db.executemany(
+            "INSERT INTO nodes (capture_id, idx, text, content_desc, resource_id, "
+            "class, package, clickable, left, top, right, bottom) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if self.fts:
+            db.execute(
+                "INSERT INTO nodes_fts (rowid, text, content_desc, resource_id, class) "
+                "SELECT id, text, content_desc, resource_id, class FROM nodes "
+                "WHERE capture_id = ?", (capture_id,))
+        return len(nodes)
+
+    def index(self):
+        """
+        Bring the index up to date with capture_dir. Returns
+        {"added", "updated", "removed", "total"}.
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        on_disk = {}
+        if os.path.isdir(self.capture_dir):
+            for entry in os.scandir(self.capture_dir):
+                if entry.name.endswith(".xml"):
+                    on_disk[entry.name[:-4]] = entry.stat()
+
+        with self.session() as db:
+            known = {row["prefix"]: row for row in
+                     db.execute("SELECT id, prefix, mtime, size FROM captures")}
+            for prefix, row in known.items():
+                if prefix not in on_disk:
+                    self._drop(db, row["id"])
+                    counts["removed"] += 1
+            for prefix, st in sorted(on_disk.items()):
+                row = known.get(prefix)
+                if row is not None:
+                    if row["mtime"] == st.st_mtime and row["size"] == st.st_size:
+                        continue
+                    self._drop(db, row["id"])
+                    counts["updated"] += 1
+                else:
+                    counts["added"] += 1
+                try:
+                    self._ingest(db, os.path.join(self.capture_dir, prefix), st)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"  skipped {prefix}: {e}")
+            counts["total"] = db.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+        return counts
+
+    def refresh(self):
+        """Re-index only if the capture directory changed since last time."""
+        try:
+            mtime = os.stat(self.capture_dir).st_mtime
+        except OSError:
+            return None
+        if mtime == self._dir_mtime:
+            return None
+        counts = self.index()
+        # Stat again: writing the index itself touches the directory
+        self._dir_mtime = os.stat(self.capture_dir).st_mtime
+        return counts
+
+    # ── Queries ──
+
+    def search(self, query=None, text=None, desc=None, rid=None, cls=None,
+               region=None, clickable=None, screen=None, captures_only=False,
+               limit=200):
+        """
+        Matching nodes (or, with captures_only, matching captures with a
+        hit count), newest capture first. `region` is (l, t, r, b).
+        """
+        where, args = [], []
+        if query:
+            if self.fts:
+                where.append("n.id IN (SELECT rowid FROM nodes_fts WHERE nodes_fts MATCH ?)")
+                args.append(_fts_query(query))
+            else:
+                where.append("(n.text LIKE ? OR n.content_desc LIKE ? "
+                             "OR n.resource_id LIKE ? OR n.class LIKE ?)")
+                args.extend([f"%{query}%"] * 4)
+        for column, value in (("text", text), ("content_desc", desc),
+                              ("resource_id", rid), ("class", cls)):
+            if value is not None:
+                where.append(f"n.{column} = ?")
+                args.append(value)
+        if region is not None:
+            l, t, r, b = region
+            where.append("(n.left + n.right) / 2 BETWEEN ? AND ? "
+                         "AND (n.top + n.bottom) / 2 BETWEEN ? AND ?")
+            args.extend([l, r, t, b])
+        if clickable is not None:
+            where.append("n.clickable = ?")
+            args.append(int(clickable))
+        if screen:
+            where.append("c.name = ?")
+            args.append(screen)
+        clause = " AND ".join(where) or "1"
+
+        if captures_only:
+            sql = (f"SELECT c.prefix, c.name, c.ts, c.has_png, COUNT(*) AS hits "
+                   f"FROM nodes n JOIN captures c ON c.id = n.capture_id "
+                   f"WHERE {clause} GROUP BY c.id ORDER BY c.ts DESC LIMIT ?")
+        else:
+            sql = (f"SELECT c.prefix, c.name, c.ts, n.idx, n.text, n.content_desc, "
+                   f"n.resource_id, n.class, n.clickable, "
+                   f"n.left, n.top, n.right, n.bottom "
+                   f"FROM nodes n JOIN captures c ON c.id = n.capture_id "
+                   f"WHERE {clause} ORDER BY c.ts DESC, n.idx LIMIT ?")
+        with self.session() as db:
+            return [dict(row) for row in db.execute(sql, args + [limit])]
+
+    def stats(self):
+        with self.session() as db:
+            captures, nodes = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nodes), 0) FROM captures").fetchone()
+            screens = [dict(r) for r in db.execute(
+                "SELECT name, COUNT(*) AS captures, MAX(ts) AS latest "
+                "FROM captures GROUP BY name ORDER BY latest DESC")]
+        return {"captures": captures, "nodes": nodes, "fts": self.fts,
+                "screens": screens}
+
+
+def parse_region(text):
+    """'l,t,r,b' -> tuple of ints."""
+    parts = [int(p) for p in text.split(",")]
+    if len(parts) != 4:
+        raise ValueError("region must be l,t,r,b")
+    return tuple(parts)
+
+
+def _print_results(results, captures_only):
+    for r in results:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["ts"])) if r["ts"] else "?"
+        if captures_only:
+            png = "" if r["has_png"] else "  (no png)"
+            print(f"{r['prefix']:<40} {when}  {r['hits']} hits{png}")
+        else:
+            label = r["text"] or r["content_desc"] or r["resource_id"] or r["class"]
+            bounds = f"[{r['left']},{r['top']}][{r['right']},{r['bottom']}]"
+            click = " [clickable]" if r["clickable"] else ""
+            print(f"{r['prefix']:<40} #{r['idx']:<4} {bounds:<24} {label}{click}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search discovery captures.")
+    parser.add_argument("--dir", default=DISCOVERY_DIR, help="capture directory")
+    sub = parser.add_subparsers(dest="cmd")
+    sub.add_parser("index", help="ingest new or changed captures")
+    p_search = sub.add_parser("search", help="query the index")
+    p_search.add_argument("query", nargs="?", help="full-text query")
+    p_search.add_argument("--text")
+    p_search.add_argument("--desc")
+    p_search.add_argument("--rid")
+    p_search.add_argument("--class", dest="cls")
+    p_search.add_argument("--region", type=parse_region, help="l,t,r,b")
+    p_search.add_argument("--clickable", action="store_true", default=None)
+    p_search.add_argument("--screen", help="capture name, e.g. stream")
+    p_search.add_argument("--captures", action="store_true",
+                          help="list matching captures instead of nodes")
+    p_search.add_argument("--limit", type=int, default=50)
+    sub.add_parser("stats", help="summary of the index")
+    args = parser.parse_args()
+
+    if args.cmd == "index":
+        catalog = Catalog(args.dir)
+        t0 = time.perf_counter()
+        counts = catalog.index()
+        print(f"Indexed in {time.perf_counter() - t0:.2f}s: {counts['added']} added, "
+              f"{counts['updated']} updated, {counts['removed']} removed, "
+              f"{counts['total']} total")
+    elif args.cmd == "search":
+        catalog = Catalog(args.dir)
+        catalog.refresh()
+        t0 = time.perf_counter()
+        try:
+            results = catalog.search(
+                args.query, text=args.text, desc=args.desc, rid=args.rid,
+                cls=args.cls, region=args.region, clickable=args.clickable,
+                screen=args.screen, captures_only=args.captures, limit=args.limit)
+        except sqlite3.OperationalError as e:
+            parser.error(f"bad query: {e}")
+        _print_results(results, args.captures)
+        print(f"\n{len(results)} results in {(time.perf_counter() - t0) * 1000:.1f}ms")
+    elif args.cmd == "stats":
+        stats = Catalog(args.dir).stats()
+        print(f"{stats['captures']} captures, {stats['nodes']} nodes "
+              f"(full-text: {'yes' if stats['fts'] else 'no'})")
+        for s in stats["screens"]:
+            print(f"  {s['name']:<24} {s['captures']}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Giveaway classifier — names the kind of giveaway (pack, booster box,
+slab, ...) from the texts of one hierarchy snapshot.
+
+All keywords of all classes are compiled into a single regex, one named
+group per class, so a snapshot is classified in one pass over its text
+however many keywords are configured. Keywords match whole words,
+case-insensitively, with an optional plural "s"; spaces in a keyword
+match any run of whitespace. When texts match several classes the one
+listed first in GIVEAWAY_CLASSES wins. No match means OTHER.
+
+Each class has its own limits in the bot config:
+    max_viewers_<class>, max_wait_<class>, ended_checks_<class>
+falling back to the OTHER entries for classes without them.
+"""
+
+import re
+
+from calibration import REFERENCE_SCREEN
+from config import GIVEAWAY_CLASSES
+
+OTHER = "other"
+LIMIT_KINDS = ("max_viewers", "max_wait", "ended_checks")
+
+
+def _keyword_pattern(keyword):
+    words = keyword.lower().split()
+    return r"\s+".join(re.escape(w) for w in words)
+
+
+def compile_classes(classes):
+    """One regex for all classes; group names are the class names."""
+    groups = []
+    for name, keywords in classes.items():
+        # Longest first, so "elite trainer box" beats "elite trainer"
+        alts = sorted((_keyword_pattern(k) for k in keywords), key=len, reverse=True)
+        groups.append(f"(?P<{name}>{'|'.join(alts)})")
+    return re.compile(r"\b(?:" + "|".join(groups) + r")s?\b", re.IGNORECASE)
+
+
+class GiveawayClassifier:
+    def __init__(self, classes=None):
+        classes = GIVEAWAY_CLASSES if classes is None else classes
+        self.classes = list(classes)
+        self._rank = {name: i for i, name in enumerate(self.classes)}
+        self._pattern = compile_classes(classes)
+
+    @property
+    def names(self):
+        """Every class a giveaway can get, OTHER last."""
+        return self.classes + [OTHER]
+
+    def classify_text(self, text):
+        best = None
+        for m in self._pattern.finditer(text):
+            name = m.lastgroup
+            if best is None or self._rank[name] < self._rank[best]:
+                best = name
+                if self._rank[name] == 0:
+                    break
+        return best or OTHER
+
+    def classify(self, nodes, screen=REFERENCE_SCREEN):
+        """
+        Class of the giveaway whose panel is in `nodes` (parsed snapshot).
+        Only texts in the panel title area (above screen.title_max_top) count.
+        """
+        text = "\n".join(info["text"] for info in nodes
+                         if info["text"]
+                         and info["bounds"].get("top", 0) < screen.title_max_top)
+        return self.classify_text(text)
+
+
+def class_limit(cfg, kind, name):
+    """cfg["<kind>_<name>"], or the OTHER value if the class has none."""
+    return cfg.get(f"{kind}_{name}", cfg[f"{kind}_{OTHER}"])
+
+
+def limit_keys(names=None):
+    """Config keys holding per-class limits."""
+    names = names or list(GIVEAWAY_CLASSES) + [OTHER]
+    return [f"{kind}_{name}" for kind in LIMIT_KINDS for name in names]
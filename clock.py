@@ -0,0 +1,51 @@
+"""
+Clocks for bot pacing. WhatnotBot does all of its waiting and
+timekeeping through one of these, so a run can happen in real time
+against a phone or in virtual time against the simulator.
+"""
+
+import time
+
+
+class RealClock:
+    """Wall-clock time; sleep() blocks the calling thread."""
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def strftime(self, fmt):
+        return time.strftime(fmt, time.localtime(self.time()))
+
+
+class VirtualClock:
+    """
+    Simulated time; sleep() returns immediately after moving the clock
+    forward. Listeners registered with on_advance() are called with the
+    new time after every advance (used by the simulator to end runs).
+    """
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+        self._listeners = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+        for callback in self._listeners:
+            callback(self.now)
+
+    def on_advance(self, callback):
+        self._listeners.append(callback)
+
+    def strftime(self, fmt):
+        return time.strftime(fmt, time.localtime(self.now))
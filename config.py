@@ -3,13 +3,48 @@
 # ── Default config (used by server for serialization) ──
 DEFAULT_CONFIG = {
     "mode": "normal",              # "normal" or "lowest_viewer"
+    # Per giveaway class (see GIVEAWAY_CLASSES below)
+    "max_viewers_box": 60,
+    "max_viewers_etb": 50,
+    "max_viewers_slab": 40,
     "max_viewers_pack": 40,
+    "max_viewers_single": 25,
     "max_viewers_other": 20,
+    "max_wait_box": 1200,          # seconds (20 minutes)
+    "max_wait_etb": 1200,
+    "max_wait_slab": 960,
     "max_wait_pack": 960,          # seconds (16 minutes)
+    "max_wait_single": 600,
     "max_wait_other": 480,         # seconds (8 minutes)
+    "ended_checks_box": 5,
+    "ended_checks_etb": 5,
+    "ended_checks_slab": 5,
     "ended_checks_pack": 5,
+    "ended_checks_single": 5,
     "ended_checks_other": 5,
     "category": "Pokémon Cards",
+    "record": False,               # write a session archive to ./sessions/
+    "record_screenshots": False,   # also store a screenshot per hierarchy dump
+    "worker": "process",           # "process" (own interpreter) or "thread"
+    "trace": False,                # write a Chrome trace of stages/RPCs/sleeps
+    "adaptive_pacing": True,       # scale delays to device responsiveness
+    "opportunities": True,         # after a giveaway, revisit streams seen earlier
+    "popup_watchers": True,        # dismiss rate prompts and other dialogs (see watchers.py)
+    "experiment": None,            # config arms to alternate between (see experiments.py)
+    "throttle": 1.0,               # multiplies scan and poll delays (set by the operating schedule)
+}
+
+# ── Giveaway classes ──
+# Keywords read from the giveaway panel title (see classifier.py). A
+# title matching several classes gets the first one listed; no match is
+# "other". Add a class here together with its max_viewers_/max_wait_/
+# ended_checks_ entries above.
+GIVEAWAY_CLASSES = {
+    "box": ["booster box", "display box", "case"],
+    "etb": ["etb", "elite trainer box", "elite trainer"],
+    "slab": ["slab", "slabbed", "graded", "psa", "bgs", "cgc"],
+    "pack": ["pack", "booster", "blister", "bundle", "tin"],
+    "single": ["single", "holo", "promo", "alt art", "full art"],
 }
 
 # ── Viewer limits ──
@@ -35,6 +70,124 @@ NO_GIVEAWAY_TIMEOUT = (30, 60)
 ACTION_DELAY = (1.0, 3.0)
 ENTRY_DELAY = (1.5, 4.0)
 TRANSITION_DELAY = (2.0, 5.0)
+# Once a device's giveaway panel layout is known, wait up to this long
+# for the panel to open instead of sleeping ENTRY_DELAY (seconds)
+PANEL_WAIT = 3
+# After tapping the entry button, before checking that it took
+ENTRY_VERIFY_DELAY = (0.3, 0.6)
+
+# ── Pacing governor ──
+# With adaptive_pacing on, the ranges above are multiplied by a pace
+# scale kept within these bounds (see governor.py)
+PACE_BOUNDS = (0.6, 2.5)
+# Hierarchy dump time (s) of a device that's keeping up; slower dumps
+# slow the bot down, faster ones speed it up
+SETTLE_TARGET = 0.8
+# Taps/swipes/key presses per second at scale 1.0, and how many may
+# go back to back
+ACTION_RATE = 0.5
+ACTION_BURST = 3
+# How often thermal status and load are read over adb (seconds)
+DEVICE_SAMPLE_INTERVAL = 60
+# Load average per core that counts as fully loaded
+LOAD_HIGH = 1.5
+# CPU temperature (°C) where slowing down starts, and where the pace
+# reaches its upper bound
+TEMP_SOFT = 60
+TEMP_HARD = 80
+
+# ── Follow-up giveaway cadence ──
+# After a giveaway ends, the bot waits for the host's next one as long
+# as that beats scanning (see cadence.py). Hosts without history get a
+# prior worth CADENCE_PRIOR_EVENTS follow-ups, one per PRIOR_GAP seconds
+CADENCE_PRIOR_GAP = 60
+CADENCE_PRIOR_EVENTS = 1
+# How often scanning turns up an enterable giveaway elsewhere (per second)
+SCAN_FIND_RATE = 1 / 120
+# Bounds on the post-giveaway wait and its poll interval (seconds)
+FOLLOWUP_WAIT = (6, 150)
+FOLLOWUP_POLL = (2, 6)
+
+# ── Opportunity queue ──
+# Giveaway streams seen but not entered (see opportunities.py): their
+# score halves every OPPORTUNITY_HALF_LIFE seconds and they're dropped
+# after OPPORTUNITY_TTL
+OPPORTUNITY_HALF_LIFE = 180
+OPPORTUNITY_TTL = 600
+# Streams tried from the queue after each giveaway before scanning again
+OPPORTUNITY_JUMPS = 2
+# Giveaways passed over for viewers are queued if within this factor of the cap
+OPPORTUNITY_VIEWER_SLACK = 1.2
+
+# ── Popup watchers ──
+# Empty selector probes check for a popup at most this often (seconds);
+# hierarchy dumps always do
+WATCH_INTERVAL = 4
+# Also run the rules as uiautomator2's background watcher, polling this
+# often (seconds). Off by default: it dumps the hierarchy on its own
+# thread, on top of the bot's dumps
+WATCHER_NATIVE_INTERVAL = None
+
+# ── Experiments ──
+# Arms of an A/B experiment take turns in slices of this many minutes
+EXPERIMENT_SLICE_MINUTES = 30
+
+# ── Operating schedule ──
+# Hours of the week each device runs at full pace (the best-paying ones)
+SCHEDULE_RUN_HOURS = 112
+# The next-best hours run throttled; the rest are off
+SCHEDULE_THROTTLE_HOURS = 28
+# Delay multiplier in throttled hours
+SCHEDULE_THROTTLE = 1.6
+# Weight (device-hours at the overall average) pulling thinly run hours
+# towards it
+SCHEDULE_PRIOR_HOURS = 2
+# Hours run for fewer device-hours than this always run, to learn them
+SCHEDULE_EXPLORE_HOURS = 1
+# A pack entry counts this many times an ordinary one in an hour's score
+SCHEDULE_PACK_WEIGHT = 1.5
+# Seconds between scheduler checks (and running-time bookkeeping)
+SCHEDULE_TICK = 60
+# Seconds between re-reads of the giveaway log
+SCHEDULE_REFRESH = 900
+
+# ── Visited-stream cache ──
+# Streams evaluated within this many seconds are skipped when seen again
+VISITED_TTL = 600
+# Max streams remembered at once (oldest dropped first)
+VISITED_MAX = 500
+# A device's claim on a stream it is evaluating lapses after this long
+# (covers the longest giveaway wait, in case the device dies mid-stream)
+CLAIM_TTL = 1200
+
+# ── Viewer OCR ──
+# Read the viewer count off a screenshot when the hierarchy has no text
+# for it (needs opencv-python; see ocr.py)
+OCR_ENABLED = True
+# Min template correlation for every glyph of an accepted reading
+OCR_MIN_SCORE = 0.6
+
+# ── Logging ──
+# Also write structured logs to ./logs/bot.jsonl, rotated by size
+LOG_JSONL = False
+LOG_JSONL_MAX_BYTES = 5_000_000
+LOG_JSONL_BACKUPS = 5
+
+# ── Deep links ──
+APP_PACKAGE = "com.whatnot.whatnot"
+# Open a feed with one intent instead of the tap sequence (see
+# launcher.py). {slug} is the category name in lowercase ASCII with
+# dashes (Pokémon Cards -> pokemon-cards), {name} a streamer's username.
+# A link that doesn't land where it should is disabled for the session
+# and the taps are used instead (search, for "host"); set an entry to
+# None to always tap. Check a link by hand with
+#   adb shell am start -a android.intent.action.VIEW -d URI -p PACKAGE
+DEEP_LINKS = {
+    "category": "whatnot://category/{slug}",
+    "category_sorted": "whatnot://category/{slug}?sort=viewers_low_to_high",
+    "followed": "whatnot://category/followed-hosts",
+    "host": "whatnot://user/{name}",
+}
 
 # ── Category ──
 CATEGORY = DEFAULT_CONFIG["category"]
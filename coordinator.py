@@ -0,0 +1,192 @@
+"""
+Fleet coordinator: shares stream evaluations between devices.
+
+Devices scanning the same category see the same streams in nearly the
+same order. Before evaluating a stream a bot claims it; when done it
+publishes what it found. A stream that another device has claimed, or
+evaluated within VISITED_TTL, is skipped. A single bot uses a private
+Coordinator, which then acts as its visited-stream cache.
+
+Bots in one process share a Coordinator object directly. Worker
+processes reach the server's Coordinator through CoordinatorServer, a
+small request/response loop on a localhost socket.
+"""
+
+import logging
+import secrets
+import threading
+from multiprocessing.connection import Client, Listener
+
+from cache import TTLCache
+from clock import RealClock
+from config import VISITED_TTL, VISITED_MAX, CLAIM_TTL
+
+log = logging.getLogger("whatnot-bot.fleet")
+
+
+class Coordinator:
+    """Thread-safe store of stream claims and published results."""
+
+    def __init__(self, clock=None, ttl=VISITED_TTL, claim_ttl=CLAIM_TTL,
+                 maxsize=VISITED_MAX):
+        clock = clock or RealClock()
+        self._results = TTLCache(maxsize, ttl, clock)
+        # Claims expire on their own in case a device dies mid-evaluation
+        self._claims = TTLCache(maxsize, claim_ttl, clock)
+        self._lock = threading.Lock()
+        self.claims_granted = 0
+        self.claims_refused = 0
+
+    def claim(self, keys, owner):
+        """
+        Claim a stream known by `keys` for `owner`. Returns None if the
+        claim was granted, otherwise a dict saying why it was refused:
+        {"name", "result", "by"} for a recent result, or {"by"} for a
+        claim held by another device.
+        """
+        keys = [k for k in keys if k and k != "unknown"]
+        with self._lock:
+            for key in keys:
+                found = self._results.get(key)
+                if found is not None:
+                    self.claims_refused += 1
+                    return found
+                holder = self._claims.get(key)
+                if holder is not None and holder != owner:
+                    self.claims_refused += 1
+                    return {"name": key, "result": "claimed", "by": holder}
+            for key in keys:
+                self._claims.set(key, owner)
+            self.claims_granted += 1
+        return None
+
+    def publish(self, keys, owner, name, result, **info):
+        """Store an evaluation (viewers, has_giveaway, type, ...) and release the claim."""
+        entry = dict(info, name=name, result=result, by=owner)
+        with self._lock:
+            for key in keys:
+                if not key or key == "unknown":
+                    continue
+                self._results.set(key, entry)
+                if self._claims.get(key) == owner:
+                    self._claims.pop(key)
+
+    def lookup(self, key):
+        """Latest published result for `key`, or None."""
+        with self._lock:
+            return self._results.get(key)
+
+    def release(self, owner):
+        """Drop every claim held by `owner` (a device going offline)."""
+        with self._lock:
+            for key, holder in self._claims.items():
+                if holder == owner:
+                    self._claims.pop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "results": len(self._results),
+                "claims_granted": self.claims_granted,
+                "claims_refused": self.claims_refused,
+            }
+
+
+# ── Local socket transport ──
+
+_METHODS = ("claim", "publish", "lookup", "release", "stats")
+
+
+class CoordinatorServer:
+    """Serves a Coordinator to worker processes on 127.0.0.1."""
+
+    def __init__(self, coordinator, address=("127.0.0.1", 0)):
+        self.coordinator = coordinator
+        self.authkey = secrets.token_bytes(16)
+        self._listener = Listener(address, authkey=self.authkey)
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, daemon=True,
+                                        name="fleet-coordinator")
+        self._thread.start()
+
+    @property
+    def address(self):
+        """(host, port, authkey) — picklable, pass it to connect()."""
+        host, port = self._listener.address
+        return host, port, self.authkey
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._closed:
+                    return
+                log.warning("Fleet coordinator: rejected connection", exc_info=True)
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if method not in _METHODS:
+                    conn.send((False, f"unknown method {method!r}"))
+                    continue
+                try:
+                    conn.send((True, getattr(self.coordinator, method)(*args, **kwargs)))
+                except Exception as e:
+                    conn.send((False, str(e)))
+
+    def close(self):
+        self._closed = True
+        self._listener.close()
+
+
+class CoordinatorClient:
+    """Coordinator proxy for a worker process. One connection, one bot thread."""
+
+    def __init__(self, host, port, authkey):
+        self._conn = Client((host, port), authkey=authkey)
+        self._lock = threading.Lock()
+
+    def _call(self, method, *args, **kwargs):
+        with self._lock:
+            self._conn.send((method, args, kwargs))
+            ok, value = self._conn.recv()
+        if not ok:
+            raise RuntimeError(f"coordinator: {value}")
+        return value
+
+    def claim(self, keys, owner):
+        return self._call("claim", list(keys), owner)
+
+    def publish(self, keys, owner, name, result, **info):
+        return self._call("publish", list(keys), owner, name, result, **info)
+
+    def lookup(self, key):
+        return self._call("lookup", key)
+
+    def release(self, owner):
+        return self._call("release", owner)
+
+    def stats(self):
+        return self._call("stats")
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(fleet, clock=None):
+    """
+    Coordinator for a bot: a shared one (passed through), a client for a
+    CoordinatorServer address, or a private one if `fleet` is None.
+    """
+    if fleet is None:
+        return Coordinator(clock)
+    if isinstance(fleet, tuple):
+        return CoordinatorClient(*fleet)
+    return fleet
@@ -0,0 +1,243 @@
+"""
+A/B experiments — run the bot under two or more config arms in turn
+and find out which one actually enters more giveaways.
+
+An experiment is the "experiment" config entry:
+    {
+        "arms": {"a": {}, "b": {"mode": "lowest_viewer"}},
+        "split": "time",
+        "slice_minutes": 30,
+        "name": "mode-test",
+    }
+Each arm is a set of overrides on the rest of the config. Time is cut
+into slices of slice_minutes, counted from the Unix epoch so that every
+device and every restart agrees on them:
+    time     all devices run arm (slice % n)
+    device   device i runs arm ((i + slice) % n), so the fleet is spread
+             over the arms at any moment and each device takes turns
+             with every arm
+A bot only changes arms between giveaways, so a slice can run over a
+little; what is logged is the time it really spent in the arm.
+
+Every slice is one row of experiments.csv next to the giveaway log:
+start, experiment, device, arm, minutes, giveaways entered and streams
+checked. report() reads it back and gives per arm the entries per
+device-hour with an approximate 95% confidence interval, and the
+difference from the first arm with its own. Each slice counts as one
+sample (ratio estimator, delta-method variance), so an interval needs
+at least two slices of an arm and narrows as slices add up.
+
+Usage:
+    python experiments.py                      # latest experiment
+    python experiments.py --experiment mode-test --log other/experiments.csv
+"""
+
+import argparse
+import csv
+import math
+import os
+import time
+
+from config import DEFAULT_CONFIG, EXPERIMENT_SLICE_MINUTES
+
+EXPERIMENT_NAME = "experiments.csv"
+EXPERIMENT_LOG = os.path.join(os.path.dirname(__file__), EXPERIMENT_NAME)
+FIELDS = ["start", "experiment", "device", "arm", "minutes", "entries", "streams_checked"]
+SPLITS = ("time", "device")
+# Keys an arm can't override: they set up the run, not the strategy
+RUN_KEYS = ("worker", "record", "record_screenshots", "trace", "adaptive_pacing",
+            "experiment", "throttle")
+# Normal quantile for the 95% intervals
+Z95 = 1.96
+
+
+class Experiment:
+    def __init__(self, arms, split="time", slice_minutes=EXPERIMENT_SLICE_MINUTES,
+                 name=None):
+        if not isinstance(arms, dict) or len(arms) < 2:
+            raise ValueError("an experiment needs at least two named arms")
+        if split not in SPLITS:
+            raise ValueError(f"split must be one of {', '.join(SPLITS)}")
+        if not slice_minutes or slice_minutes <= 0:
+            raise ValueError("slice_minutes must be positive")
+        self.arms = {str(arm): _coerce(overrides or {}) for arm, overrides in arms.items()}
+        self.names = list(self.arms)
+        self.split = split
+        self.slice_seconds = slice_minutes * 60
+        self.name = name or "-".join(self.names)
+
+    @classmethod
+    def from_config(cls, spec):
+        """Experiment for a config "experiment" entry, None if there's none."""
+        if not spec:
+            return None
+        return cls(spec.get("arms"), spec.get("split", "time"),
+                   spec.get("slice_minutes", EXPERIMENT_SLICE_MINUTES), spec.get("name"))
+
+    def describe(self):
+        return (f"{self.name}: {len(self.arms)} arms by {self.split}, "
+                f"{self.slice_seconds / 60:g}min slices")
+
+    def arm_at(self, now, device_index=0):
+        """The arm a device runs at time `now`."""
+        slice_no = int(now // self.slice_seconds)
+        if self.split == "device":
+            slice_no += device_index
+        return self.names[slice_no % len(self.names)]
+
+    def slice_end(self, now):
+        return (int(now // self.slice_seconds) + 1) * self.slice_seconds
+
+    def config_for(self, base, arm):
+        cfg = dict(base)
+        cfg.update(self.arms[arm])
+        return cfg
+
+
+def _coerce(overrides):
+    """Arm overrides with the types of the config defaults."""
+    if not isinstance(overrides, dict):
+        raise ValueError("an arm is a dict of config overrides")
+    bad = sorted(k for k in overrides if k not in DEFAULT_CONFIG or k in RUN_KEYS)
+    if bad:
+        raise ValueError(f"arms can't set {', '.join(bad)}")
+    return {k: _coerce_value(DEFAULT_CONFIG[k], v) for k, v in overrides.items()}
+
+
+def _coerce_value(default, value):
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes")
+        return bool(value)
+    return type(default)(value)
+
+
+# ── Slice log ──
+
+class ExperimentLog:
+    """Appends one CSV row per slice a bot spent in an arm."""
+
+    def __init__(self, path=EXPERIMENT_LOG):
+        self.path = path
+
+    def append(self, start, experiment, device, arm, seconds, entries, streams_checked):
+        new = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(FIELDS)
+            writer.writerow([
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start)),
+                experiment, device, arm, f"{seconds / 60:.2f}",
+                entries, streams_checked,
+            ])
+
+
+def read_log(path=EXPERIMENT_LOG):
+    rows = []
+    try:
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    row["minutes"] = float(row["minutes"])
+                    row["entries"] = int(row["entries"])
+                    row["streams_checked"] = int(row["streams_checked"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                rows.append(row)
+    except OSError:
+        pass
+    return rows
+
+
+# ── Report ──
+
+def _ratio(rows):
+    """(entries per device-hour, its variance or None) over slices."""
+    hours = sum(r["minutes"] for r in rows) / 60
+    if not hours:
+        return None, None
+    rate = sum(r["entries"] for r in rows) / hours
+    n = len(rows)
+    if n < 2:
+        return rate, None
+    resid = sum((r["entries"] - rate * r["minutes"] / 60) ** 2 for r in rows)
+    return rate, n / (n - 1) * resid / hours ** 2
+
+
+def _interval(value, var):
+    if value is None or var is None:
+        return None
+    half = Z95 * math.sqrt(var)
+    return [round(value - half, 3), round(value + half, 3)]
+
+
+def report(path=EXPERIMENT_LOG, experiment=None):
+    """
+    Per-arm results of `experiment` (default: the one logged last), in
+    the order its arms first appear in the log.
+    """
+    rows = read_log(path)
+    if experiment is None and rows:
+        experiment = rows[-1]["experiment"]
+    rows = [r for r in rows if r["experiment"] == experiment]
+    by_arm = {}
+    for r in rows:
+        by_arm.setdefault(r["arm"], []).append(r)
+
+    arms = []
+    base_rate = base_var = None
+    for arm, slices in by_arm.items():
+        rate, var = _ratio(slices)
+        hours = sum(r["minutes"] for r in slices) / 60
+        result = {
+            "arm": arm,
+            "slices": len(slices),
+            "devices": len({r["device"] for r in slices}),
+            "device_hours": round(hours, 2),
+            "entries": sum(r["entries"] for r in slices),
+            "streams_checked": sum(r["streams_checked"] for r in slices),
+            "rate": None if rate is None else round(rate, 3),
+            "ci": _interval(rate, var),
+            "diff": None,
+            "diff_ci": None,
+        }
+        if not arms:
+            base_rate, base_var = rate, var
+        elif rate is not None and base_rate is not None:
+            result["diff"] = round(rate - base_rate, 3)
+            if var is not None and base_var is not None:
+                result["diff_ci"] = _interval(rate - base_rate, var + base_var)
+        arms.append(result)
+    return {"experiment": experiment, "arms": arms}
+
+
+def format_report(result):
+    if not result["arms"]:
+        return ["No experiment slices logged yet"]
+    lines = [f"Experiment {result['experiment']}",
+             f"{'arm':<16} {'slices':>6} {'dev-h':>7} {'entries':>7} {'streams':>7} "
+             f"{'entries/dev-h (95% CI)':>26} {'vs first arm':>24}"]
+    for a in result["arms"]:
+        rate = "-" if a["rate"] is None else f"{a['rate']:.2f}"
+        if a["ci"]:
+            rate += f" ({a['ci'][0]:.2f}..{a['ci'][1]:.2f})"
+        diff = "" if a["diff"] is None else f"{a['diff']:+.2f}"
+        if a["diff_ci"]:
+            diff += f" ({a['diff_ci'][0]:+.2f}..{a['diff_ci'][1]:+.2f})"
+        lines.append(f"{a['arm']:<16} {a['slices']:>6} {a['device_hours']:>7.2f} "
+                     f"{a['entries']:>7} {a['streams_checked']:>7} {rate:>26} {diff:>24}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--log", default=EXPERIMENT_LOG, help="experiment slice log")
+    parser.add_argument("--experiment", help="experiment name (default: latest)")
+    args = parser.parse_args()
+    for line in format_report(report(args.log, args.experiment)):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Fault-injection harness — how long does the bot take to get back to
+work after something goes wrong, and how many actions does it spend?
+
+Each episode runs a fresh bot against the simulated app (simulator.py)
+through a warm-up, then injects one fault the next time the device is
+on a screen where that fault happens (and, for some, at the next tap or
+swipe, so it doesn't expire unnoticed):
+
+    stale        selector taps fail (element gone) for a while   stream, at a tap
+    no_home      the Home tab is missing for a while             category
+    crash        the app crashes to the launcher                 stream
+    empty_grid   the category feed loads empty for a while       category
+    stuck_swipe  swipes don't move the feed for a while          stream/category, at a swipe
+    popup        a dialog covers the app until dismissed         stream
+
+With deep links the bot rarely needs Home; run no_home with
+--no-deep-links to see the tap navigation recover.
+
+The bot has recovered at its first new stream view (opened or swiped
+to) after the fault is over. Per fault the report gives the time and
+actions from injection to recovery, how many episodes didn't recover
+within --horizon seconds or ended with the bot dying, and what the
+fault cost: every episode is paired with a control run (same seed, same
+moment, no fault), and the giveaways lost and actions added over the
+horizon are counted against it. A crash that pulls the bot out of a
+giveaway recovers fast but loses the entry; only the second number
+shows that.
+
+For popups the bot may clear the dialog and stay where it was, so the
+report also gives the time until the fault was over (the dialog
+dismissed); --arm popup_watchers=false shows the bot without watchers.
+
+Usage:
+    python faults.py                              # every fault, 10 episodes each
+    python faults.py --fault crash --fault popup --episodes 30
+    python faults.py --arm mode=lowest_viewer --no-deep-links
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+from collections import namedtuple
+
+from clock import VirtualClock
+from simulator import SIM_START, SimDevice, SimNode, SimWorld, _parse_arm
+
+# screens: where the fault can start; duration: seconds it lasts
+# (0: a one-off event, None: until the bot deals with it); on: device
+# call that sets it off ("tap", "swipe"), None for any
+Fault = namedtuple("Fault", "screens duration on")
+FAULTS = {
+    "stale": Fault(("stream",), 20, "tap"),
+    "no_home": Fault(("category",), 300, None),
+    "crash": Fault(("stream",), 0, None),
+    "empty_grid": Fault(("category",), 90, None),
+    "stuck_swipe": Fault(("stream", "category"), 60, "swipe"),
+    "popup": Fault(("stream",), None, None),
+}
+# Dialogs the popup fault shows: (title, dismiss button)
+POPUPS = [
+    ("Enjoying Whatnot?", "Not now"),
+    ("Follow this host?", "No thanks"),
+    ("Allow Whatnot to send you notifications?", "Don't allow"),
+]
+# Seconds uiautomator2 spends looking for a vanished element before it gives up
+STALE_WAIT = (1.0, 3.0)
+# Virtual seconds of normal running before the fault is armed
+WARMUP = (600, 1800)
+
+
+class FaultyDevice(SimDevice):
+    """
+    SimDevice that can be armed with one fault and counts stream views.
+    A control device notes when the fault would have started but never
+    applies it.
+    """
+
+    def __init__(self, world, control=False, **kwargs):
+        super().__init__(world, **kwargs)
+        self.control = control
+        self.fault = None
+        self.armed_at = None
+        self.injected_at = None
+        self.fault_until = None
+        self.popup = None   # (title, button) of the dialog showing
+        self.views = 0  # streams opened or swiped to
+
+    # ── Faults ──
+
+    def arm(self, fault, at):
+        """Inject `fault` at its first trigger from `at` on its screens."""
+        self.fault = fault
+        self.armed_at = at
+
+    def _maybe_inject(self, call=None):
+        if self.injected_at is not None or self.armed_at is None:
+            return
+        now = self.clock.time()
+        spec = FAULTS[self.fault]
+        if now < self.armed_at or self.screen["name"] not in spec.screens:
+            return
+        if spec.on is not None and call != spec.on:
+            return
+        self.injected_at = now
+        if self.control:
+            self.fault_until = now
+            return
+        if spec.duration is not None:
+            self.fault_until = now + spec.duration
+        if self.fault == "crash":
+            self.crashes += 1
+            self.screen = {"name": "launcher"}
+        elif self.fault == "popup":
+            # Picked without the device RNG, which the control run shares
+            self.popup = POPUPS[int(self.armed_at) % len(POPUPS)]
+
+    def active(self, fault=None):
+        """Is the injected fault (or this particular one) in effect?"""
+        if self.injected_at is None or fault not in (None, self.fault):
+            return False
+        if self.fault_until is None:
+            return self.popup is not None
+        return self.clock.time() < self.fault_until
+
+    def _dismiss_popup(self):
+        self.popup = None
+
+    # ── SimDevice overrides ──
+
+    def _act(self):
+        self._maybe_inject()
+        return super()._act()
+
+    def _screen_nodes(self):
+        self._maybe_inject()
+        if self.active("popup"):
+            # A dialog window: the app underneath doesn't show in dumps
+            title, button = self.popup
+            return [
+                SimNode((90, 900, 990, 1000), text=title),
+                SimNode((90, 1300, 500, 1400), text=button,
+                        action=self._dismiss_popup),
+            ]
+        nodes = super()._screen_nodes()
+        if self.active("no_home"):
+            nodes = [n for n in nodes if n.text != "Home"]
+        if self.active("empty_grid") and self.screen["name"] == "category":
+            # Keep the nav bar, tabs and Filter; drop every card
+            nodes = [n for n in nodes if n.bounds[1] < 420 or n.text == "Home"]
+        return nodes
+
+    def tap(self, node):
+        self._maybe_inject("tap")
+        if self.active("stale"):
+            self.actions += 1
+            self.clock.sleep(self.rng.uniform(*STALE_WAIT))
+            raise LookupError("UiObjectNotFoundError: element went stale")
+        super().tap(node)
+
+    def press(self, key):
+        if key == "back" and self.popup:
+            if self._act():
+                self.popup = None
+            return
+        super().press(key)
+
+    def swipe(self, fx, fy, tx, ty, duration=None, **kwargs):
+        self._maybe_inject("swipe")
+        if self.active("stuck_swipe"):
+            self.clock.sleep(duration or 0.3)
+            self._act()
+            return
+        before = self.screen.get("stream")
+        super().swipe(fx, fy, tx, ty, duration=duration, **kwargs)
+        if self.screen.get("stream") is not before:
+            self.views += 1
+
+    def _open_stream(self, stream, feed):
+        super()._open_stream(stream, feed)
+        self.views += 1
+
+
+# ── Episodes ──
+
+class Episode:
+    """Timeline of one injected fault, up to `horizon` seconds after it."""
+
+    def __init__(self, fault):
+        self.fault = fault
+        self.control = None  # the paired no-fault Episode
+        self.injected_at = None
+        self.cleared_at = None
+        self.recovered_at = None
+        self.recover_actions = None  # actions from injection to recovery
+        self.actions = 0             # actions over the horizon
+        self.entries = 0             # giveaways entered over the horizon
+        self.fatal = False
+
+    @property
+    def recover_time(self):
+        if self.recovered_at is None:
+            return None
+        return self.recovered_at - self.injected_at
+
+
+def run_episode(fault, seed, config=None, horizon=1800, device_opts=None,
+                control=False, verbose=False):
+    """
+    Run a bot from start until `horizon` seconds after `fault` was
+    injected (with control=True, after it would have been). Returns an
+    Episode.
+    """
+    from bot import WhatnotBot, log
+    from ocr import ViewerOCR
+
+    clock = VirtualClock(start=SIM_START)
+    world = SimWorld(clock, seed=seed)
+    # No background crashes, so the injected fault is the only one
+    device = FaultyDevice(world, seed=seed, control=control,
+                          **{"crash_rate": 0.0, **(device_opts or {})})
+    arm_at = SIM_START + random.Random(seed).uniform(*WARMUP)
+    device.arm(fault, arm_at)
+    stop_event = threading.Event()
+    ep = Episode(fault)
+    start = {}
+
+    def watch(now):
+        if stop_event.is_set():
+            return
+        if device.injected_at is None:
+            if now > arm_at + horizon:
+                stop_event.set()  # never got to a screen where it happens
+            return
+        if ep.injected_at is None:
+            ep.injected_at = device.injected_at
+            start.update(actions=device.actions, entries=len(world.entries))
+        if ep.cleared_at is None and not device.active():
+            ep.cleared_at = now
+            start["views"] = device.views
+        if (ep.recovered_at is None and ep.cleared_at is not None
+                and device.views > start["views"]):
+            ep.recovered_at = now
+            ep.recover_actions = device.actions - start["actions"]
+        if now - ep.injected_at >= horizon:
+            ep.actions = device.actions - start["actions"]
+            ep.entries = len(world.entries) - start["entries"]
+            stop_event.set()
+
+    clock.on_advance(watch)
+
+    level = log.level
+    if not verbose:
+        log.setLevel(logging.CRITICAL)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            bot = WhatnotBot(config=config, stop_event=stop_event, device=device,
+                             clock=clock, rng=random.Random(seed + 1),
+                             log_file=os.path.join(tmp, "giveaway_log.csv"))
+            if bot.ocr is not None:
+                bot.ocr = ViewerOCR()  # see run_simulation
+            bot.run()
+    finally:
+        log.setLevel(level)
+    ep.fatal = bot.stats.state == "error"
+    if ep.fatal and ep.injected_at is not None:
+        # Died before the horizon: count what it did until then
+        ep.actions = device.actions - start["actions"]
+        ep.entries = len(world.entries) - start["entries"]
+    return ep
+
+
+# ── Report ──
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def summarize(episodes):
+    """Per-fault stats from a list of Episodes (with their controls)."""
+    rows = {}
+    for fault in dict.fromkeys(ep.fault for ep in episodes):
+        eps = [ep for ep in episodes if ep.fault == fault and ep.injected_at is not None]
+        done = [ep for ep in eps if ep.recovered_at is not None]
+        cleared = [ep.cleared_at - ep.injected_at for ep in eps if ep.cleared_at is not None]
+        paired = [ep for ep in eps if ep.control and ep.control.injected_at is not None]
+        row = {
+            "injected": len(eps),
+            "recovered": len(done),
+            "fatal": sum(ep.fatal for ep in eps),
+        }
+        if cleared:
+            row["clear"] = statistics.median(cleared)
+        if done:
+            ttr = [ep.recover_time for ep in done]
+            row.update(median=statistics.median(ttr), p90=_pct(ttr, 0.9),
+                       recover_actions=statistics.mean(ep.recover_actions for ep in done))
+        if paired:
+            row.update(
+                lost_entries=statistics.mean(ep.control.entries - ep.entries
+                                             for ep in paired),
+                extra_actions=statistics.mean(ep.actions - ep.control.actions
+                                              for ep in paired))
+        rows[fault] = row
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fault", action="append", choices=list(FAULTS),
+                        help="fault to inject (repeatable; default: all)")
+    parser.add_argument("--episodes", type=int, default=10, help="episodes per fault")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--arm", default="",
+                        help="comma-separated config overrides, e.g. mode=lowest_viewer")
+    parser.add_argument("--horizon", type=float, default=1800,
+                        help="virtual seconds to follow the bot after the fault")
+    parser.add_argument("--no-deep-links", action="store_true",
+                        help="app ignores deep links, so feeds are opened by tapping")
+    parser.add_argument("--verbose", action="store_true", help="show bot log output")
+    args = parser.parse_args()
+
+    config = _parse_arm(args.arm)
+    device_opts = {"deep_links": not args.no_deep_links}
+    episodes = []
+    for fault in args.fault or list(FAULTS):
+        for i in range(args.episodes):
+            seed = args.seed + i
+            ep = run_episode(fault, seed, config, args.horizon, device_opts,
+                             verbose=args.verbose)
+            ep.control = run_episode(fault, seed, config, args.horizon, device_opts,
+                                     control=True)
+            episodes.append(ep)
+
+    print(f"{'fault':<12} {'eps':>4} {'ok':>4} {'died':>5} {'clear':>7} {'median':>8} {'p90':>8} "
+          f"{'actions':>8} {'lost':>6} {'+actions':>9}")
+    for fault, r in summarize(episodes).items():
+        line = f"{fault:<12} {r['injected']:>4} {r['recovered']:>4} {r['fatal']:>5}"
+        line += f" {r['clear']:>6.0f}s" if "clear" in r else f" {'-':>7}"
+        line += (f" {r['median']:>7.0f}s {r['p90']:>7.0f}s {r['recover_actions']:>8.1f}"
+                 if r["recovered"] else f" {'-':>8} {'-':>8} {'-':>8}")
+        if "lost_entries" in r:
+            line += f" {r['lost_entries']:>6.2f} {r['extra_actions']:>9.1f}"
+        print(line)
+    print("\nclear: median time from injection until the fault was over (dismissed, for "
+          "popups); median/p90/actions: from injection to the next stream view after it; "
+          "lost/+actions: entries lost and actions added over the horizon, "
+          "against the same run without the fault")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Files shared by the bots of a fleet (calibration.json, cadence.json, the
+giveaway CSV log). Fleet bots start and stop together, so their
+read-modify-write cycles on these files overlap as a rule:
+
+    with locked(path):
+        data = read(path)          # re-read under the lock ...
+        merge(data, mine)          # ... so others' writes are kept
+        replace_file(path, write)  # through a temp file of its own
+
+locked() holds an flock on a "<path>.lock" sidecar (between worker
+processes) and a per-path thread lock (between thread workers).
+replace_file() writes a uniquely named temp file next to `path` and
+renames it over `path`, so one writer's rename never moves another's
+temp file away.
+"""
+
+import contextlib
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): only threads are serialized
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Exclusive lock on `path` across threads and processes."""
+    key = os.path.abspath(path)
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(key + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def replace_file(path, write, newline=None):
+    """Replace `path` with what write(f) writes to a fresh text file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".",
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline=newline) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
@@ -0,0 +1,246 @@
+"""
+Adaptive pacing — stretch or shrink the bot's delays to what the phone
+can take right now.
+
+Signals, each turned into a pressure where 1.0 means "just keeping up":
+    settle    hierarchy dump time over SETTLE_TARGET. uiautomator waits
+              for the UI thread to go idle before it dumps, so this is
+              how long the app takes to settle after an action
+    stale     taps on elements that were gone by the time they landed
+    thermal   Android thermal status and CPU temperature
+    load      load average per core
+Thermal and load are read over adb (`dumpsys thermalservice`,
+/proc/loadavg) every DEVICE_SAMPLE_INTERVAL seconds.
+
+The highest pressure, clamped to PACE_BOUNDS, becomes the pace scale.
+It multiplies every bot delay and divides the refill rate of an action
+token bucket (ACTION_RATE per second, ACTION_BURST deep) that every tap,
+swipe and key press draws from. The scale rises as soon as pressure
+does and relaxes by PACE_RELAX per observation, so the bot slows down
+while dumps merely drag — before taps start going stale — and speeds
+up again only once the device has stayed responsive for a while.
+"""
+
+import re
+
+from config import (
+    PACE_BOUNDS, SETTLE_TARGET, ACTION_RATE, ACTION_BURST,
+    DEVICE_SAMPLE_INTERVAL, LOAD_HIGH, TEMP_SOFT, TEMP_HARD,
+)
+
+# Weight of the newest dump time in the moving average
+SETTLE_ALPHA = 0.2
+# Fraction the scale may fall per observation
+PACE_RELAX = 0.03
+# Stale-tap pressure added per stale tap, and kept per observation
+STALE_STEP = 0.25
+STALE_DECAY = 0.95
+# Pressure per Android thermal status (PowerManager.THERMAL_STATUS_*);
+# 4 (critical) and above pin the scale to the upper bound
+THERMAL_STATUS_PRESSURE = {0: 0.0, 1: 1.0, 2: 1.4, 3: 2.0}
+# Log the scale again once it moved this much from the last logged value
+LOG_STEP = 0.2
+# Consecutive failed adb samples before sampling is given up
+MAX_SAMPLE_FAILURES = 3
+
+_STATUS_RE = re.compile(r"Thermal Status:\s*(\d+)")
+# Temperature{mValue=41.5, mType=0, mName=cpu0, mStatus=0}; type 0 is CPU
+_CPU_TEMP_RE = re.compile(r"mValue=([\d.]+),\s*mType=0\b")
+
+# Calls that make the app do something, and so draw a token
+ACTIONS = ("click", "long_click", "double_click", "swipe", "swipe_ext",
+           "drag", "press", "app_start", "open_url")
+
+
+def parse_thermal(text):
+    """(status or None, hottest CPU temperature or None) from dumpsys thermalservice."""
+    status = _STATUS_RE.search(text)
+    temps = [float(t) for t in _CPU_TEMP_RE.findall(text)]
+    return (int(status.group(1)) if status else None), (max(temps) if temps else None)
+
+
+def parse_load(text):
+    """Load average per core from `cat /proc/loadavg; nproc`, or None."""
+    lines = text.split()
+    try:
+        load = float(lines[0])
+        cores = int(lines[-1])
+    except (IndexError, ValueError):
+        return None
+    return load / max(cores, 1)
+
+
+class Governor:
+    def __init__(self, clock, log, bounds=PACE_BOUNDS, settle_target=SETTLE_TARGET,
+                 rate=ACTION_RATE, burst=ACTION_BURST,
+                 sample_interval=DEVICE_SAMPLE_INTERVAL):
+        self.clock = clock
+        self.log = log
+        self.low, self.high = bounds
+        self.settle_target = settle_target
+        self.rate = rate
+        self.burst = burst
+        self.sample_interval = sample_interval
+
+        self.scale = 1.0
+        self.settle = None  # moving average of dump time (s)
+        self.stale = 0.0
+        self.thermal = 0.0
+        self.load = 0.0
+        self.status = self.temp = self.load_per_core = None
+
+        self.tokens = float(burst)
+        self._refilled = clock.time()
+        self._last_sample = None
+        self._sample_failures = 0
+        self._logged_scale = 1.0
+        self.throttled = 0.0  # seconds spent waiting for tokens
+        self.stale_taps = 0
+
+    # ── Signals ──
+
+    def observe_settle(self, seconds):
+        if self.settle is None:
+            self.settle = seconds
+        else:
+            self.settle += SETTLE_ALPHA * (seconds - self.settle)
+        self._update()
+
+    def observe_stale(self):
+        self.stale_taps += 1
+        self.stale = max(self.stale, 1.0) + STALE_STEP
+        self._update()
+
+    def maybe_sample(self, d):
+        """Read thermal status and load over adb if the last reading is old."""
+        now = self.clock.time()
+        if self._sample_failures >= MAX_SAMPLE_FAILURES:
+            return
+        if self._last_sample is not None and now - self._last_sample < self.sample_interval:
+            return
+        self._last_sample = now
+        try:
+            thermal = d.shell("dumpsys thermalservice")
+            load = d.shell("cat /proc/loadavg; nproc")
+        except Exception as e:
+            self._sample_failures += 1
+            if self._sample_failures >= MAX_SAMPLE_FAILURES:
+                self.log.warning(f"Can't read device thermals/load ({e}), "
+                                 f"pacing on dump times only")
+            return
+        self._sample_failures = 0
+        self.status, self.temp = parse_thermal(getattr(thermal, "output", thermal) or "")
+        self.load_per_core = parse_load(getattr(load, "output", load) or "")
+
+        self.thermal = 0.0
+        if self.status is not None:
+            self.thermal = THERMAL_STATUS_PRESSURE.get(self.status, self.high)
+        if self.temp is not None and self.temp > TEMP_SOFT:
+            ramp = min(1.0, (self.temp - TEMP_SOFT) / (TEMP_HARD - TEMP_SOFT))
+            self.thermal = max(self.thermal, 1.0 + ramp * (self.high - 1.0))
+        self.load = 0.0
+        if self.load_per_core is not None:
+            self.load = self.load_per_core / LOAD_HIGH
+        self._update()
+
+    # ── Pace ──
+
+    def pressure(self):
+        settle = self.settle / self.settle_target if self.settle is not None else 1.0
+        return max(settle, self.stale, self.thermal, self.load)
+
+    def _update(self):
+        self.stale *= STALE_DECAY
+        target = min(self.high, max(self.low, self.pressure()))
+        if target >= self.scale:
+            self.scale = target
+        else:
+            self.scale = max(target, self.scale * (1.0 - PACE_RELAX))
+        if abs(self.scale - self._logged_scale) >= LOG_STEP:
+            self._logged_scale = self.scale
+            self.log.info(f"Pacing x{self.scale:.2f} ({self.describe()})")
+
+    def describe(self):
+        parts = []
+        if self.settle is not None:
+            parts.append(f"settle {self.settle:.2f}s")
+        if self.status is not None:
+            parts.append(f"thermal status {self.status}")
+        if self.temp is not None:
+            parts.append(f"cpu {self.temp:.0f}°C")
+        if self.load_per_core is not None:
+            parts.append(f"load {self.load_per_core:.2f}/core")
+        if self.stale_taps:
+            parts.append(f"{self.stale_taps} stale taps")
+        return ", ".join(parts) or "no readings yet"
+
+    def acquire(self):
+        """Take an action token, waiting for one if the bucket is empty."""
+        now = self.clock.time()
+        rate = self.rate / self.scale
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        if self.tokens < 1.0:
+            wait = (1.0 - self.tokens) / rate
+            self.throttled += wait
+            self.clock.sleep(wait)
+            self._refilled = self.clock.time()
+            self.tokens = 1.0
+        self.tokens -= 1.0
+
+
+# ── Device wrapper ──
+
+class GovernedSelector:
+    """Wraps a selector; clicks take a token and stale clicks are reported."""
+
+    def __init__(self, sel, governor):
+        self._sel = sel
+        self._governor = governor
+
+    def click(self, *args, **kwargs):
+        self._governor.acquire()
+        try:
+            return self._sel.click(*args, **kwargs)
+        except Exception:
+            self._governor.observe_stale()
+            raise
+
+    def __getitem__(self, index):
+        return GovernedSelector(self._sel[index], self._governor)
+
+    def __getattr__(self, name):
+        return getattr(self._sel, name)
+
+
+class GovernedDevice:
+    """
+    Wraps a uiautomator2 device: times hierarchy dumps, samples thermals
+    and load now and then, and makes actions wait for a token.
+    """
+
+    def __init__(self, d, governor):
+        self._d = d
+        self._governor = governor
+
+    def __call__(self, **selector):
+        return GovernedSelector(self._d(**selector), self._governor)
+
+    def dump_hierarchy(self, *args, **kwargs):
+        clock = self._governor.clock
+        start = clock.time()
+        xml = self._d.dump_hierarchy(*args, **kwargs)
+        self._governor.observe_settle(clock.time() - start)
+        self._governor.maybe_sample(self._d)
+        return xml
+
+    def __getattr__(self, name):
+        value = getattr(self._d, name)
+        if name not in ACTIONS:
+            return value
+        governor = self._governor
+
+        def action(*args, **kwargs):
+            governor.acquire()
+            return value(*args, **kwargs)
+        return action
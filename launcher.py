@@ -0,0 +1,170 @@
+"""
+Deep-link launcher: opens a feed with one VIEW intent instead of the
+Home → category pill → Filter → sort → Apply tap sequence, or a
+streamer's profile instead of Home → Search → type → result.
+
+Links come from config.DEEP_LINKS. Each launch is checked: if the app
+doesn't land on a stream grid (or the profile, for "host"), that link is
+marked broken for the rest of the session and the caller falls back to
+tapping. App builds that don't route a link therefore cost one failed
+attempt, not one per round.
+
+A grid already on screen (lowest_viewer mode after leaving a stream, a
+Home screen with thumbnails) would pass that check even when the intent
+was ignored, so when the launch starts from a grid the cards must
+change too. A link that reopens the very grid on screen looks ignored
+as well, so that case only falls back to taps for the one launch, and
+the link is marked broken after LANDING_STRIKES of them in a row.
+"category_sorted" must also come up with its viewer counts ascending,
+or its sort parameter was ignored.
+"""
+
+import re
+import unicodedata
+from urllib.parse import quote
+
+from capture import parse_hierarchy
+from clock import RealClock
+from config import APP_PACKAGE, DEEP_LINKS
+from observation import grid_cards
+
+# Seconds to wait for the stream grid after firing the intent
+LANDING_TIMEOUT = 8
+# Seconds between grid checks while waiting for it to change
+LANDING_POLL = 1.0
+# A grid counts as new when at most this share of its cards were on
+# the grid before the launch
+GRID_OVERLAP = 0.5
+# Viewer counts on the sorted grid may drop (counts move after the sort)
+# at this share of neighbouring cards and still count as ascending
+SORT_DESCENTS = 0.25
+# Launches in a row that leave the grid on screen unchanged before a
+# link is taken for ignored
+LANDING_STRIKES = 3
+
+
+def category_slug(name):
+    """'Pokémon Cards' -> 'pokemon-cards'."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+class DeepLinkLauncher:
+    def __init__(self, d, log, links=None, package=APP_PACKAGE, clock=None):
+        self.d = d
+        self.log = log
+        self.clock = clock or RealClock()
+        self.links = DEEP_LINKS if links is None else links
+        self.package = package
+        self.broken = set()
+        self.strikes = {}  # target -> launches in a row that left the grid unchanged
+        self.opened = 0
+
+    def uri(self, target, category="", name=""):
+        """
+        URI for `target` ("category", "category_sorted", "followed", or
+        "host" with the streamer's `name`), or None.
+        """
+        template = self.links.get(target)
+        if not template or target in self.broken:
+            return None
+        return template.format(slug=category_slug(category), name=quote(name, safe=""))
+
+    def _start(self, uri):
+        shell = getattr(self.d, "shell", None)
+        if shell is None:
+            self.d.open_url(uri)
+            return
+        # -p keeps the intent inside the app instead of offering a browser
+        result = shell(["am", "start", "-W", "-a", "android.intent.action.VIEW",
+                        "-d", uri, "-p", self.package])
+        output = getattr(result, "output", result) or ""
+        if "Error" in output:
+            raise RuntimeError(output.strip().splitlines()[-1])
+
+    def open(self, target, category):
+        """Open `target` via its deep link. True if a stream grid came up."""
+        uri = self.uri(target, category)
+        if uri is None:
+            return False
+        before = self._grid()
+        if not self._fire(target, uri):
+            return False
+        if not self._grid_landed(before):
+            if before:
+                return self._strike(target, uri)
+            return self._failed(target, uri, "didn't open a new stream grid")
+        if target == "category_sorted" and not self._ascending():
+            return self._failed(target, uri, "opened a grid that isn't sorted by viewers")
+        return self._opened(target)
+
+    def open_host(self, name):
+        """Open `name`'s profile via the "host" link. True if it came up."""
+        uri = self.uri("host", name=name)
+        if uri is None or not self._fire("host", uri):
+            return False
+        if not self.d(text=name).wait(timeout=LANDING_TIMEOUT):
+            return self._failed("host", uri, "didn't open the profile")
+        return self._opened("host")
+
+    def _fire(self, target, uri):
+        try:
+            self._start(uri)
+        except Exception as e:
+            self.broken.add(target)
+            self.log.warning(f"Deep link {uri} failed ({e}), using taps instead")
+            return False
+        return True
+
+    def _opened(self, target):
+        self.strikes.pop(target, None)
+        self.opened += 1
+        self.log.info(f"Opened {target} via deep link")
+        return True
+
+    def _strike(self, target, uri):
+        """The grid on screen didn't change: taps this time, broken after LANDING_STRIKES."""
+        self.strikes[target] = self.strikes.get(target, 0) + 1
+        if self.strikes[target] >= LANDING_STRIKES:
+            return self._failed(target, uri, f"left the stream grid unchanged "
+                                             f"{LANDING_STRIKES} times in a row")
+        self.log.info(f"Deep link {uri} left the stream grid unchanged, using taps this time")
+        return False
+
+    def _failed(self, target, uri, why):
+        self.broken.add(target)
+        self.log.warning(f"Deep link {uri} {why}, using taps for {target} from now on")
+        return False
+
+    def _grid(self):
+        """Cards on screen, as (captions, viewers) in reading order; () if none."""
+        try:
+            nodes = parse_hierarchy(self.d.dump_hierarchy())
+        except Exception:
+            return ()
+        return tuple((tuple(c["captions"]), c["viewers"]) for c in grid_cards(nodes))
+
+    def _grid_landed(self, before):
+        """A stream grid is up, and it isn't the grid that was there before."""
+        if not self.d(resourceId="show_item_thumbnail").wait(timeout=LANDING_TIMEOUT):
+            return False
+        if not before:
+            return True
+        # By captions, and not their order: counts (and so the order of
+        # a viewer-sorted grid) move on a grid nobody touched
+        old = {captions for captions, _ in before}
+        deadline = self.clock.time() + LANDING_TIMEOUT
+        while True:
+            cards = [captions for captions, _ in self._grid()]
+            if cards and sum(c in old for c in cards) <= GRID_OVERLAP * len(cards):
+                return True
+            if self.clock.time() >= deadline:
+                return False
+            self.clock.sleep(LANDING_POLL)
+
+    def _ascending(self):
+        counts = [viewers for _, viewers in self._grid() if viewers is not None]
+        if len(counts) < 3:
+            return True  # too few counts to tell
+        descents = sum(b < a for a, b in zip(counts, counts[1:]))
+        return descents <= SORT_DESCENTS * (len(counts) - 1)
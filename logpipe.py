@@ -0,0 +1,226 @@
+"""
+Off-thread logging pipeline.
+
+Bot threads only put raw LogRecords on a queue; nothing is formatted on
+the hot path. One listener thread formats each record once and fans it
+out to the console, to the buffers of whoever is listening to that
+bot's logger, and optionally to rotating JSONL files.
+
+Each bot logs through its own child logger (whatnot-bot.<bot_id>), so
+bots running in one process never see each other's lines.
+"""
+
+import atexit
+import collections
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+from config import LOG_JSONL, LOG_JSONL_MAX_BYTES, LOG_JSONL_BACKUPS
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+LOG_DATEFMT = "%H:%M:%S"
+LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
+
+
+class LogBuffer:
+    """
+    Bounded buffer of formatted lines. `seq` counts every line ever
+    appended, so readers can resume with since() even after old lines
+    have been dropped.
+    """
+
+    def __init__(self, maxlen=2000):
+        self._lines = collections.deque(maxlen=maxlen)
+        self.seq = 0
+        self._cond = threading.Condition()
+        self._listeners = []
+
+    def append(self, line):
+        with self._cond:
+            self._lines.append(line)
+            self.seq += 1
+            self._cond.notify_all()
+        for callback in list(self._listeners):
+            callback()
+
+    def since(self, seq):
+        """Lines appended after `seq`. Returns (lines, new_seq)."""
+        with self._cond:
+            first = self.seq - len(self._lines)
+            start = max(seq, first)
+            lines = list(itertools.islice(self._lines, start - first, None))
+            return lines, self.seq
+
+    def wait(self, seq, timeout=None):
+        """Block until a line after `seq` arrives. Returns True if one did."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.seq > seq, timeout)
+
+    def add_listener(self, callback):
+        """Call `callback()` (from the listener thread) on every append."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def clear(self):
+        with self._cond:
+            self._lines.clear()
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        with self._cond:
+            return iter(list(self._lines))
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, for machine-readable log files."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record untouched — formatting happens on the listener."""
+
+    def prepare(self, record):
+        return record
+
+
+class _FanOutHandler(logging.Handler):
+    """Format once, then hand the line to every sink of the record's logger."""
+
+    def __init__(self, sinks, lock):
+        super().__init__()
+        self._sinks = sinks
+        self._lock = lock
+
+    def emit(self, record):
+        flushed = getattr(record, "flush_event", None)
+        if flushed is not None:
+            flushed.set()
+            return
+        with self._lock:
+            sinks = list(self._sinks.get(record.name, ()))
+        if not sinks:
+            return
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        for sink in sinks:
+            try:
+                sink.append(line)
+            except Exception:
+                pass
+
+
+def _not_marker(record):
+    return not hasattr(record, "flush_event")
+
+
+class LogPipeline:
+    def __init__(self, console=True, jsonl=LOG_JSONL, log_dir=LOG_DIR):
+        self.queue = queue.SimpleQueue()
+        self._sinks = {}  # logger name -> [sink, ...]
+        self._lock = threading.Lock()
+        self._attached = set()
+
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT)
+        fanout = _FanOutHandler(self._sinks, self._lock)
+        fanout.setFormatter(formatter)
+        handlers = [fanout]
+        if console:
+            stream = logging.StreamHandler()
+            stream.setFormatter(formatter)
+            stream.addFilter(_not_marker)
+            handlers.append(stream)
+        if jsonl:
+            os.makedirs(log_dir, exist_ok=True)
+            rotating = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, "bot.jsonl"),
+                maxBytes=LOG_JSONL_MAX_BYTES, backupCount=LOG_JSONL_BACKUPS,
+                encoding="utf-8")
+            rotating.setFormatter(JsonLinesFormatter())
+            rotating.addFilter(_not_marker)
+            handlers.append(rotating)
+
+        self._listener = logging.handlers.QueueListener(
+            self.queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
+    def attach(self, logger, sink=None):
+        """
+        Route `logger` through the pipeline (idempotent). If `sink` is
+        given (anything with append(line)), its formatted lines go there
+        until detach().
+        """
+        with self._lock:
+            if logger.name not in self._attached:
+                logger.addHandler(_EnqueueHandler(self.queue))
+                logger.propagate = False
+                self._attached.add(logger.name)
+            if sink is not None:
+                self._sinks.setdefault(logger.name, []).append(sink)
+
+    def flush(self, timeout=2.0):
+        """Wait until every record queued so far has been handled."""
+        marker = logging.makeLogRecord({"name": "logpipe", "msg": "flush",
+                                        "levelno": logging.DEBUG,
+                                        "levelname": "DEBUG"})
+        marker.flush_event = threading.Event()
+        self.queue.put_nowait(marker)
+        return marker.flush_event.wait(timeout)
+
+    def detach(self, logger, sink):
+        """Stop sending `logger` lines to `sink`, after pending ones arrive."""
+        self.flush()
+        with self._lock:
+            sinks = self._sinks.get(logger.name, [])
+            if sink in sinks:
+                sinks.remove(sink)
+            if not sinks:
+                self._sinks.pop(logger.name, None)
+
+    def sink_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._sinks.values())
+
+    def stop(self):
+        """Drain the queue and stop the listener thread."""
+        self._listener.stop()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline(**options):
+    """
+    The process-wide pipeline, started on first use. `options` (e.g.
+    console=False) go to LogPipeline and only apply to that first call.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LogPipeline(**options)
+            atexit.register(_pipeline.stop)
+        return _pipeline
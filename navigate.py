@@ -5,16 +5,15 @@ Usage:
     python navigate.py tap_stream N   - Tap the Nth stream thumbnail (0-indexed)
     python navigate.py back           - Press back button
     python navigate.py capture NAME   - Just capture current screen
+    python navigate.py batch N1 N2 .. - Capture a sequence of screens
     python navigate.py scroll         - Scroll down
 """
 
 import uiautomator2 as u2
 import sys
-import os
 import time
-import json
 
-DISCOVERY_DIR = os.path.join(os.path.dirname(__file__), "discovery")
+from capture import capture as capture_screen, capture_batch, print_summary
 
 
 def connect():
@@ -24,43 +23,9 @@ def connect():
 
 
 def capture(d, name):
-    os.makedirs(DISCOVERY_DIR, exist_ok=True)
-    ts = int(time.time())
-    prefix = f"{name}_{ts}"
-
-    ss_path = os.path.join(DISCOVERY_DIR, f"{prefix}.png")
-    d.screenshot(ss_path)
-
-    xml_path = os.path.join(DISCOVERY_DIR, f"{prefix}.xml")
-    xml = d.dump_hierarchy()
-    with open(xml_path, "w") as f:
-        f.write(xml)
-
-    elements = []
-    for node in d.xpath("//*").all():
-        info = node.info
-        if info.get("text") or info.get("contentDescription") or info.get("clickable"):
-            elements.append({
-                "text": info.get("text", ""),
-                "content_desc": info.get("contentDescription", ""),
-                "class": info.get("className", ""),
-                "resource_id": info.get("resourceName", ""),
-                "clickable": info.get("clickable", False),
-                "bounds": info.get("bounds", {}),
-            })
-
-    json_path = os.path.join(DISCOVERY_DIR, f"{prefix}_elements.json")
-    with open(json_path, "w") as f:
-        json.dump(elements, f, indent=2)
-
-    print(f"Captured '{name}': {ss_path} ({len(elements)} elements)")
-    for el in elements[:30]:
-        text = el["text"] or el["content_desc"] or el["resource_id"]
-        if text:
-            click = " [clickable]" if el["clickable"] else ""
-            print(f"  - {text}{click}")
-    if len(elements) > 30:
-        print(f"  ... and {len(elements) - 30} more")
+    prefix, elements = capture_screen(d, name)
+    print(f"Captured '{name}': {prefix}.png ({len(elements)} elements)")
+    print_summary(elements, 30)
     return elements
 
 
@@ -106,6 +71,9 @@ def main():
         name = sys.argv[2] if len(sys.argv) > 2 else "screen"
         capture(d, name)
 
+    elif cmd == "batch":
+        capture_batch(d, sys.argv[2:] or ["screen"])
+
     elif cmd == "scroll":
         d.swipe(540, 1800, 540, 600, duration=0.5)
         print("Scrolled down")
@@ -0,0 +1,155 @@
+"""
+Lazily evaluated view of the stream currently on screen.
+
+Each field is computed on first access and memoized for that screen,
+so a scan only pays for what it reads. Cheapest first:
+    has_giveaway      one selector probe (or free if already dumped)
+    name, viewers     one hierarchy dump, parsed locally, shared
+    settled_viewers() OCRs a screenshot if the count is missing from the
+                      dump, then re-dumps after a short wait as a last resort
+"""
+
+from calibration import REFERENCE_SCREEN
+from capture import parse_hierarchy
+
+_UNSET = object()
+
+
+def parse_viewer_text(text):
+    """Parse viewer count strings like '5', '1.3k', '1.3K', '12K'."""
+    text = text.strip().lower()
+    if text.endswith("k"):
+        try:
+            return int(float(text[:-1]) * 1000)
+        except ValueError:
+            return None
+    if text.isdigit():
+        return int(text)
+    return None
+
+
+def find_viewer_node(nodes, screen=REFERENCE_SCREEN):
+    """The top-right text node holding the viewer count, or None."""
+    for info in nodes:
+        if screen.in_viewer_area(info["bounds"]):
+            if parse_viewer_text(info["text"]) is not None:
+                return info
+    return None
+
+
+def find_viewer_count(nodes, screen=REFERENCE_SCREEN):
+    """Viewer count from the top-right text node, or None."""
+    node = find_viewer_node(nodes, screen)
+    return parse_viewer_text(node["text"]) if node else None
+
+
+def find_streamer_name(nodes, screen=REFERENCE_SCREEN):
+    """Streamer name from the top-left avatar description."""
+    for info in nodes:
+        desc = info["contentDescription"]
+        if (desc and screen.in_name_area(info["bounds"])
+                and desc not in ("Leave", "Ship Time")):
+            return desc
+    return "unknown"
+
+
+def grid_cards(nodes):
+    """
+    Stream thumbnails on a grid, in reading order. Each card has its
+    bounds, the caption lines under the thumbnail (viewer counts and
+    Live badges left out, since they change) and the viewer count when
+    shown.
+    """
+    cards = []
+    for thumb in nodes:
+        if thumb["resourceName"] != "show_item_thumbnail":
+            continue
+        b = thumb["bounds"]
+        caption_bottom = b.get("bottom", 0) + (b.get("bottom", 0) - b.get("top", 0)) // 4
+        captions = []
+        viewers = None
+        for info in nodes:
+            text = info["text"] or info["contentDescription"]
+            nb = info["bounds"]
+            cx = (nb.get("left", 0) + nb.get("right", 0)) // 2
+            cy = (nb.get("top", 0) + nb.get("bottom", 0)) // 2
+            if (not text or info is thumb
+                    or not (b.get("left", 0) <= cx <= b.get("right", 0)
+                            and b.get("top", 0) <= cy <= caption_bottom)):
+                continue
+            # "Live · 12" badge, or a bare count
+            count = parse_viewer_text(text.split("·")[-1])
+            if text.startswith("Live") or count is not None:
+                viewers = viewers if count is None else count
+                continue
+            captions.append(text)
+        cards.append({"bounds": b, "captions": captions, "viewers": viewers})
+    cards.sort(key=lambda c: (c["bounds"].get("top", 0), c["bounds"].get("left", 0)))
+    return cards
+
+
+class StreamObservation:
+    def __init__(self, d, clock, ocr=None, screen=REFERENCE_SCREEN):
+        self.d = d
+        self.clock = clock
+        self.ocr = ocr
+        self.screen = screen
+        self._nodes = None
+        self._has_giveaway = None
+        self._name = _UNSET
+        self._viewers = _UNSET
+
+    @property
+    def nodes(self):
+        if self._nodes is None:
+            self._nodes = parse_hierarchy(self.d.dump_hierarchy())
+        return self._nodes
+
+    @property
+    def has_giveaway(self):
+        if self._has_giveaway is None:
+            if self._nodes is not None:
+                self._has_giveaway = any(n["text"] == "Giveaway" for n in self._nodes)
+            else:
+                self._has_giveaway = bool(self.d(text="Giveaway").exists)
+        return self._has_giveaway
+
+    @property
+    def name(self):
+        if self._name is _UNSET:
+            self._name = find_streamer_name(self.nodes, self.screen)
+        return self._name
+
+    @property
+    def viewers(self):
+        """Viewer count from the current dump — never waits."""
+        if self._viewers is _UNSET:
+            self._viewers = find_viewer_count(self.nodes, self.screen)
+        return self._viewers
+
+    def settled_viewers(self, retry_delay=1.5):
+        """
+        Viewer count. If the dump has none, read it off a screenshot;
+        failing that, re-dump once after a wait in case it hadn't loaded.
+        When the dump does have it, the screenshot is used to harvest
+        OCR glyphs until the set is complete.
+        """
+        if self.viewers is not None:
+            node = find_viewer_node(self.nodes, self.screen) if self.ocr else None
+            if node is not None and self.ocr.wants(node["text"]):
+                try:
+                    self.ocr.learn_device(self.d, node)
+                except Exception:
+                    pass
+            return self._viewers
+        if self.ocr:
+            try:
+                self._viewers = self.ocr.read_device(self.d, self.screen.viewer_region())
+            except Exception:
+                self._viewers = None
+            if self._viewers is not None:
+                return self._viewers
+        self.clock.sleep(retry_delay)
+        self._nodes = None
+        self._viewers = find_viewer_count(self.nodes, self.screen)
+        return self._viewers
@@ -0,0 +1,359 @@
+"""
+Template OCR for the viewer count, for app builds whose hierarchy has
+no viewer text.
+
+The top-right region of a screenshot is binarized and split into glyph
+blobs. Every blob is resized to a fixed grid and all of them are scored
+against every template in one matrix product. Templates are kept per
+screen resolution, in memory and under ./ocr_glyphs/:
+
+  - seeded from rendered Hershey digits, so something works from the start
+  - replaced by real glyphs harvested whenever the hierarchy *does* show
+    a count (the bot does this on its own), or from discovery captures
+
+Usage:
+    python ocr.py harvest [discovery_dir]   # learn glyphs from captures
+    python ocr.py read screenshot.png       # print the count it sees
+    python ocr.py selftest                  # read rendered counts at several sizes
+"""
+
+import glob
+import os
+import threading
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # OCR is optional; viewer counts fall back to the dump
+    cv2 = np = None
+
+from calibration import REFERENCE_SCREEN, from_capture
+from capture import DISCOVERY_DIR, parse_hierarchy
+from config import OCR_ENABLED, OCR_MIN_SCORE
+from observation import find_viewer_node, parse_viewer_text
+
+GLYPH_DIR = os.path.join(os.path.dirname(__file__), "ocr_glyphs")
+GLYPHS = "0123456789k"
+# Templates and blobs are compared at this size (w, h)
+GLYPH_SIZE = (12, 18)
+# Blobs shorter than this fraction of the median glyph height are dots
+DOT_HEIGHT = 0.4
+# Where the viewer count sits, as fractions of the screen (l, t, r, b),
+# when no screen profile says otherwise (see calibration.py)
+VIEWER_REGION = REFERENCE_SCREEN.viewer_region()
+# Harvested samples kept per glyph
+MAX_SAMPLES = 5
+# Screenshots spent on harvesting before giving up (per process)
+MAX_HARVEST_ATTEMPTS = 20
+
+
+def available():
+    return OCR_ENABLED and cv2 is not None
+
+
+def _binarize(gray):
+    """Otsu threshold with text as 1s, whichever polarity the text has."""
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if binary.mean() > 0.5:
+        binary = 1 - binary
+    return binary
+
+
+def _vectorize(binary, boxes):
+    """Resize each box to GLYPH_SIZE; rows are zero-mean, unit-norm."""
+    vecs = np.empty((len(boxes), GLYPH_SIZE[0] * GLYPH_SIZE[1]), np.float32)
+    for i, (x, y, w, h) in enumerate(boxes):
+        patch = binary[y:y + h, x:x + w].astype(np.float32)
+        vecs[i] = cv2.resize(patch, GLYPH_SIZE, interpolation=cv2.INTER_AREA).ravel()
+    vecs -= vecs.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-6)
+
+
+def _segment(binary):
+    """
+    Split a binary image into text lines of glyph boxes (x, y, w, h),
+    left to right. Decimal points come back as boxes tagged '.'.
+    """
+    n, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    img_h = binary.shape[0]
+    blobs = [(int(x), int(y), int(w), int(h)) for x, y, w, h, area in stats[1:n]
+             if h <= 0.8 * img_h and area >= 2]
+    if not blobs:
+        return []
+    # Dots are small next to the glyphs, whatever the text size: compare
+    # with the median height of the blobs at least half the tallest
+    tallest = max(b[3] for b in blobs)
+    glyph_h = float(np.median([b[3] for b in blobs if b[3] >= 0.5 * tallest]))
+    glyphs, dots = [], []
+    for box in blobs:
+        (glyphs if box[3] >= DOT_HEIGHT * glyph_h else dots).append(box)
+
+    # Group glyphs of similar height on the same baseline
+    lines = []
+    for box in sorted(glyphs):
+        x, y, w, h = box
+        for line in lines:
+            lx, ly, lw, lh = line[-1]
+            if (abs((y + h) - (ly + lh)) <= 0.25 * lh and 0.6 < h / lh < 1.6
+                    and x - (lx + lw) <= 1.2 * lh):
+                line.append(box)
+                break
+        else:
+            lines.append([box])
+
+    result = []
+    for line in lines:
+        height = max(b[3] for b in line)
+        bottom = max(b[1] + b[3] for b in line)
+        items = [(b, None) for b in line]
+        # A dot is small, sits on the baseline, and lies inside the line
+        for dx, dy, dw, dh in dots:
+            if (dh <= 0.35 * height and abs(dy + dh - bottom) <= 0.2 * height
+                    and line[0][0] < dx < line[-1][0] + line[-1][2]):
+                items.append(((dx, dy, dw, dh), "."))
+        items.sort(key=lambda item: item[0][0])
+        result.append(items)
+    return result
+
+
+def _render_seed():
+    """Rendered Hershey glyphs — a rough stand-in until real ones are harvested."""
+    templates = {}
+    for ch in GLYPHS:
+        canvas = np.zeros((60, 48), np.uint8)
+        cv2.putText(canvas, ch, (6, 46), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 1, 3)
+        ys, xs = np.nonzero(canvas)
+        box = (xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1)
+        templates[ch] = _vectorize(canvas, [box])
+    return templates
+
+
+class GlyphSet:
+    """Glyph templates for one screen resolution."""
+
+    def __init__(self, resolution, glyph_dir=GLYPH_DIR):
+        self.resolution = resolution
+        self.path = os.path.join(glyph_dir, "%dx%d.npz" % resolution)
+        self.learned = {}  # char -> array of sample vectors
+        self._seed = _render_seed()
+        self._matrix = None
+        self._labels = None
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with np.load(self.path) as data:
+                self.learned = {ch: data[ch] for ch in data.files}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        np.savez_compressed(self.path, **self.learned)
+
+    def missing(self, text):
+        """Chars of `text` that have no harvested samples yet."""
+        return {ch for ch in text.lower() if ch in GLYPHS and ch not in self.learned}
+
+    def add(self, ch, vec):
+        samples = self.learned.get(ch)
+        if samples is not None and len(samples) >= MAX_SAMPLES:
+            return False
+        vec = vec.reshape(1, -1)
+        self.learned[ch] = vec if samples is None else np.vstack([samples, vec])
+        self._matrix = None
+        return True
+
+    def matrix(self):
+        """(templates, labels): harvested samples, seed for the rest."""
+        if self._matrix is None:
+            rows, labels = [], []
+            for ch in GLYPHS:
+                samples = self.learned.get(ch, self._seed[ch])
+                rows.append(samples)
+                labels.extend(ch * len(samples))
+            self._matrix = np.vstack(rows)
+            self._labels = np.array(labels)
+        return self._matrix, self._labels
+
+
+class ViewerOCR:
+    def __init__(self, glyph_dir=GLYPH_DIR, min_score=OCR_MIN_SCORE):
+        self.glyph_dir = glyph_dir
+        self.min_score = min_score
+        self._sets = {}
+        self._lock = threading.Lock()
+        self._last = None
+        self.harvest_attempts = 0
+
+    def glyphs(self, resolution):
+        with self._lock:
+            if resolution not in self._sets:
+                self._sets[resolution] = GlyphSet(resolution, self.glyph_dir)
+            self._last = self._sets[resolution]
+            return self._last
+
+    def wants(self, text):
+        """
+        True if a screenshot of `text` would teach us new glyphs. Judged
+        against the last resolution seen — a bot only has one screen.
+        """
+        if self.harvest_attempts >= MAX_HARVEST_ATTEMPTS:
+            return False
+        return self._last is None or bool(self._last.missing(text))
+
+    @staticmethod
+    def _gray(image):
+        return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def read(self, image, region=VIEWER_REGION):
+        """Viewer count in the top-right region of a BGR screenshot, or None."""
+        gray = self._gray(image)
+        h, w = gray.shape
+        l, t, r, b = region
+        binary = _binarize(gray[int(t * h):int(b * h), int(l * w):int(r * w)])
+        lines = _segment(binary)
+        boxes = [box for line in lines for box, tag in line if tag is None]
+        if not boxes:
+            return None
+
+        templates, labels = self.glyphs((w, h)).matrix()
+        scores = _vectorize(binary, boxes) @ templates.T
+        best = scores.argmax(axis=1)
+        chars = iter(zip(labels[best], scores[np.arange(len(best)), best]))
+
+        # Rightmost line that reads cleanly as a count wins
+        found = None
+        for line in lines:
+            text, ok = "", True
+            for box, tag in line:
+                if tag is not None:
+                    text += tag
+                    continue
+                ch, score = next(chars)
+                ok = ok and score >= self.min_score
+                text += ch
+            count = parse_viewer_text(text) if ok else None
+            if count is not None:
+                right = line[-1][0][0]
+                if found is None or right > found[0]:
+                    found = (right, count)
+        return found[1] if found else None
+
+    def read_device(self, d, region=VIEWER_REGION):
+        """Screenshot the device in memory and read the count."""
+        image = d.screenshot(format="opencv")
+        if image is None:
+            return None
+        return self.read(image, region)
+
+    def learn_device(self, d, node):
+        """Screenshot the device and harvest glyphs from a viewer-count node."""
+        image = d.screenshot(format="opencv")
+        if image is None:
+            self.harvest_attempts += 1
+            return False
+        return self.learn(image, node["bounds"], node["text"])
+
+    def learn(self, image, bounds, text):
+        """
+        Harvest glyphs from a node whose text is known. Returns True if
+        the blobs lined up with the characters and were added.
+        """
+        self.harvest_attempts += 1
+        chars = text.strip().lower()
+        gray = self._gray(image)
+        h, w = gray.shape
+        crop = gray[bounds["top"]:bounds["bottom"], bounds["left"]:bounds["right"]]
+        if crop.size == 0:
+            return False
+        binary = _binarize(crop)
+        items = [item for line in _segment(binary) for item in line]
+        if len(items) != len(chars):
+            return False
+        if any((tag == ".") != (ch == ".") for (_, tag), ch in zip(items, chars)):
+            return False
+        boxes = [(box, ch) for (box, tag), ch in zip(items, chars) if tag is None]
+        if any(ch not in GLYPHS for _, ch in boxes):
+            return False
+        glyphs = self.glyphs((w, h))
+        vecs = _vectorize(binary, [box for box, _ in boxes])
+        added = [glyphs.add(ch, vec) for vec, (_, ch) in zip(vecs, boxes)]
+        if any(added):
+            glyphs.save()
+        return True
+
+
+_ocr = None
+
+
+def viewer_ocr():
+    """Process-wide OCR (glyph sets are shared), or None if unavailable."""
+    global _ocr
+    if not available():
+        return None
+    if _ocr is None:
+        _ocr = ViewerOCR()
+    return _ocr
+
+
+def harvest_dir(ocr, path=DISCOVERY_DIR):
+    """Learn glyphs from discovery captures (NAME_TS.png + NAME_TS.xml)."""
+    learned = 0
+    for png in sorted(glob.glob(os.path.join(path, "*.png"))):
+        xml_path = png[:-4] + ".xml"
+        if not os.path.exists(xml_path):
+            continue
+        with open(xml_path) as f:
+            nodes = parse_hierarchy(f.read())
+        node = find_viewer_node(nodes, from_capture(nodes))
+        image = cv2.imread(png)
+        if node is not None and image is not None:
+            if ocr.learn(image, node["bounds"], node["text"]):
+                learned += 1
+                print(f"  {os.path.basename(png)}: learned '{node['text']}'")
+    return learned
+
+
+# Rendered counts and Hershey font scales for selftest(); 1.2 and up
+# give xxhdpi-sized glyphs (24px and taller)
+SELFTEST_COUNTS = {"1.3k": 1300, "12.5k": 12500, "847": 847, "3k": 3000}
+SELFTEST_SCALES = (0.8, 1.2, 1.6, 2.0)
+
+
+def selftest():
+    """Read counts drawn with cv2.putText at several sizes; returns the failures."""
+    import tempfile
+    failures = []
+    with tempfile.TemporaryDirectory() as glyph_dir:
+        ocr = ViewerOCR(glyph_dir=glyph_dir)
+        for text, expected in SELFTEST_COUNTS.items():
+            for scale in SELFTEST_SCALES:
+                image = np.full((int(60 * scale) + 20, int(200 * scale) + 20, 3), 255, np.uint8)
+                cv2.putText(image, text, (5, int(45 * scale) + 5), cv2.FONT_HERSHEY_SIMPLEX,
+                            scale, (0, 0, 0), max(1, round(scale * 2)))
+                count = ocr.read(image, (0, 0, 1, 1))
+                if count != expected:
+                    failures.append((text, scale, count))
+    return failures
+
+
+if __name__ == "__main__":
+    import sys
+    if cv2 is None:
+        sys.exit("OCR needs opencv-python and numpy")
+    ocr = ViewerOCR()
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "harvest"
+    if cmd == "harvest":
+        n = harvest_dir(ocr, sys.argv[2] if len(sys.argv) > 2 else DISCOVERY_DIR)
+        print(f"Learned glyphs from {n} captures into {GLYPH_DIR}")
+    elif cmd == "read" and len(sys.argv) > 2:
+        print(ocr.read(cv2.imread(sys.argv[2])))
+    elif cmd == "selftest":
+        failures = selftest()
+        for text, scale, count in failures:
+            print(f"  {text!r} at scale {scale}: read {count}")
+        total = len(SELFTEST_COUNTS) * len(SELFTEST_SCALES)
+        print(f"{total - len(failures)}/{total} rendered counts read correctly")
+        sys.exit(1 if failures else 0)
+    else:
+        print(__doc__)
@@ -0,0 +1,105 @@
+"""
+Opportunity queue — giveaway streams the bot saw but didn't enter, so
+that after a giveaway it can go straight to the best one instead of
+scanning blind.
+
+Kinds, by how sure the bot is that there's something to enter:
+    giveaway   an active giveaway, passed over for its viewer count
+               (counts move, and the next giveaway may have a higher cap)
+    card       a grid card the scan never got to; giveaway unknown
+Each is scored KIND_WEIGHT[kind] / viewers, halving every
+OPPORTUNITY_HALF_LIFE seconds, and dropped after OPPORTUNITY_TTL.
+
+Because every entry decays at the same rate, their order never changes
+with time: ranking by log(weight / viewers) + seen_at * ln 2 / half_life
+is the same as ranking by the decayed score at any moment. So the queue
+is a plain heap on that key, and nothing is re-scored as time passes.
+A streamer seen again replaces their old entry (lazily: the stale heap
+item is skipped when it surfaces).
+"""
+
+import heapq
+import itertools
+import math
+from collections import namedtuple
+
+from config import OPPORTUNITY_HALF_LIFE, OPPORTUNITY_TTL
+
+KIND_WEIGHT = {"giveaway": 1.0, "card": 0.25}
+# Viewer count assumed when it wasn't read
+UNKNOWN_VIEWERS = 30
+# Entries kept at most; the lowest ranked go first
+MAX_OPPORTUNITIES = 200
+
+Opportunity = namedtuple("Opportunity", "name kind gw_class viewers seen_at")
+
+
+class OpportunityQueue:
+    def __init__(self, clock, half_life=OPPORTUNITY_HALF_LIFE, ttl=OPPORTUNITY_TTL,
+                 maxsize=MAX_OPPORTUNITIES):
+        self.clock = clock
+        self.half_life = half_life
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._heap = []     # (-rank, seq, Opportunity)
+        self._latest = {}   # name -> (seq, kind) of its live heap item
+        self._seq = itertools.count()
+        self.added = 0
+        self.taken = 0
+
+    def __len__(self):
+        return len(self._latest)
+
+    def _rank(self, opp):
+        viewers = max(opp.viewers or UNKNOWN_VIEWERS, 1)
+        return (math.log(KIND_WEIGHT[opp.kind] / viewers)
+                + opp.seen_at * math.log(2) / self.half_life)
+
+    def score(self, opp, now=None):
+        """Decayed score of `opp` now (for logging and thresholds)."""
+        now = self.clock.time() if now is None else now
+        viewers = max(opp.viewers or UNKNOWN_VIEWERS, 1)
+        return KIND_WEIGHT[opp.kind] / viewers * 0.5 ** ((now - opp.seen_at) / self.half_life)
+
+    def add(self, name, kind, viewers=None, gw_class=None):
+        """Note a stream worth coming back to; replaces older news of `name`."""
+        if not name or name == "unknown":
+            return
+        old = self._latest.get(name)
+        if old is not None and old[1] == "giveaway" and kind == "card":
+            return  # a later card sighting says less than the giveaway we saw
+        opp = Opportunity(name, kind, gw_class, viewers, self.clock.time())
+        seq = next(self._seq)
+        self._latest[name] = (seq, kind)
+        heapq.heappush(self._heap, (-self._rank(opp), seq, opp))
+        self.added += 1
+        if len(self._heap) > 2 * self.maxsize:
+            self._trim()
+
+    def discard(self, name):
+        """Forget `name` (entered, or found not worth it)."""
+        self._latest.pop(name, None)
+
+    def pop(self):
+        """Best fresh opportunity, or None. Stale entries are dropped on the way."""
+        now = self.clock.time()
+        while self._heap:
+            _, seq, opp = heapq.heappop(self._heap)
+            if self._latest.get(opp.name, (None,))[0] != seq:
+                continue  # replaced or discarded
+            del self._latest[opp.name]
+            if now - opp.seen_at > self.ttl:
+                continue
+            self.taken += 1
+            return opp
+        return None
+
+    def _trim(self):
+        """Drop replaced items, then the lowest ranked beyond maxsize."""
+        live = [item for item in self._heap
+                if self._latest.get(item[2].name, (None,))[0] == item[1]]
+        live.sort()
+        for _, _, opp in live[self.maxsize:]:
+            del self._latest[opp.name]
+        self._heap = live[:self.maxsize]
+        heapq.heapify(self._heap)
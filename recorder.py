@@ -0,0 +1,192 @@
+"""
+Session recorder — logs what the bot saw and did to an on-disk archive
+so misdetections can be debugged and sessions replayed offline.
+
+Archive layout (one directory per session):
+    events.jsonl          one JSON event per line, appended as it happens
+    objects/ab/cdef...    zlib-compressed blobs named by SHA-1 of content
+
+Hierarchy dumps and screenshots are stored as blobs and referenced from
+events by digest, so identical screens are written once. Nothing is
+kept in memory beyond the open events file, and re-opening an existing
+session directory appends to it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+SESSIONS_DIR = os.path.join(os.path.dirname(__file__), "sessions")
+
+
+class SessionRecorder:
+    def __init__(self, path=None, screenshots=False, clock=time.time):
+        self.path = path or os.path.join(
+            SESSIONS_DIR, time.strftime("%Y%m%d_%H%M%S"))
+        self.screenshots = screenshots
+        self.clock = clock
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        # Line-buffered so a crash loses at most the event being written
+        self._events = open(os.path.join(self.path, "events.jsonl"), "a",
+                            buffering=1, encoding="utf-8")
+        self._lock = threading.Lock()
+        self._last_digest = None
+
+    def _object_path(self, digest):
+        return os.path.join(self.path, "objects", digest[:2], digest[2:])
+
+    def store(self, data, level=6):
+        """Store a blob content-addressed. Returns its digest."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(data, level))
+            os.replace(tmp, path)
+        return digest
+
+    def event(self, kind, **fields):
+        record = {"t": round(self.clock(), 3), "kind": kind}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._events.closed:
+                self._events.write(line + "\n")
+
+    def hierarchy(self, xml):
+        digest = self.store(xml)
+        # Flag repeats so readers can skip re-parsing unchanged screens
+        self.event("hierarchy", obj=digest, same=digest == self._last_digest)
+        self._last_digest = digest
+        return digest
+
+    def screenshot(self, data):
+        # Image data is already compressed — don't spend CPU on it again
+        digest = self.store(data, level=1)
+        self.event("screenshot", obj=digest)
+        return digest
+
+    def close(self):
+        with self._lock:
+            self._events.close()
+
+
+def read_session(path):
+    """Yield events from a session archive in order, one line at a time."""
+    with open(os.path.join(path, "events.jsonl"), encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Torn last line from a killed session
+                continue
+
+
+def load_object(path, digest):
+    """Load and decompress a blob from a session archive."""
+    with open(os.path.join(path, "objects", digest[:2], digest[2:]), "rb") as f:
+        return zlib.decompress(f.read())
+
+
+class RecordingSelector:
+    """Wraps a uiautomator2 selector, recording probes and clicks."""
+
+    def __init__(self, sel, selector, recorder, index=None):
+        self._sel = sel
+        self._selector = selector
+        self._rec = recorder
+        self._index = index
+
+    def _event(self, kind, **fields):
+        if self._index is not None:
+            fields["index"] = self._index
+        self._rec.event(kind, selector=self._selector, **fields)
+
+    @property
+    def exists(self):
+        result = self._sel.exists
+        self._event("exists", result=bool(result))
+        return result
+
+    @property
+    def count(self):
+        result = self._sel.count
+        self._event("count", result=result)
+        return result
+
+    @property
+    def info(self):
+        result = self._sel.info
+        self._event("info", bounds=result.get("bounds"))
+        return result
+
+    def wait(self, timeout=None, **kwargs):
+        start = self._rec.clock()
+        result = self._sel.wait(timeout=timeout, **kwargs)
+        self._event("wait", result=bool(result),
+                    waited=round(self._rec.clock() - start, 3))
+        return result
+
+    def click(self, *args, **kwargs):
+        self._event("click_selector")
+        return self._sel.click(*args, **kwargs)
+
+    def __getitem__(self, index):
+        return RecordingSelector(self._sel[index], self._selector,
+                                 self._rec, index=index)
+
+    def __getattr__(self, name):
+        return getattr(self._sel, name)
+
+
+class RecordingDevice:
+    """
+    Wraps a uiautomator2 device. Hierarchy dumps, selector probes and
+    actions are recorded; everything else passes straight through.
+    """
+
+    def __init__(self, d, recorder):
+        self._d = d
+        self._rec = recorder
+
+    def __call__(self, **selector):
+        return RecordingSelector(self._d(**selector), selector, self._rec)
+
+    def __getattr__(self, name):
+        return getattr(self._d, name)
+
+    def dump_hierarchy(self, *args, **kwargs):
+        xml = self._d.dump_hierarchy(*args, **kwargs)
+        self._rec.hierarchy(xml)
+        if self._rec.screenshots:
+            try:
+                self._rec.screenshot(self._d.screenshot(format="raw"))
+            except Exception as e:
+                self._rec.event("screenshot_error", error=str(e))
+        return xml
+
+    def click(self, x, y):
+        self._rec.event("click", x=x, y=y)
+        return self._d.click(x, y)
+
+    def swipe(self, fx, fy, tx, ty, duration=None, **kwargs):
+        self._rec.event("swipe", fx=fx, fy=fy, tx=tx, ty=ty, duration=duration)
+        return self._d.swipe(fx, fy, tx, ty, duration=duration, **kwargs)
+
+    def press(self, key):
+        self._rec.event("press", key=key)
+        return self._d.press(key)
+
+    def app_start(self, package, *args, **kwargs):
+        self._rec.event("app_start", package=package)
+        return self._d.app_start(package, *args, **kwargs)
@@ -0,0 +1,293 @@
+"""
+Operating schedule — which hours of the week the devices run, from what
+those hours have paid before.
+
+Each of the 168 hours of the week (local time) keeps a yield from the
+giveaway history: entries per device-hour, average viewers, pack share,
+and a score, the expected wins per device-hour (1 / viewers per entry,
+pack entries weighted by SCHEDULE_PACK_WEIGHT). Device-hours come from
+yield.json, to which the server adds every minute a bot runs; entries
+come from the giveaway CSV log, counting rows since that tracking began.
+Hours with little running time are pulled towards the overall average
+by a prior worth SCHEDULE_PRIOR_HOURS device-hours.
+
+The plan ranks the hours by score and gives each device
+SCHEDULE_RUN_HOURS of them at full pace and the next
+SCHEDULE_THROTTLE_HOURS at a slower pace (scan and poll delays x
+SCHEDULE_THROTTLE, entering stays at full speed);
+in the rest it's stopped, saving battery and heat for better hours.
+Hours run for less than SCHEDULE_EXPLORE_HOURS always run, so hours the
+plan has never seen get a chance. Blackout windows stop devices
+regardless, e.g.
+    daily 01:00-07:00
+    mon-fri 09:00-17:30
+    sat,sun 00:00-24:00
+
+Usage:
+    python scheduler.py                       # yield table and plan
+    python scheduler.py --blackout "daily 01:00-07:00"
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+
+from config import (
+    SCHEDULE_RUN_HOURS, SCHEDULE_THROTTLE_HOURS, SCHEDULE_PRIOR_HOURS,
+    SCHEDULE_EXPLORE_HOURS, SCHEDULE_PACK_WEIGHT,
+)
+
+YIELD_NAME = "yield.json"
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+YIELD_PATH = os.path.join(DATA_DIR, YIELD_NAME)
+GIVEAWAY_LOG = os.path.join(DATA_DIR, "giveaway_log.csv")
+HOURS_PER_WEEK = 168
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_GROUPS = {"daily": DAYS, "weekdays": DAYS[:5], "weekends": DAYS[5:]}
+# Viewer count assumed for log rows without one
+UNKNOWN_VIEWERS = 30
+STATES = ("run", "throttle", "stop")
+
+
+def hour_of_week(t):
+    tm = time.localtime(t)
+    return tm.tm_wday * 24 + tm.tm_hour
+
+
+def hour_label(h):
+    return f"{DAYS[h // 24].capitalize()} {h % 24:02d}:00"
+
+
+# ── Blackout windows ──
+
+class Blackout:
+    """One 'DAYS HH:MM-HH:MM' window; it may run past midnight."""
+
+    _PATTERN = re.compile(r"^\s*([a-z,\-]+)\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+    def __init__(self, text):
+        m = self._PATTERN.match(text.lower())
+        if not m:
+            raise ValueError(f"bad blackout {text!r}, expected e.g. 'mon-fri 01:00-07:00'")
+        self.text = text.strip()
+        self.days = _parse_days(m.group(1))
+        self.start = int(m.group(2)) * 60 + int(m.group(3))
+        self.end = int(m.group(4)) * 60 + int(m.group(5))
+        if not (0 <= self.start < 24 * 60 and 0 < self.end <= 24 * 60) or self.start == self.end:
+            raise ValueError(f"bad blackout times in {text!r}")
+
+    def _minutes(self):
+        """(day index, first minute, end minute) spans within single days."""
+        for day in self.days:
+            if self.start < self.end:
+                yield day, self.start, self.end
+            else:
+                yield day, self.start, 24 * 60
+                yield (day + 1) % 7, 0, self.end
+
+    def covers(self, t):
+        tm = time.localtime(t)
+        minute = tm.tm_hour * 60 + tm.tm_min
+        return any(day == tm.tm_wday and lo <= minute < hi
+                   for day, lo, hi in self._minutes())
+
+    def hours(self):
+        """Hours of the week the window covers whole (state_at handles the rest)."""
+        return {day * 24 + h for day, lo, hi in self._minutes()
+                for h in range((lo + 59) // 60, hi // 60)}
+
+
+def _parse_days(text):
+    days = []
+    for part in text.split(","):
+        if part in DAY_GROUPS:
+            days.extend(DAYS.index(d) for d in DAY_GROUPS[part])
+            continue
+        first, _, last = part.partition("-")
+        if first not in DAYS or (last and last not in DAYS):
+            raise ValueError(f"unknown day {part!r}")
+        a, b = DAYS.index(first), DAYS.index(last or first)
+        days.extend(range(a, b + 1) if a <= b else list(range(a, 7)) + list(range(b + 1)))
+    return sorted(set(days))
+
+
+# ── Yield profile ──
+
+class YieldProfile:
+    def __init__(self, path=YIELD_PATH, log_path=GIVEAWAY_LOG, prior_hours=SCHEDULE_PRIOR_HOURS,
+                 pack_weight=SCHEDULE_PACK_WEIGHT):
+        self.path = path
+        self.log_path = log_path
+        self.prior_hours = prior_hours
+        self.pack_weight = pack_weight
+        self.seconds = [0.0] * HOURS_PER_WEEK   # device-seconds run
+        self.since = None                      # when tracking began
+        self.entries = [0] * HOURS_PER_WEEK
+        self.wins = [0.0] * HOURS_PER_WEEK     # weighted expected wins
+        self.viewer_sum = [0] * HOURS_PER_WEEK
+        self.viewer_rows = [0] * HOURS_PER_WEEK
+        self.packs = [0] * HOURS_PER_WEEK
+        self.load()
+
+    # ── Running time ──
+
+    def add_running(self, now, seconds):
+        """A device ran for `seconds` up to `now`."""
+        if self.since is None:
+            self.since = now - seconds
+        self.seconds[hour_of_week(now)] += seconds
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            seconds = [float(s) for s in data["seconds"]]
+            if len(seconds) == HOURS_PER_WEEK:
+                self.seconds, self.since = seconds, data.get("since")
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self.refresh()
+
+    def save(self):
+        if self.since is None:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"since": self.since, "seconds": [round(s, 1) for s in self.seconds]}, f)
+        os.replace(tmp, self.path)
+
+    # ── Entries ──
+
+    def refresh(self):
+        """Re-read the giveaway log (rows since running time was tracked)."""
+        entries = [0] * HOURS_PER_WEEK
+        wins = [0.0] * HOURS_PER_WEEK
+        viewer_sum = [0] * HOURS_PER_WEEK
+        viewer_rows = [0] * HOURS_PER_WEEK
+        packs = [0] * HOURS_PER_WEEK
+        try:
+            with open(self.log_path, newline="") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        t = time.mktime(time.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S"))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if self.since is None or t < self.since:
+                        continue
+                    h = hour_of_week(t)
+                    viewers = row.get("viewers") or ""
+                    # Logs from before giveaway classes call the column is_pack
+                    pack = (row.get("type") or row.get("is_pack")) == "pack"
+                    weight = self.pack_weight if pack else 1.0
+                    entries[h] += 1
+                    packs[h] += pack
+                    if viewers.isdigit():
+                        viewer_sum[h] += int(viewers)
+                        viewer_rows[h] += 1
+                    wins[h] += weight / max(int(viewers) if viewers.isdigit() else UNKNOWN_VIEWERS, 1)
+        except OSError:
+            pass
+        self.entries, self.wins = entries, wins
+        self.viewer_sum, self.viewer_rows, self.packs = viewer_sum, viewer_rows, packs
+
+    # ── Estimates ──
+
+    def device_hours(self, h=None):
+        return (sum(self.seconds) if h is None else self.seconds[h]) / 3600
+
+    def average_score(self):
+        hours = self.device_hours()
+        return sum(self.wins) / hours if hours else 0.0
+
+    def score(self, h):
+        """Expected wins per device-hour in hour `h`, shrunk to the average."""
+        hours = self.device_hours(h)
+        return ((self.wins[h] + self.average_score() * self.prior_hours)
+                / (hours + self.prior_hours))
+
+    def stats(self, h):
+        hours = self.device_hours(h)
+        return {
+            "device_hours": round(hours, 2),
+            "entries": self.entries[h],
+            "entries_per_hour": round(self.entries[h] / hours, 2) if hours else None,
+            "avg_viewers": (round(self.viewer_sum[h] / self.viewer_rows[h], 1)
+                            if self.viewer_rows[h] else None),
+            "pack_share": round(self.packs[h] / self.entries[h], 2) if self.entries[h] else None,
+            "score": round(self.score(h), 4),
+        }
+
+
+# ── Plan ──
+
+class Schedule:
+    def __init__(self, profile, blackouts=(), run_hours=SCHEDULE_RUN_HOURS,
+                 throttle_hours=SCHEDULE_THROTTLE_HOURS, explore_hours=SCHEDULE_EXPLORE_HOURS):
+        self.profile = profile
+        self.blackouts = [b if isinstance(b, Blackout) else Blackout(b) for b in blackouts]
+        self.run_hours = run_hours
+        self.throttle_hours = throttle_hours
+        self.explore_hours = explore_hours
+
+    def plan(self):
+        """State ("run", "throttle", "stop") of each hour of the week."""
+        dark = set().union(*(b.hours() for b in self.blackouts)) if self.blackouts else set()
+        plan = ["stop"] * HOURS_PER_WEEK
+        open_hours = [h for h in range(HOURS_PER_WEEK) if h not in dark]
+        explore = [h for h in open_hours if self.profile.device_hours(h) < self.explore_hours]
+        for h in explore:
+            plan[h] = "run"
+        ranked = sorted((h for h in open_hours if plan[h] == "stop"),
+                        key=self.profile.score, reverse=True)
+        run_left = max(self.run_hours - len(explore), 0)
+        for i, h in enumerate(ranked):
+            if i < run_left:
+                plan[h] = "run"
+            elif i < run_left + self.throttle_hours:
+                plan[h] = "throttle"
+        return plan
+
+    def state_at(self, t, plan=None):
+        if any(b.covers(t) for b in self.blackouts):
+            return "stop"
+        return (plan or self.plan())[hour_of_week(t)]
+
+    def describe(self, plan=None):
+        plan = plan or self.plan()
+        counts = {s: plan.count(s) for s in STATES}
+        return (f"{counts['run']}h run, {counts['throttle']}h throttled, "
+                f"{counts['stop']}h stopped per week")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--yield-file", default=YIELD_PATH)
+    parser.add_argument("--log", default=GIVEAWAY_LOG, help="giveaway CSV log")
+    parser.add_argument("--blackout", action="append", default=[],
+                        help="window like 'mon-fri 01:00-07:00' (repeatable)")
+    args = parser.parse_args()
+
+    try:
+        schedule = Schedule(YieldProfile(args.yield_file, args.log), args.blackout)
+    except ValueError as e:
+        parser.error(str(e))
+    plan = schedule.plan()
+    profile = schedule.profile
+    print(f"{profile.device_hours():.1f} device-hours tracked, "
+          f"{sum(profile.entries)} entries, average score {profile.average_score():.4f}")
+    print(f"{'hour':<10} {'dev-h':>6} {'entries':>7} {'/dev-h':>7} {'viewers':>7} "
+          f"{'packs':>6} {'score':>7}  plan")
+    for h in range(HOURS_PER_WEEK):
+        s = profile.stats(h)
+        fmt = lambda v, spec: "-" if v is None else format(v, spec)
+        print(f"{hour_label(h):<10} {s['device_hours']:>6.1f} {s['entries']:>7} "
+              f"{fmt(s['entries_per_hour'], '.2f'):>7} {fmt(s['avg_viewers'], '.1f'):>7} "
+              f"{fmt(s['pack_share'], '.0%'):>6} {s['score']:>7.4f}  {plan[h]}")
+    print(schedule.describe(plan))
+
+
+if __name__ == "__main__":
+    main()
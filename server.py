@@ -1,134 +1,470 @@
 """
-Whatnot Bot Web Dashboard — Flask server with API + SSE log streaming.
+Whatnot Bot Web Dashboard — aiohttp server with API + SSE log streaming.
 Run with: python server.py
+
+Pages, API and log streaming all run on one asyncio event loop. A single
+publisher task pushes each new log line once to every /api/logs client;
+each client has a bounded send queue, and a client that falls behind has
+its backlog collapsed into a "lines skipped" notice instead of holding
+up the others. Lines arriving within COALESCE_SECONDS of each other are
+sent together, as one SSE frame holding a JSON array of lines. Blocking work (adb checks, waiting for the bot to stop)
+runs in the default executor.
+
+The bot itself runs through a runner from worker.py — by default in its
+own process, so /api/status reads counters from shared memory and a
+stuck device can be terminated without touching the server. Start runs
+one bot per connected device; the bots share a fleet Coordinator so
+they don't evaluate the same streams. With an "experiment" in the
+config each bot alternates between its arms, and /api/experiment
+reports entries per device-hour for each (see experiments.py).
+
+Once a minute the server books how long each bot ran into the yield
+profile. With the operating schedule on (/api/schedule) that tick also
+starts, stops or throttles each device for the hour of the week, and
+pressing Stop turns the schedule off (see scheduler.py).
 """
 
-import collections
+import asyncio
 import json
+import os
+import sqlite3
 import subprocess
 import threading
 import time
 
-from flask import Flask, Response, jsonify, render_template, request
+from aiohttp import web
+
+from catalog import Catalog, parse_region
+from classifier import limit_keys
+from config import DEFAULT_CONFIG, SCHEDULE_REFRESH, SCHEDULE_THROTTLE, SCHEDULE_TICK
+from experiments import Experiment, report as experiment_report
+from logpipe import LogBuffer
+from scheduler import HOURS_PER_WEEK, Blackout, Schedule, YieldProfile, hour_label, hour_of_week
+from coordinator import Coordinator, CoordinatorServer
+from worker import make_runner
 
-from config import DEFAULT_CONFIG
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
 
-app = Flask(__name__)
+# Max lines queued per SSE client before its output is collapsed
+CLIENT_QUEUE_SIZE = 2000
+# After the first new line, wait this long for more before publishing
+COALESCE_SECONDS = 0.1
+# Max lines per SSE frame
+FRAME_MAX_LINES = 200
+# Comment frame sent to idle clients so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+routes = web.RouteTableDef()
 
 # ── Shared state ──
-bot_thread = None
-bot_instance = None
-stop_event = threading.Event()
-log_deque = collections.deque(maxlen=2000)
+runners = {}  # device serial -> runner
+# Held while runners are started, stopped or replaced, and while the
+# schedule is switched on or off (Start, Stop and scheduler ticks all
+# run in executor threads)
+_control_lock = threading.Lock()
+fleet = Coordinator()
+fleet_server = None  # socket front-end for worker processes, started lazily
+catalog = None  # discovery capture index, opened on first query
+# Stand-in devices instead of adb (used by soak.py): an object with
+# serials() and bot_kwargs(serial) -> extra WhatnotBot arguments
+device_provider = None
+log_deque = LogBuffer(maxlen=2000)
 current_config = dict(DEFAULT_CONFIG)
+# Operating schedule: when on, the scheduler starts, stops and throttles
+# the devices by hour of the week (see scheduler.py)
+schedule_settings = {"enabled": False, "blackouts": []}
+yield_profile = None  # opened on first use
+_last_tick = None
+_last_refresh = 0
+
+
+# ── Log fan-out ──
+
+class _Client:
+    """One SSE connection: a bounded queue plus a count of lines dropped."""
+
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, line):
+        if self.dropped and self.queue.qsize() < self.queue.maxsize:
+            self.queue.put_nowait(f"... {self.dropped} lines skipped (slow connection)")
+            self.dropped = 0
+        if self.queue.full():
+            self.dropped += 1
+            return
+        self.queue.put_nowait(line)
+
+    async def next(self):
+        # Report drops once the backlog is drained, even if no line follows
+        if self.dropped and self.queue.empty():
+            dropped, self.dropped = self.dropped, 0
+            return f"... {dropped} lines skipped (slow connection)"
+        return await self.queue.get()
+
+    def drain(self, limit):
+        """Up to `limit` more lines that are already queued."""
+        lines = []
+        while len(lines) < limit and not self.queue.empty():
+            lines.append(self.queue.get_nowait())
+        return lines
+
+
+class LogBroadcaster:
+    """Pushes new lines from a LogBuffer to every connected client."""
+
+    def __init__(self, buffer, queue_size=CLIENT_QUEUE_SIZE):
+        self.buffer = buffer
+        self.queue_size = queue_size
+        self.clients = set()
+        self._wakeup = None
+        self._pending = threading.Event()
+        self._loop = None
+        self._task = None
+
+    def _notify(self):
+        # Called from the log listener thread; schedule at most one wakeup
+        if not self._pending.is_set():
+            self._pending.set()
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.buffer.add_listener(self._notify)
+        self._task = asyncio.create_task(self._publish())
+
+    async def stop(self):
+        self.buffer.remove_listener(self._notify)
+        if self._task:
+            self._task.cancel()
+
+    async def _publish(self):
+        _, seq = self.buffer.since(0)
+        while True:
+            await self._wakeup.wait()
+            # Let a burst finish so it goes out in one frame; appends in
+            # the meantime don't schedule more wakeups
+            await asyncio.sleep(COALESCE_SECONDS)
+            self._wakeup.clear()
+            self._pending.clear()
+            lines, seq = self.buffer.since(seq)
+            for client in list(self.clients):
+                for line in lines:
+                    client.offer(line)
 
+    def subscribe(self):
+        """New client, primed with the lines already in the buffer."""
+        client = _Client(self.queue_size)
+        backlog, _ = self.buffer.since(0)
+        for line in backlog[-self.queue_size:]:
+            client.offer(line)
+        self.clients.add(client)
+        return client
 
-# ── Pages ──
+    def unsubscribe(self, client):
+        self.clients.discard(client)
 
-@app.route("/")
-def index():
-    return render_template("dashboard.html")
 
+broadcaster = LogBroadcaster(log_deque)
 
-# ── API ──
 
-@app.route("/api/status")
-def api_status():
-    running = bot_thread is not None and bot_thread.is_alive()
-    giveaways = bot_instance.giveaways_entered if bot_instance else 0
-    streams = bot_instance.streams_checked if bot_instance else 0
-    return jsonify({
-        "running": running,
-        "giveaways_entered": giveaways,
-        "streams_checked": streams,
-    })
+# ── Bot control (blocking — run in an executor) ──
 
+class _TaggedSink:
+    """Prefixes a device's log lines with its serial in the shared buffer."""
 
-@app.route("/api/start", methods=["POST"])
-def api_start():
-    global bot_thread, bot_instance, stop_event
+    def __init__(self, buffer, tag):
+        self.buffer = buffer
+        self.tag = tag
 
-    if bot_thread is not None and bot_thread.is_alive():
-        return jsonify({"error": "Bot is already running"}), 400
+    def append(self, line):
+        self.buffer.append(f"[{self.tag}] {line}")
 
-    # Check for ADB device
-    try:
-        result = subprocess.run(
-            ["adb", "devices"], capture_output=True, text=True, timeout=5
-        )
-        lines = [l for l in result.stdout.strip().split("\n")[1:] if l.strip()]
-        if not lines:
-            return jsonify({"error": "No ADB device connected"}), 400
-    except Exception as e:
-        return jsonify({"error": f"ADB check failed: {e}"}), 500
 
-    # ADB setup: keep screen awake on USB
+def _bot_running():
+    return any(r.is_alive() for r in list(runners.values()))
+
+
+def _adb_serials():
+    """Serials of devices in the 'device' state."""
+    result = subprocess.run(
+        ["adb", "devices"], capture_output=True, text=True, timeout=5
+    )
+    serials = []
+    for line in result.stdout.strip().split("\n")[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[1] == "device":
+            serials.append(parts[0])
+    return serials
+
+
+def _device_serials():
+    if device_provider is not None:
+        return device_provider.serials()
+    return _adb_serials()
+
+
+def _keep_awake(serial):
+    """ADB setup: keep the screen awake on USB."""
+    if device_provider is not None:
+        return
     try:
         subprocess.run(
-            ["adb", "shell", "svc", "power", "stayon", "usb"],
+            ["adb", "-s", serial, "shell", "svc", "power", "stayon", "usb"],
             capture_output=True, timeout=5,
         )
         subprocess.run(
-            ["adb", "shell", "settings", "put", "system",
+            ["adb", "-s", serial, "shell", "settings", "put", "system",
              "screen_off_timeout", "2147483647"],
             capture_output=True, timeout=5,
         )
     except Exception:
         pass  # non-fatal
 
-    stop_event = threading.Event()
-    log_deque.clear()
 
-    def run_bot():
-        global bot_instance
-        from bot import WhatnotBot
+def _launch(serial, index, config, tagged):
+    """Start a bot on one device."""
+    global fleet_server
+
+    _keep_awake(serial)
+    if config.get("worker", "process") == "process":
+        if fleet_server is None:
+            fleet_server = CoordinatorServer(fleet)
+        shared = fleet_server.address
+    else:
+        shared = fleet
+    sink = _TaggedSink(log_deque, serial) if tagged else log_deque
+    extra = device_provider.bot_kwargs(serial) if device_provider else {}
+    runners[serial] = make_runner(config, sink, bot_id=serial, serial=serial,
+                                  fleet=shared, device_index=index, **extra)
+    runners[serial].start()
+
+
+def _start_bot():
+    with _control_lock:
+        if _bot_running():
+            return {"error": "Bot is already running"}, 400
+
+        # Check for ADB devices
+        try:
+            serials = _device_serials()
+        except Exception as e:
+            return {"error": f"ADB check failed: {e}"}, 500
+        if not serials:
+            return {"error": "No ADB device connected"}, 400
+
+        config = dict(current_config)
+        log_deque.clear()
+        runners.clear()
+        for index, serial in enumerate(serials):
+            _launch(serial, index, config, len(serials) > 1)
+        return {"ok": True, "devices": serials}, 200
+
+
+def _stop_bot():
+    with _control_lock:
+        scheduled = schedule_settings["enabled"]
+        if scheduled:
+            schedule_settings["enabled"] = False
+            log_deque.append("[schedule] Stopped by hand, schedule off")
+        if not _bot_running():
+            if scheduled:
+                return {"ok": True}, 200
+            return {"error": "Bot is not running"}, 400
+
+        # Signal every bot first so they wind down in parallel
+        for r in runners.values():
+            r.stop_event.set()
+        stuck = [serial for serial, r in runners.items() if not r.stop()]
+        if stuck:
+            return {"error": f"Bot thread did not stop in time: {', '.join(stuck)}"}, 500
+        return {"ok": True}, 200
+
+
+# ── Operating schedule (blocking — run in an executor) ──
+
+def _profile():
+    global yield_profile
+    if yield_profile is None:
+        yield_profile = YieldProfile()
+    return yield_profile
+
+
+def _schedule_tick():
+    """
+    Book the last tick's running time, then start, stop or throttle each
+    device for the hour. Simulated devices (device_provider) don't count
+    towards the yield profile. adb and the runner joins happen outside
+    _control_lock, so Start and Stop don't wait on them; the lock is taken
+    again before launching, and a device Start, Stop or another tick has
+    dealt with meanwhile is left alone.
+    """
+    global _last_tick, _last_refresh
+    with _control_lock:
+        now = time.time()
+        profile = _profile()
+        elapsed = min(now - (_last_tick or now), 2 * SCHEDULE_TICK)
+        _last_tick = now
+        if device_provider is None:
+            running = sum(r.is_alive() for r in runners.values())
+            if running and elapsed:
+                profile.add_running(now, running * elapsed)
+                profile.save()
+        if now - _last_refresh >= SCHEDULE_REFRESH:
+            profile.refresh()
+            _last_refresh = now
+        if not schedule_settings["enabled"]:
+            return
+        state = Schedule(profile, schedule_settings["blackouts"]).state_at(now)
+
+    try:
+        serials = _device_serials()
+    except Exception as e:
+        log_deque.append(f"[schedule] ADB check failed: {e}")
+        return
+    throttle = SCHEDULE_THROTTLE if state == "throttle" else 1.0
+    hour = hour_label(hour_of_week(now))
+
+    changes = []  # (index, serial, runner seen, whether it was running)
+    with _control_lock:
+        if not schedule_settings["enabled"]:
+            return
+        for index, serial in enumerate(serials):
+            r = runners.get(serial)
+            alive = r is not None and r.is_alive()
+            if alive and state != "stop" and r.config.get("throttle", 1.0) == throttle:
+                continue
+            if not alive and state == "stop":
+                continue
+            log_deque.append(f"[schedule] {serial}: {state} from {hour}")
+            if alive:
+                r.stop_event.set()
+            changes.append((index, serial, r, alive))
+
+    # Wind the old bots down in parallel with anything else going on
+    stopped = [not alive or r.stop() for _, _, r, alive in changes]
+    if state == "stop":
+        return
+
+    with _control_lock:
+        if not schedule_settings["enabled"]:
+            return
+        for (index, serial, r, _), ok in zip(changes, stopped):
+            if not ok:
+                continue  # still winding down; tried again next tick
+            current = runners.get(serial)
+            if current is not r or (current is not None and current.is_alive()):
+                continue  # started by hand or by another tick meanwhile
+            _launch(serial, index, dict(current_config, throttle=throttle), len(serials) > 1)
+
+
+def _schedule_status():
+    settings = dict(schedule_settings)
+    profile = _profile()
+    schedule = Schedule(profile, settings["blackouts"])
+    plan = schedule.plan()
+    now = time.time()
+    return {
+        **settings,
+        "state": schedule.state_at(now, plan),
+        "hour": hour_of_week(now),
+        "summary": schedule.describe(plan),
+        "device_hours": round(profile.device_hours(), 1),
+        "hours": [dict(profile.stats(h), label=hour_label(h), plan=plan[h])
+                  for h in range(HOURS_PER_WEEK)],
+    }, 200
+
+
+def _set_schedule(blackouts, enabled):
+    with _control_lock:
+        if blackouts is not None:
+            schedule_settings["blackouts"] = blackouts
+        if enabled is not None:
+            schedule_settings["enabled"] = enabled
+    # Act on the change now rather than at the next tick
+    _schedule_tick()
+    return _schedule_status()
+
+
+async def _schedule_loop():
+    loop = asyncio.get_running_loop()
+    while True:
         try:
-            bot_instance = WhatnotBot(
-                config=dict(current_config),
-                stop_event=stop_event,
-                log_deque=log_deque,
-            )
-            bot_instance.run()
+            await loop.run_in_executor(None, _schedule_tick)
         except Exception as e:
-            log_deque.append(f"SERVER ERROR: {e}")
-        finally:
-            bot_instance = None
+            log_deque.append(f"[schedule] Tick failed: {e}")
+        await asyncio.sleep(SCHEDULE_TICK)
+
+
+async def _in_executor(func, *args):
+    payload, status = await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    return web.json_response(payload, status=status)
+
+
+# ── Pages ──
+
+@routes.get("/")
+async def index(request):
+    return web.FileResponse(os.path.join(TEMPLATE_DIR, "dashboard.html"))
+
+
+# ── API ──
+
+@routes.get("/api/status")
+async def api_status(request):
+    # A snapshot: executor threads add and replace runners
+    devices = {serial: r.stats.as_dict() for serial, r in list(runners.items())}
+    states = {d["state"] for d in devices.values()}
+    return web.json_response({
+        "running": _bot_running(),
+        "giveaways_entered": sum(d["giveaways_entered"] for d in devices.values()),
+        "streams_checked": sum(d["streams_checked"] for d in devices.values()),
+        "state": states.pop() if len(states) == 1 else ("mixed" if states else "idle"),
+        "devices": devices,
+        "fleet": fleet.stats(),
+    })
 
-    bot_thread = threading.Thread(target=run_bot, daemon=True)
-    bot_thread.start()
-    return jsonify({"ok": True})
 
+@routes.post("/api/start")
+async def api_start(request):
+    return await _in_executor(_start_bot)
 
-@app.route("/api/stop", methods=["POST"])
-def api_stop():
-    global bot_thread
-    if bot_thread is None or not bot_thread.is_alive():
-        return jsonify({"error": "Bot is not running"}), 400
 
-    stop_event.set()
-    bot_thread.join(timeout=30)
-    bot_thread = None
-    return jsonify({"ok": True})
+@routes.post("/api/stop")
+async def api_stop(request):
+    return await _in_executor(_stop_bot)
 
 
-@app.route("/api/config")
-def api_get_config():
-    return jsonify(current_config)
+@routes.get("/api/config")
+async def api_get_config(request):
+    return web.json_response(current_config)
 
 
-@app.route("/api/config", methods=["POST"])
-def api_set_config():
-    if bot_thread is not None and bot_thread.is_alive():
-        return jsonify({"error": "Cannot change config while bot is running"}), 400
+@routes.post("/api/config")
+async def api_set_config(request):
+    if _bot_running():
+        return web.json_response(
+            {"error": "Cannot change config while bot is running"}, status=400)
 
-    data = request.get_json(force=True)
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    # Checked first, so a bad experiment leaves the config untouched
+    spec = data.get("experiment") or None
+    try:
+        Experiment.from_config(spec)
+    except (ValueError, TypeError, AttributeError) as e:
+        return web.json_response({"error": f"Bad experiment: {e}"}, status=400)
+    if "experiment" in data:
+        current_config["experiment"] = spec
     # Only update known keys with correct types
-    int_keys = [
-        "max_viewers_pack", "max_viewers_other",
-        "max_wait_pack", "max_wait_other",
-        "ended_checks_pack", "ended_checks_other",
-    ]
-    str_keys = ["mode", "category"]
+    int_keys = limit_keys()
+    str_keys = ["mode", "category", "worker"]
+    bool_keys = ["record", "record_screenshots", "trace", "adaptive_pacing", "opportunities",
+                 "popup_watchers"]
     for k in int_keys:
         if k in data:
             try:
@@ -138,26 +474,126 @@ def api_set_config():
     for k in str_keys:
         if k in data:
             current_config[k] = str(data[k])
+    for k in bool_keys:
+        if k in data:
+            current_config[k] = bool(data[k])
+
+    return web.json_response(current_config)
+
 
-    return jsonify(current_config)
+@routes.get("/api/experiment")
+async def api_experiment(request):
+    """Per-arm results of the latest (or ?name=) experiment."""
+    def _report():
+        return experiment_report(experiment=request.query.get("name")), 200
+    return await _in_executor(_report)
 
 
-@app.route("/api/logs")
-def api_logs():
-    """SSE endpoint — streams log lines from the shared deque."""
-    def generate():
-        idx = 0
+@routes.get("/api/schedule")
+async def api_get_schedule(request):
+    """Settings, the week's plan and the yield of every hour."""
+    return await _in_executor(_schedule_status)
+
+
+@routes.post("/api/schedule")
+async def api_set_schedule(request):
+    """Turn the schedule on or off, set blackout windows; allowed while running."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    blackouts = None
+    if "blackouts" in data:
+        blackouts = [str(b).strip() for b in data["blackouts"] or () if str(b).strip()]
+        try:
+            for b in blackouts:
+                Blackout(b)
+        except ValueError as e:
+            return web.json_response({"error": f"Bad blackout: {e}"}, status=400)
+    enabled = bool(data["enabled"]) if "enabled" in data else None
+    return await _in_executor(_set_schedule, blackouts, enabled)
+
+
+@routes.get("/api/logs")
+async def api_logs(request):
+    """
+    SSE endpoint — streams log lines pushed by the broadcaster. Each
+    frame's data is a JSON array of one or more lines.
+    """
+    resp = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await resp.prepare(request)
+
+    client = broadcaster.subscribe()
+    try:
         while True:
-            while idx < len(log_deque):
-                line = log_deque[idx]
-                yield f"data: {json.dumps(line)}\n\n"
-                idx += 1
-            time.sleep(0.5)
+            try:
+                line = await asyncio.wait_for(client.next(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                await resp.write(b": keepalive\n\n")
+                continue
+            lines = [line] + client.drain(FRAME_MAX_LINES - 1)
+            await resp.write(f"data: {json.dumps(lines)}\n\n".encode())
+    except ConnectionResetError:
+        pass
+    finally:
+        broadcaster.unsubscribe(client)
+    return resp
+
+
+def _search_catalog(params):
+    global catalog
+    if catalog is None:
+        catalog = Catalog()
+    catalog.refresh()
+    try:
+        region = parse_region(params["region"]) if params.get("region") else None
+        limit = int(params.get("limit", 200))
+    except ValueError as e:
+        return {"error": f"Bad query: {e}"}, 400
+    clickable = params.get("clickable")
+    try:
+        results = catalog.search(
+            params.get("q"), text=params.get("text"), desc=params.get("desc"),
+            rid=params.get("rid"), cls=params.get("class"), region=region,
+            clickable=None if clickable is None else clickable in ("1", "true"),
+            screen=params.get("screen"),
+            captures_only=params.get("captures") in ("1", "true"),
+            limit=limit)
+    except sqlite3.OperationalError as e:  # malformed full-text query
+        return {"error": f"Bad query: {e}"}, 400
+    return {"results": results, "count": len(results)}, 200
+
+
+@routes.get("/api/catalog")
+async def api_catalog(request):
+    """
+    Search the discovery capture index, e.g.
+    /api/catalog?q=Enter+Giveaway&region=0,0,1080,400&captures=1
+    """
+    return await _in_executor(_search_catalog, dict(request.query))
+
+
+async def _on_startup(app):
+    await broadcaster.start()
+    app["schedule"] = asyncio.create_task(_schedule_loop())
+
+
+async def _on_cleanup(app):
+    app["schedule"].cancel()
+    await broadcaster.stop()
+
 
-    return Response(generate(), mimetype="text/event-stream",
-                    headers={"Cache-Control": "no-cache",
-                             "X-Accel-Buffering": "no"})
+def create_app():
+    app = web.Application()
+    app.add_routes(routes)
+    app.on_startup.append(_on_startup)
+    app.on_cleanup.append(_on_cleanup)
+    return app
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=False)
+    web.run_app(create_app(), host="0.0.0.0", port=5001)
@@ -0,0 +1,746 @@
+"""
+Offline simulator — runs WhatnotBot.run() in virtual time against a
+synthetic Whatnot app, so a day of strategy behavior takes seconds.
+
+The world has a churning pool of live streams with their own viewer
+curves and giveaway schedules; the device renders the screens the bot
+navigates (home, category feed/grid, filter panel, stream, giveaway
+panel) as uiautomator2-style selectors and hierarchy dumps, and now and
+then the app hiccups (crashes to launcher, half-loaded screens).
+
+Usage:
+    python simulator.py                          # 24h, default config
+    python simulator.py --hours 8 --seed 3
+    python simulator.py --arm mode=normal --arm mode=lowest_viewer
+    python simulator.py --arm max_viewers_pack=40 --arm max_viewers_pack=80,max_wait_pack=600
+    python simulator.py --screen 720x1600       # another resolution
+
+Each --arm is a comma-separated list of config overrides. All arms run
+against the same seeded world, so their numbers are comparable.
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import unquote
+from xml.sax.saxutils import quoteattr
+
+from clock import VirtualClock
+from config import APP_PACKAGE, DEEP_LINKS, DEFAULT_CONFIG
+from launcher import category_slug
+
+# Fixed start (a Monday, local midnight) so runs are reproducible
+SIM_START = time.mktime((2026, 1, 5, 0, 0, 0, 0, 0, -1))
+
+# Screens are laid out for this size; SimDevice(screen=(w, h)) scales
+# them like the app does: by density (w / SCREEN_W), with the top half
+# anchored to the top and the bottom half to the bottom
+SCREEN_W, SCREEN_H = 1080, 2400
+# Feed each DEEP_LINKS target lands on
+LINK_FEEDS = {"category": "foryou", "category_sorted": "sorted",
+              "followed": "followed"}
+
+ShellResponse = namedtuple("ShellResponse", "output exit_code")
+
+# Thermal model (SimDevice(thermal=True)): every action adds a unit of
+# heat that decays with this time constant (s); at HEAT_REF units the
+# app is twice as slow and taps start going stale
+HEAT_DECAY = 120
+HEAT_REF = 25
+
+# Host giveaway styles: (weight, mean gap between giveaways in seconds)
+HOST_STYLES = {
+    "one_shot": (0.35, 3600),
+    "steady": (0.45, 600),
+    "rapid": (0.20, 25),
+}
+
+
+# ── World ──
+
+class SimGiveaway:
+    def __init__(self, kind, start, end):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.entered = False
+
+
+class SimStream:
+    """A live stream whose viewer curve and giveaway schedule are drawn
+    from its own RNG, so they don't depend on when the bot looks."""
+
+    def __init__(self, sid, started, seed, followed):
+        rng = random.Random(seed)
+        self._rng = rng
+        self.sid = sid
+        self.name = f"host_{sid:04d}"
+        self.started = started
+        self.ends = started + rng.uniform(1.0, 4.0) * 3600
+        self.followed = followed
+        self.base_viewers = max(1.0, rng.lognormvariate(2.8, 1.0))
+        self._phase = rng.uniform(0, 2 * math.pi)
+        self.pack_share = rng.random()
+        styles = list(HOST_STYLES)
+        self.style = rng.choices(
+            styles, weights=[HOST_STYLES[s][0] for s in styles])[0]
+        self.giveaways = []
+        self._next_at = started + rng.uniform(60, 1800)
+
+    def _gap(self):
+        mean = HOST_STYLES[self.style][1]
+        if self.style == "rapid" and self._rng.random() < 0.2:
+            mean = 900
+        return self._rng.expovariate(1.0 / mean)
+
+    def sync(self, now):
+        while self._next_at <= now and self._next_at < self.ends:
+            kind = "pack" if self._rng.random() < self.pack_share else "other"
+            lo, hi = (120, 900) if kind == "pack" else (60, 600)
+            start = self._next_at
+            end = start + self._rng.uniform(lo, hi)
+            self.giveaways.append(SimGiveaway(kind, start, end))
+            self._next_at = end + self._gap()
+        # Old giveaways are never looked at again
+        while len(self.giveaways) > 3 and self.giveaways[0].end < now - 3600:
+            self.giveaways.pop(0)
+
+    def active_giveaway(self, now):
+        self.sync(now)
+        for gw in reversed(self.giveaways):
+            if gw.start <= now < gw.end:
+                return gw
+        return None
+
+    def viewers(self, now):
+        wave = 1 + 0.3 * math.sin((now - self.started) / 900 + self._phase)
+        return max(1, int(self.base_viewers * wave))
+
+
+class SimWorld:
+    """Pool of live streams with a seeded arrival process."""
+
+    def __init__(self, clock, seed=0, size=120, followed_share=0.15,
+                 category=DEFAULT_CONFIG["category"]):
+        self.clock = clock
+        self.seed = seed
+        self.category = category
+        self.followed_share = followed_share
+        self._arrivals = random.Random(seed)
+        # Mean stream length is 2.5h; pick the arrival rate that keeps
+        # roughly `size` streams live
+        self._rate = size / (2.5 * 3600)
+        self._next_sid = 0
+        self._streams = []
+        for _ in range(size):
+            self._spawn(clock.time() - self._arrivals.uniform(0, 3 * 3600))
+        self._next_arrival = clock.time() + self._arrivals.expovariate(self._rate)
+        self.entries = []
+
+    def _spawn(self, started):
+        sid = self._next_sid
+        self._next_sid += 1
+        followed = self._arrivals.random() < self.followed_share
+        self._streams.append(
+            SimStream(sid, started, self.seed * 100003 + sid, followed))
+
+    def live(self):
+        now = self.clock.time()
+        while self._next_arrival <= now:
+            self._spawn(self._next_arrival)
+            self._next_arrival += self._arrivals.expovariate(self._rate)
+        self._streams = [s for s in self._streams if s.ends > now]
+        return [s for s in self._streams if s.started <= now]
+
+    def feed(self, kind):
+        now = self.clock.time()
+        streams = self.live()
+        if kind == "sorted":
+            return sorted(streams, key=lambda s: s.viewers(now))
+        if kind == "followed":
+            streams = [s for s in streams if s.followed]
+        elif kind == "foryou":
+            return sorted(streams, key=lambda s: -s.viewers(now))
+        return sorted(streams, key=lambda s: -s.started)
+
+    def find(self, name):
+        """The live stream of host `name`, or None."""
+        return next((s for s in self.live() if s.name == name), None)
+
+    def record_entry(self, stream, gw):
+        gw.entered = True
+        viewers = stream.viewers(self.clock.time())
+        self.entries.append((self.clock.time(), stream.name, gw.kind, viewers))
+
+
+# ── Device ──
+
+class SimNode:
+    __slots__ = ("text", "desc", "rid", "bounds", "action")
+
+    def __init__(self, bounds, text="", desc="", rid="", action=None):
+        self.text = text
+        self.desc = desc
+        self.rid = rid
+        self.bounds = bounds
+        self.action = action
+
+    def info(self):
+        left, top, right, bottom = self.bounds
+        return {
+            "text": self.text,
+            "contentDescription": self.desc,
+            "resourceName": self.rid,
+            "clickable": self.action is not None,
+            "bounds": {"left": left, "top": top, "right": right, "bottom": bottom},
+        }
+
+
+def format_viewers(count):
+    return f"{count / 1000:.1f}K" if count >= 1000 else str(count)
+
+
+class SimSelector:
+    def __init__(self, device, selector, index=None):
+        self._d = device
+        self._selector = selector
+        self._index = index
+
+    def _matches(self):
+        nodes = self._d.nodes()
+        for key, value in self._selector.items():
+            if key == "text":
+                nodes = [n for n in nodes if n.text == value]
+            elif key == "textContains":
+                nodes = [n for n in nodes if value in n.text]
+            elif key == "description":
+                nodes = [n for n in nodes if n.desc == value]
+            elif key == "resourceId":
+                nodes = [n for n in nodes if n.rid == value]
+            else:
+                raise ValueError(f"Unsupported selector: {key}")
+        if self._index is not None:
+            return nodes[self._index:self._index + 1]
+        return nodes
+
+    @property
+    def exists(self):
+        self._d.rpc()
+        return bool(self._matches())
+
+    @property
+    def count(self):
+        self._d.rpc()
+        return len(self._matches())
+
+    @property
+    def info(self):
+        self._d.rpc()
+        nodes = self._matches()
+        if not nodes:
+            raise LookupError(f"No element matches {self._selector}")
+        return nodes[0].info()
+
+    def wait(self, timeout=None):
+        if self.exists:
+            return True
+        self._d.clock.sleep(timeout or 0)
+        return self.exists
+
+    def click(self):
+        self._d.rpc()
+        nodes = self._matches()
+        if not nodes:
+            raise LookupError(f"No element matches {self._selector}")
+        if self._d.thermal and self._d.rng.random() < 0.05 * (self._d.lag() - 1.0):
+            # The app redrew between the probe and the tap; it lands on nothing
+            self._d.stale_taps += 1
+            return
+        self._d.tap(nodes[0])
+
+    def __getitem__(self, index):
+        return SimSelector(self._d, self._selector, index=index)
+
+
+class SimDevice:
+    """Renders the simulated app as uiautomator2-style screens."""
+
+    def __init__(self, world, seed=0, crash_rate=0.0005, lag_rate=0.03,
+                 swipe_fail_rate=0.02, deep_links=True, thermal=False,
+                 screen=(SCREEN_W, SCREEN_H)):
+        self.world = world
+        self.clock = world.clock
+        self.rng = random.Random(seed + 7919)
+        self.crash_rate = crash_rate
+        self.lag_rate = lag_rate
+        self.swipe_fail_rate = swipe_fail_rate
+        # deep_links=False models an app build that ignores VIEW intents
+        self.links = {}
+        self.host_link = None
+        if deep_links:
+            slug = category_slug(world.category)
+            self.links = {DEEP_LINKS[t].format(slug=slug): feed
+                          for t, feed in LINK_FEEDS.items() if DEEP_LINKS.get(t)}
+            if DEEP_LINKS.get("host"):
+                self.host_link = DEEP_LINKS["host"].split("{name}")[0]
+        # thermal=True models a phone that slows down when driven hard
+        self.thermal = thermal
+        self.heat = 0.0
+        self._heat_at = self.clock.time()
+        self.screen = {"name": "home"}
+        self.actions = 0
+        self.crashes = 0
+        self.stale_taps = 0
+        self.width, self.height = screen
+        self.density = self.width / SCREEN_W
+        self.info = {"productName": "SimPhone", "displayWidth": self.width,
+                     "displayHeight": self.height}
+
+    # ── Plumbing ──
+
+    def rpc(self, cost=(0.05, 0.15)):
+        self.clock.advance(self.rng.uniform(*cost))
+
+    def _warm(self, amount):
+        now = self.clock.time()
+        self.heat = self.heat * math.exp(-(now - self._heat_at) / HEAT_DECAY) + amount
+        self._heat_at = now
+
+    def lag(self):
+        """Slowdown factor of the app (1.0 when cool)."""
+        if not self.thermal:
+            return 1.0
+        self._warm(0.0)
+        return 1.0 + (self.heat / HEAT_REF) ** 2
+
+    def _act(self):
+        self.actions += 1
+        if self.thermal:
+            self._warm(1.0)
+        self.rpc((0.08, 0.2))
+        if self.rng.random() < self.crash_rate:
+            self.crashes += 1
+            self.screen = {"name": "launcher"}
+            return False
+        return True
+
+    def __call__(self, **selector):
+        return SimSelector(self, selector)
+
+    def window_size(self):
+        return self.width, self.height
+
+    # ── Screens ──
+
+    def _place(self, bounds):
+        """Reference-layout bounds on this device's screen."""
+        s = self.density
+        left, top, right, bottom = bounds
+        if top < SCREEN_H // 2:
+            y = [round(v * s) for v in (top, bottom)]
+        else:
+            y = [self.height - round((SCREEN_H - v) * s) for v in (top, bottom)]
+        return (round(left * s), y[0], round(right * s), y[1])
+
+    def nodes(self):
+        nodes = self._screen_nodes()
+        if (self.width, self.height) != (SCREEN_W, SCREEN_H):
+            for n in nodes:
+                n.bounds = self._place(n.bounds)
+        return nodes
+
+    def _screen_nodes(self):
+        name = self.screen["name"]
+        if name == "home":
+            return self._home_nodes()
+        if name == "category":
+            return self._category_nodes()
+        if name == "filter":
+            return self._filter_nodes()
+        if name == "stream":
+            return self._stream_nodes()
+        if name == "search":
+            return self._search_nodes()
+        if name == "profile":
+            return self._profile_nodes()
+        return []
+
+    def _nav(self):
+        return [SimNode((0, 2250, 216, 2400), text="Home", desc="Home",
+                        rid="Home", action=self._go_home)]
+
+    def _home_nodes(self):
+        return self._nav() + [
+            SimNode((40, 150, 1040, 230), desc="Search",
+                    action=lambda: self._set_screen(name="search", query="")),
+            SimNode((40, 300, 400, 380), text=self.world.category,
+                    action=lambda: self._open_category("foryou")),
+            SimNode((420, 300, 800, 380), text="Followed Hosts",
+                    action=lambda: self._open_category("followed")),
+        ]
+
+    def _category_nodes(self):
+        scr = self.screen
+        nodes = self._nav() + [
+            SimNode((40, 300, 480, 380), text="New And Noteworthy",
+                    action=lambda: self._open_category("nn")),
+            SimNode((960, 300, 1060, 380), desc="Filter", action=self._open_filter),
+        ]
+        feed = self.world.feed(scr["feed"])
+        now = self.clock.time()
+        visible = feed[scr["offset"]:scr["offset"] + 6]
+        for j, stream in enumerate(visible):
+            left = 20 + (j % 2) * 540
+            top = 420 + (j // 2) * 620
+            nodes.append(SimNode((left, top, left + 500, top + 500),
+                                 rid="show_item_thumbnail",
+                                 action=lambda s=stream: self._open_stream(s, None)))
+            nodes.append(SimNode((left + 10, top + 10, left + 200, top + 60),
+                                 text=f"Live · {format_viewers(stream.viewers(now))}"))
+            nodes.append(SimNode((left, top + 510, left + 500, top + 560),
+                                 text=stream.name))
+        return nodes
+
+    def _search_nodes(self):
+        query = self.screen["query"].lower()
+        nodes = self._nav() + [SimNode((40, 150, 1040, 230), text=self.screen["query"],
+                                       rid="search_input")]
+        if query:
+            hits = [s for s in self.world.live() if query in s.name.lower()][:5]
+            for i, stream in enumerate(hits):
+                top = 300 + i * 120
+                nodes.append(SimNode((40, top, 1040, top + 100), text=stream.name,
+                                     action=lambda n=stream.name: self._open_profile(n)))
+        return nodes
+
+    def _profile_nodes(self):
+        name = self.screen["host"]
+        nodes = self._nav() + [SimNode((40, 300, 1040, 380), text=name)]
+        stream = self.world.find(name)
+        if stream is not None:
+            viewers = format_viewers(stream.viewers(self.clock.time()))
+            nodes.append(SimNode((40, 420, 540, 920), text=f"Live · {viewers}",
+                                 action=lambda: self._open_stream(stream, None)))
+        return nodes
+
+    def _filter_nodes(self):
+        return [
+            SimNode((60, 900, 140, 960), action=self._select_sort),
+            SimNode((160, 900, 700, 960), text="Viewers: low to high"),
+            SimNode((40, 2150, 1040, 2260), text="Apply", action=self._apply_filter),
+        ]
+
+    def _stream_nodes(self):
+        scr = self.screen
+        stream = scr["stream"]
+        now = self.clock.time()
+        if stream.ends <= now:
+            # Stream ended under us — the app drops back to the feed
+            self._back_to_category()
+            return self._screen_nodes()
+        nodes = [
+            SimNode((30, 120, 180, 200), desc=stream.name),
+            SimNode((960, 120, 1060, 200), desc="Leave", action=self._leave),
+        ]
+        if self.rng.random() >= self.lag_rate * self.lag():
+            nodes.append(SimNode((820, 130, 900, 180),
+                                 text=format_viewers(stream.viewers(now))))
+        gw = stream.active_giveaway(now)
+        if gw:
+            nodes.append(SimNode((880, 900, 1060, 960), text="Giveaway",
+                                 action=self._open_panel))
+        if scr.get("panel"):
+            if not gw:
+                scr["panel"] = False
+            else:
+                title = "Pokemon Pack Giveaway" if gw.kind == "pack" else "Giveaway"
+                nodes.append(SimNode((40, 320, 900, 380), text=title))
+                nodes.append(SimNode((960, 300, 1060, 380), desc="Close",
+                                     action=self._close_panel))
+                if gw.entered:
+                    nodes.append(SimNode((40, 2100, 1040, 2220), text="You're entered"))
+                else:
+                    label = ("Enter Giveaway" if stream.followed
+                             else "Follow Host & Enter Giveaway")
+                    nodes.append(SimNode((40, 2100, 1040, 2220), text=label,
+                                         action=lambda: self._enter(stream, gw)))
+        return nodes
+
+    # ── Actions ──
+
+    def _go_home(self):
+        self.screen = {"name": "home"}
+
+    def _open_category(self, feed):
+        self.screen = {"name": "category", "feed": feed, "offset": 0,
+                       "sort_selected": False}
+        self.clock.sleep(self.rng.uniform(0.5, 2.0))
+
+    def _set_screen(self, **screen):
+        self.screen = screen
+
+    def _open_profile(self, name):
+        self.screen = {"name": "profile", "host": name}
+        self.clock.sleep(self.rng.uniform(0.5, 1.5))
+
+    def _open_filter(self):
+        self.screen = dict(self.screen, name="filter")
+
+    def _select_sort(self):
+        self.screen["sort_selected"] = True
+
+    def _apply_filter(self):
+        feed = "sorted" if self.screen["sort_selected"] else self.screen["feed"]
+        self.screen = {"name": "category", "feed": feed, "offset": 0,
+                       "sort_selected": False}
+
+    def _open_stream(self, stream, feed):
+        parent = dict(self.screen)
+        self.screen = {"name": "stream", "stream": stream, "parent": parent,
+                       "feed": feed, "panel": False}
+        if feed is None:
+            # Opened from the feed pages: swiping moves through that feed
+            self.screen["feed"] = self.world.feed(parent.get("feed", "nn"))
+
+    def _back_to_category(self):
+        self.screen = self.screen.get("parent") or {"name": "home"}
+
+    def _leave(self):
+        self._back_to_category()
+
+    def _open_panel(self):
+        self.screen["panel"] = True
+
+    def _close_panel(self):
+        self.screen["panel"] = False
+
+    def _enter(self, stream, gw):
+        self.world.record_entry(stream, gw)
+        self.screen["panel"] = False
+
+    def tap(self, node):
+        if not self._act():
+            return
+        if node.action:
+            node.action()
+
+    # ── uiautomator2 device API ──
+
+    def dump_hierarchy(self, *args, **kwargs):
+        nodes = self.nodes()
+        lag = self.lag()
+        self.rpc((0.3 * lag, (0.3 + 0.004 * len(nodes)) * lag))
+        parts = ["<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>",
+                 '<hierarchy rotation="0">',
+                 f'<node index="0" text="" resource-id="" class="android.widget.FrameLayout" '
+                 f'package="{APP_PACKAGE}" content-desc="" clickable="false" '
+                 f'bounds="[0,0][{self.width},{self.height}]">']
+        for i, n in enumerate(nodes):
+            left, top, right, bottom = n.bounds
+            parts.append(
+                f'<node index="{i}" text={quoteattr(n.text)} '
+                f'resource-id={quoteattr(n.rid)} class="android.view.View" '
+                f'package="{APP_PACKAGE}" content-desc={quoteattr(n.desc)} '
+                f'clickable="{"true" if n.action else "false"}" '
+                f'bounds="[{left},{top}][{right},{bottom}]" />')
+        parts.append("</node></hierarchy>")
+        return "".join(parts)
+
+    def click(self, x, y):
+        if not self._act():
+            return
+        for node in reversed(self.nodes()):
+            left, top, right, bottom = node.bounds
+            if node.action and left <= x <= right and top <= y <= bottom:
+                node.action()
+                return
+
+    def swipe(self, fx, fy, tx, ty, duration=None, **kwargs):
+        self.clock.sleep(duration or 0.3)
+        if not self._act() or self.rng.random() < self.swipe_fail_rate:
+            return
+        if fy - ty < 300 * self.density or not 0 <= ty < fy <= self.height:
+            return  # too short, or starts off screen
+        scr = self.screen
+        if scr["name"] == "stream" and not scr.get("panel"):
+            feed = scr["feed"]
+            idx = next((i for i, s in enumerate(feed) if s is scr["stream"]), -1)
+            if idx + 1 < len(feed):
+                scr["stream"] = feed[idx + 1]
+        elif scr["name"] == "category":
+            total = len(self.world.feed(scr["feed"]))
+            scr["offset"] = min(scr["offset"] + 4, max(total - 2, 0))
+
+    def press(self, key):
+        if not self._act():
+            return
+        name = self.screen["name"]
+        if key == "home":
+            self.screen = {"name": "launcher"}
+        elif key == "back":
+            if name == "stream" and self.screen.get("panel"):
+                self.screen["panel"] = False
+            elif name == "stream":
+                self._back_to_category()
+            elif name == "filter":
+                self.screen = dict(self.screen, name="category")
+            elif name in ("category", "search", "profile"):
+                self.screen = {"name": "home"}
+            elif name == "home":
+                self.screen = {"name": "launcher"}
+
+    def app_start(self, package, *args, **kwargs):
+        self.actions += 1
+        self.clock.sleep(self.rng.uniform(2.0, 4.0))
+        if package == APP_PACKAGE and self.screen["name"] == "launcher":
+            self.screen = {"name": "home"}
+
+    def open_url(self, url):
+        self.actions += 1
+        self.clock.sleep(self.rng.uniform(1.0, 2.5))
+        feed = self.links.get(url)
+        if feed is not None:
+            self._open_category(feed)
+        elif self.host_link and url.startswith(self.host_link):
+            self._open_profile(unquote(url[len(self.host_link):]))
+
+    def shell(self, cmd, *args, **kwargs):
+        """
+        Just enough of `am start -a VIEW -d URI` for the deep-link
+        launcher, and of thermalservice/loadavg for the governor.
+        """
+        if isinstance(cmd, str):
+            cmd = cmd.split()
+        if cmd[:2] == ["dumpsys", "thermalservice"]:
+            self.rpc((0.2, 0.4))
+            lag = self.lag()
+            status = 0 if lag < 1.5 else 1 if lag < 2.0 else 2 if lag < 3.0 else 3
+            return ShellResponse(
+                f"Thermal Status: {status}\nCurrent temperatures from HAL:\n"
+                f"\tTemperature{{mValue={38 + 12 * (lag - 1):.1f}, mType=0, "
+                f"mName=cpu0, mStatus={status}}}\n", 0)
+        if cmd[:2] == ["cat", "/proc/loadavg;"]:
+            self.rpc()
+            return ShellResponse(f"{2.0 * self.lag():.2f} 1.80 1.60 2/900 4242\n8\n", 0)
+        if cmd[:2] != ["am", "start"] or "-d" not in cmd:
+            self.rpc()
+            return ShellResponse("", 0)
+        self.open_url(cmd[cmd.index("-d") + 1])
+        return ShellResponse("Status: ok\n", 0)
+
+    def send_keys(self, text, clear=False):
+        self.rpc()
+        if self.screen["name"] == "search":
+            self.screen["query"] = text if clear else self.screen["query"] + text
+
+    def screenshot(self, *args, **kwargs):
+        self.rpc((0.2, 0.5))
+        return None
+
+
+# ── Runner ──
+
+def run_simulation(config=None, hours=24.0, seed=0, world_opts=None,
+                   device_opts=None, verbose=False):
+    """Run one bot session in virtual time. Returns a results dict."""
+    from bot import WhatnotBot, log
+    from ocr import ViewerOCR
+
+    clock = VirtualClock(start=SIM_START)
+    world = SimWorld(clock, seed=seed, **(world_opts or {}))
+    device = SimDevice(world, seed=seed, **(device_opts or {}))
+    stop_event = threading.Event()
+    deadline = SIM_START + hours * 3600
+
+    def check_deadline(now):
+        if now >= deadline:
+            stop_event.set()
+
+    clock.on_advance(check_deadline)
+
+    level = log.level
+    if not verbose:
+        log.setLevel(logging.WARNING)
+    wall_start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            bot = WhatnotBot(config=config, stop_event=stop_event, device=device,
+                             clock=clock, rng=random.Random(seed + 1),
+                             log_file=os.path.join(tmp, "giveaway_log.csv"))
+            if bot.ocr is not None:
+                # The shared OCR counts harvest attempts per process;
+                # a fresh one keeps every arm starting from the same state
+                bot.ocr = ViewerOCR()
+            bot.run()
+    finally:
+        log.setLevel(level)
+
+    sim_hours = (clock.time() - SIM_START) / 3600
+    entries = world.entries
+    return {
+        "hours": sim_hours,
+        "wall_seconds": time.perf_counter() - wall_start,
+        "entries": len(entries),
+        "entries_per_hour": len(entries) / sim_hours if sim_hours else 0.0,
+        "pack_entries": sum(1 for e in entries if e[2] == "pack"),
+        "expected_wins": sum(1.0 / max(e[3], 1) for e in entries),
+        "streams_checked": bot.streams_checked,
+        "actions": device.actions,
+        "crashes": device.crashes,
+        "stale_taps": device.stale_taps,
+    }
+
+
+def _parse_arm(text):
+    overrides = {}
+    for pair in filter(None, text.split(",")):
+        key, _, value = pair.partition("=")
+        key = key.strip()
+        if key not in DEFAULT_CONFIG:
+            raise SystemExit(f"Unknown config key: {key}")
+        default = DEFAULT_CONFIG[key]
+        if isinstance(default, bool):
+            overrides[key] = value.strip().lower() in ("1", "true", "yes")
+        elif isinstance(default, int):
+            overrides[key] = int(value)
+        else:
+            overrides[key] = value.strip()
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--arm", action="append", default=[],
+                        help="comma-separated config overrides, e.g. mode=lowest_viewer")
+    parser.add_argument("--thermal", action="store_true",
+                        help="phone slows down and taps go stale when driven hard")
+    parser.add_argument("--screen", default=f"{SCREEN_W}x{SCREEN_H}",
+                        help="device resolution, e.g. 720x1600")
+    parser.add_argument("--verbose", action="store_true", help="show bot log output")
+    args = parser.parse_args()
+
+    arms = args.arm or [""]
+    screen = tuple(int(v) for v in args.screen.lower().split("x"))
+    print(f"{'arm':<40} {'entries':>8} {'/hour':>7} {'pack':>5} "
+          f"{'E[wins]':>8} {'streams':>8} {'crashes':>8} {'stale':>6} {'wall':>7}")
+    for arm in arms:
+        config = _parse_arm(arm)
+        r = run_simulation(config, hours=args.hours, seed=args.seed,
+                           device_opts={"thermal": args.thermal, "screen": screen},
+                           verbose=args.verbose)
+        print(f"{arm or 'default':<40} {r['entries']:>8} "
+              f"{r['entries_per_hour']:>7.2f} {r['pack_entries']:>5} "
+              f"{r['expected_wins']:>8.2f} {r['streams_checked']:>8} "
+              f"{r['crashes']:>8} {r['stale_taps']:>6} {r['wall_seconds']:>6.1f}s")
+
+
+if __name__ == "__main__":
+    main()
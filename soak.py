@@ -0,0 +1,226 @@
+"""
+Soak benchmark — start/stop the bot through the server API over and
+over against simulated devices, and fail if anything keeps growing.
+
+Each cycle starts the bot via POST /api/start, streams logs over
+/api/logs for a moment, lets the bot run for --hours of virtual time
+and stops it via POST /api/stop. After every cycle it samples:
+
+    memory    tracemalloc current size (MiB)
+    threads   threading.active_count()
+    fds       open file descriptors (/proc/self/fd)
+    handlers  handlers attached to all loggers
+    sinks     log pipeline sinks still attached
+    clients   SSE clients still registered with the broadcaster
+
+The first --warmup cycles are ignored (caches, executor threads and
+the like fill up there). After that, the last third of the samples may
+not exceed the first third: counts must not rise at all, memory may
+rise by at most max(1 MiB, 5%). On failure the biggest tracemalloc
+growth sites are printed.
+
+Bots run in thread mode so every resource they hold is visible in this
+process.
+
+Usage:
+    python soak.py                                # 30 cycles x 4 virtual hours
+    python soak.py --cycles 100 --hours 12 --devices 2
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import server
+from clock import VirtualClock
+from logpipe import get_pipeline
+from simulator import SIM_START, SimDevice, SimWorld
+
+METRICS = ("memory", "threads", "fds", "handlers", "sinks", "clients")
+# Memory may grow this much between the first and last third
+MEMORY_SLACK_MIB = 1.0
+MEMORY_SLACK_RATIO = 0.05
+
+
+class SimProvider:
+    """Fresh simulated world/device per bot start (see server.device_provider)."""
+
+    def __init__(self, devices, seed, log_dir):
+        self.devices = devices
+        self.seed = seed
+        self.log_dir = log_dir
+        self.clocks = {}
+        self.starts = 0
+
+    def serials(self):
+        return [f"sim-{i}" for i in range(self.devices)]
+
+    def bot_kwargs(self, serial):
+        self.starts += 1
+        seed = self.seed + self.starts
+        clock = VirtualClock(start=SIM_START)
+        world = SimWorld(clock, seed=seed)
+        self.clocks[serial] = clock
+        return {
+            "device": SimDevice(world, seed=seed),
+            "clock": clock,
+            "rng": random.Random(seed),
+            "log_file": os.path.join(self.log_dir, f"{serial}.csv"),
+        }
+
+    def virtual_hours(self):
+        """Hours the slowest bot has run since its start."""
+        if not self.clocks:
+            return 0.0
+        return min(c.time() - SIM_START for c in self.clocks.values()) / 3600
+
+
+def _fd_count():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:  # not Linux
+        return 0
+
+
+def _handler_count():
+    loggers = [logging.getLogger()] + [
+        l for l in logging.Logger.manager.loggerDict.values()
+        if isinstance(l, logging.Logger)]
+    return sum(len(l.handlers) for l in loggers)
+
+
+def sample():
+    gc.collect()
+    return {
+        "memory": tracemalloc.get_traced_memory()[0] / 2 ** 20,
+        "threads": threading.active_count(),
+        "fds": _fd_count(),
+        "handlers": _handler_count(),
+        "sinks": get_pipeline().sink_count(),
+        "clients": len(server.broadcaster.clients),
+    }
+
+
+def find_growth(samples, warmup):
+    """Metrics whose last third exceeds their first third (after warmup)."""
+    steady = samples[warmup:]
+    third = len(steady) // 3
+    if third == 0:
+        return {}
+    grown = {}
+    for m in METRICS:
+        first = [s[m] for s in steady[:third]]
+        last = [s[m] for s in steady[-third:]]
+        if m == "memory":
+            before, after = sum(first) / third, sum(last) / third
+            limit = before + max(MEMORY_SLACK_MIB, before * MEMORY_SLACK_RATIO)
+        else:
+            before, after = max(first), min(last)
+            limit = before
+        if after > limit:
+            grown[m] = (before, after)
+    return grown
+
+
+async def _read_some_logs(client, lines=5, timeout=2.0):
+    """Open an SSE connection, read a few lines, hang up."""
+    resp = await client.get("/api/logs")
+    got = 0
+    try:
+        while got < lines:
+            line = await asyncio.wait_for(resp.content.readline(), timeout)
+            if not line:
+                break
+            if line.startswith(b"data:"):
+                got += len(json.loads(line[5:]))
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        resp.close()
+    return got
+
+
+async def soak(cycles, hours, devices, warmup, seed, verbose):
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SimProvider(devices, seed, tmp)
+        server.device_provider = provider
+        async with TestClient(TestServer(server.create_app())) as client:
+            resp = await client.post("/api/config", json={"worker": "thread"})
+            assert resp.status == 200, await resp.text()
+
+            samples = []
+            baseline = None
+            t0 = time.perf_counter()
+            for cycle in range(cycles):
+                resp = await client.post("/api/start")
+                if resp.status != 200:
+                    raise SystemExit(f"cycle {cycle}: start failed: {await resp.text()}")
+                await _read_some_logs(client)
+                while provider.virtual_hours() < hours and server._bot_running():
+                    await asyncio.sleep(0.01)
+                resp = await client.post("/api/stop")
+                if resp.status not in (200, 400):  # 400: bot had already exited
+                    raise SystemExit(f"cycle {cycle}: stop failed: {await resp.text()}")
+                await asyncio.sleep(0.05)  # let closed SSE handlers unwind
+
+                s = sample()
+                samples.append(s)
+                if cycle + 1 == warmup:
+                    baseline = tracemalloc.take_snapshot()
+                if verbose or cycle % 5 == 0 or cycle == cycles - 1:
+                    print(f"{cycle:>5} {provider.virtual_hours():>6.1f}h "
+                          + " ".join(f"{s[m]:>9.2f}" if m == "memory" else f"{s[m]:>9}"
+                                     for m in METRICS))
+            wall = time.perf_counter() - t0
+        server.device_provider = None
+
+    virtual = cycles * hours
+    print(f"\n{cycles} cycles, ~{virtual:.0f} virtual hours on {devices} device(s) "
+          f"in {wall:.1f}s")
+    grown = find_growth(samples, warmup)
+    if not grown:
+        print("OK: no unbounded growth")
+        return True
+    for m, (before, after) in grown.items():
+        print(f"FAIL: {m} grew from {before:.2f} to {after:.2f}")
+    if baseline is not None and "memory" in grown:
+        print("\nTop allocation growth since warmup:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:10]:
+            print(f"  {stat}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cycles", type=int, default=30)
+    parser.add_argument("--hours", type=float, default=4.0,
+                        help="virtual hours per start/stop cycle")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="print every cycle")
+    args = parser.parse_args()
+
+    # Bot lines still reach the log buffer and SSE clients, just not the console
+    get_pipeline(console=False)
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+    tracemalloc.start()
+    print(f"{'cycle':>5} {'virt':>7} " + " ".join(f"{m:>9}" for m in METRICS))
+    ok = asyncio.run(soak(args.cycles, args.hours, args.devices, args.warmup,
+                          args.seed, args.verbose))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Span tracing of where a run's wall-clock time goes.
+
+Three kinds of span are recorded:
+    stage   bot steps (go_home, find_giveaway_stream, ...) via @traced
+    rpc     every device call, via TracingDevice
+    sleep   every clock.sleep(), via TracingClock
+
+Each stage also accumulates the rpc and sleep time spent directly inside
+it, so the summary can split it into sleeping / RPC / CPU (the rest:
+local parsing, logging, Python). Spans are timed with the bot's clock,
+so simulator runs trace in virtual time.
+
+Traces are written in Chrome trace-event format — open them in
+chrome://tracing or https://ui.perfetto.dev.
+
+When tracing is off the bot uses NULL_TRACER and no wrappers at all;
+the only cost left is one attribute check per stage call.
+"""
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+TRACE_DIR = os.path.join(os.path.dirname(__file__), "traces")
+# Oldest spans are dropped beyond this, so week-long runs stay bounded
+TRACE_MAX_EVENTS = 500_000
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start", "rpc", "sleep", "child")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.rpc = self.sleep = self.child = 0.0
+
+    def __enter__(self):
+        self.start = self.tracer.clock()
+        if self.cat == "stage":
+            self.tracer._stack().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._finish(self, self.tracer.clock())
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, clock=time.time, name="bot", max_events=TRACE_MAX_EVENTS):
+        self.enabled = True
+        self.clock = clock
+        self.name = name
+        self.events = collections.deque(maxlen=max_events)
+        self.started = clock()
+        self._local = threading.local()
+        self._threads = {}
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._threads[threading.get_ident()] = threading.current_thread().name
+        return stack
+
+    def span(self, name, cat="stage", **args):
+        return _Span(self, name, cat, args)
+
+    def _finish(self, span, end):
+        dur = end - span.start
+        stack = self._stack()
+        if span.cat == "stage":
+            stack.pop()
+            span.args = dict(span.args, rpc=round(span.rpc, 6),
+                             sleep=round(span.sleep, 6),
+                             cpu=round(max(0.0, dur - span.rpc - span.sleep - span.child), 6))
+        if stack:
+            parent = stack[-1]
+            if span.cat == "rpc":
+                parent.rpc += dur
+            elif span.cat == "sleep":
+                parent.sleep += dur
+            else:
+                parent.child += dur
+        self.events.append((span.name, span.cat, span.start, dur,
+                            threading.get_ident(), span.args))
+
+    # ── Export ──
+
+    def to_chrome(self):
+        """Trace-event JSON object (complete 'X' events, microseconds)."""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid,
+                   "args": {"name": self.name}}]
+        for tid, thread_name in self._threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid,
+                           "tid": tid, "args": {"name": thread_name}})
+        for name, cat, start, dur, tid, args in list(self.events):
+            event = {"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": round((start - self.started) * 1e6, 1),
+                     "dur": round(dur * 1e6, 1)}
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path=None):
+        """Write the trace to `path` (default: traces/NAME_TS.json)."""
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            path = os.path.join(TRACE_DIR, f"{self.name}_{int(time.time())}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(), f, default=str)
+        return path
+
+    def summary(self):
+        """Seconds per category over the traced wall time, plus per-stage totals."""
+        wall = max(self.clock() - self.started, 1e-9)
+        totals = {"sleep": 0.0, "rpc": 0.0}
+        stages = {}
+        for name, cat, _, dur, _, args in self.events:
+            if cat in totals:
+                totals[cat] += dur
+            elif cat == "stage":
+                s = stages.setdefault(name, {"calls": 0, "total": 0.0, "sleep": 0.0,
+                                             "rpc": 0.0, "cpu": 0.0})
+                s["calls"] += 1
+                s["total"] += dur
+                s["sleep"] += args["sleep"]
+                s["rpc"] += args["rpc"]
+                s["cpu"] += args["cpu"]
+        totals["cpu"] = max(0.0, wall - totals["sleep"] - totals["rpc"])
+        return {"wall": wall, "categories": totals, "stages": stages}
+
+    def format_summary(self):
+        """Summary as printable lines."""
+        s = self.summary()
+        wall = s["wall"]
+        lines = [f"Trace summary: {wall:.1f}s wall, {len(self.events)} spans"]
+        for cat, label in (("sleep", "sleeping"), ("rpc", "device RPC"), ("cpu", "CPU/other")):
+            secs = s["categories"][cat]
+            lines.append(f"  {label:<12} {secs:9.1f}s  {100 * secs / wall:5.1f}%")
+        if s["stages"]:
+            lines.append(f"  {'stage':<28} {'calls':>5} {'total':>9} {'sleep':>9} "
+                         f"{'rpc':>9} {'cpu':>9}")
+            for name, st in sorted(s["stages"].items(), key=lambda kv: -kv[1]["total"]):
+                lines.append(f"  {name:<28} {st['calls']:>5} {st['total']:>8.1f}s "
+                             f"{st['sleep']:>8.1f}s {st['rpc']:>8.1f}s {st['cpu']:>8.2f}s")
+        return lines
+
+
+class _NullTracer:
+    enabled = False
+    events = ()
+
+    def span(self, name, cat="stage", **args):
+        return _NULL_SPAN
+
+
+NULL_TRACER = _NullTracer()
+
+
+def traced(method):
+    """Trace a WhatnotBot method as a stage span (uses self.tracer)."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.tracer.enabled:
+            return method(self, *args, **kwargs)
+        with self.tracer.span(name):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# ── Wrappers ──
+
+class TracingClock:
+    """Wraps a bot clock so every sleep() becomes a span."""
+
+    def __init__(self, clock, tracer):
+        self._clock = clock
+        self._tracer = tracer
+
+    def sleep(self, seconds):
+        with self._tracer.span("sleep", "sleep", seconds=round(seconds, 3)):
+            self._clock.sleep(seconds)
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+
+class TracingSelector:
+    """Wraps a selector; probes, waits and clicks become rpc spans."""
+
+    def __init__(self, sel, label, tracer):
+        self._sel = sel
+        self._label = label
+        self._tracer = tracer
+
+    @property
+    def exists(self):
+        # uiautomator2 only asks the device when the result is evaluated
+        with self._tracer.span("exists", "rpc", selector=self._label):
+            return bool(self._sel.exists)
+
+    @property
+    def count(self):
+        with self._tracer.span("count", "rpc", selector=self._label):
+            return self._sel.count
+
+    @property
+    def info(self):
+        with self._tracer.span("info", "rpc", selector=self._label):
+            return self._sel.info
+
+    def wait(self, *args, **kwargs):
+        with self._tracer.span("wait", "rpc", selector=self._label):
+            return self._sel.wait(*args, **kwargs)
+
+    def click(self, *args, **kwargs):
+        with self._tracer.span("click_selector", "rpc", selector=self._label):
+            return self._sel.click(*args, **kwargs)
+
+    def __getitem__(self, index):
+        return TracingSelector(self._sel[index], f"{self._label}[{index}]", self._tracer)
+
+    def __getattr__(self, name):
+        return getattr(self._sel, name)
+
+
+class TracingDevice:
+    """
+    Wraps a uiautomator2 device. Every method call and property read
+    (d.info is an RPC) becomes an rpc span named after the attribute.
+    """
+
+    def __init__(self, d, tracer):
+        self._d = d
+        self._tracer = tracer
+
+    def __call__(self, **selector):
+        label = ",".join(f"{k}={v}" for k, v in selector.items())
+        return TracingSelector(self._d(**selector), label, self._tracer)
+
+    def __getattr__(self, name):
+        tracer = self._tracer
+        start = tracer.clock()
+        value = getattr(self._d, name)
+        if not callable(value):
+            # The read was the RPC: its span starts before the lookup
+            span = tracer.span(name, "rpc")
+            span.start = start
+            span.__exit__(None, None, None)
+            return value
+
+        def call(*args, **kwargs):
+            with tracer.span(name, "rpc"):
+                return value(*args, **kwargs)
+        return call
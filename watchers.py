@@ -0,0 +1,205 @@
+"""
+Popup watchers — dismiss dialogs and sheets that cover the app before
+the bot mistakes them for a stream without a giveaway.
+
+A rule names an interstitial by its title (`match`: the whole text or
+content-desc of a node, in any case) and what dismisses it: the first
+of its `dismiss` labels on screen gets tapped. Titles are matched whole
+so that a chat line merely mentioning one ("turn on notifications for
+the next drop!") is not taken for the dialog, and a rule only fires
+when one of its dismiss labels is there too. Nothing is ever dismissed
+with back: on a stream, back leaves it.
+
+Rules run in the snapshot layer: WatchedDevice checks every hierarchy
+dump, dismisses what it finds and dumps again, so the caller never sees
+the popup. A GUARDED selector probe (the Giveaway badge, Leave) that
+comes up empty triggers a check too, at most once per WATCH_INTERVAL,
+so a loop that only probes (waiting out a giveaway) is also cleared
+within one poll. Other probes are expected to miss often and aren't
+worth a dump.
+
+With WATCHER_NATIVE_INTERVAL set, the same rules are also registered
+with uiautomator2's own background watcher on real devices, for popups
+that come and go between the bot's dumps. Every dismissal is counted
+per rule either way.
+
+Add a rule when a new interstitial shows up in captures (catalog.py
+finds where: python catalog.py search "Not now" --captures).
+"""
+
+from collections import Counter, namedtuple
+
+from capture import parse_hierarchy
+from config import WATCH_INTERVAL, WATCHER_NATIVE_INTERVAL
+
+# match: titles that identify it (whole node text); dismiss: labels to tap
+Rule = namedtuple("Rule", "name match dismiss")
+RULES = [
+    Rule("rate_prompt", ("Enjoying Whatnot?", "Rate Whatnot"),
+         ("Not now", "Maybe later", "No thanks")),
+    Rule("follow_prompt", ("Follow this host?", "Don't miss their next show"),
+         ("Not now", "No thanks", "Close")),
+    Rule("notifications", ("Allow Whatnot to send you notifications?",
+                           "Turn on notifications"),
+         ("Don't allow", "Not now", "Deny")),
+    # The bid sheet only; "Place a bid" is on the stream screen itself
+    Rule("auction_sheet", ("Custom bid",), ("Cancel", "Close")),
+]
+# Probes whose failure sends the bot into its ended/stuck/recovery paths;
+# when one comes up empty a popup may be hiding it
+GUARDED = ({"text": "Giveaway"}, {"description": "Leave"})
+# Dismissals in a row before giving up on a dump (a popup that keeps coming back)
+MAX_DISMISSALS = 3
+
+
+class PopupWatcher:
+    """The rules plus per-rule counts; the device work is WatchedDevice's."""
+
+    def __init__(self, clock, log, rules=RULES, interval=WATCH_INTERVAL):
+        self.clock = clock
+        self.log = log
+        self.rules = list(rules)
+        self.interval = interval
+        self.counts = Counter()
+        self._checked = None
+        # Lowercased titles: a cheap substring test on the raw XML first,
+        # then whole-text matches on the parsed nodes
+        self._titles = {rule: {t.lower() for t in rule.match} for rule in self.rules}
+
+    def due(self):
+        """Is it time for a check on behalf of a selector probe?"""
+        now = self.clock.time()
+        return self._checked is None or now - self._checked >= self.interval
+
+    def match(self, xml):
+        """
+        (rule, node to tap) for the first popup in a dump whose dismiss
+        label is on screen, or (None, None).
+        """
+        self._checked = self.clock.time()
+        lower = xml.lower()
+        candidates = [r for r in self.rules if any(t in lower for t in self._titles[r])]
+        if not candidates:
+            return None, None
+        nodes = parse_hierarchy(xml)
+        texts = {(n["text"] or n["contentDescription"]).strip().lower() for n in nodes}
+        for rule in candidates:
+            if not self._titles[rule] & texts:
+                continue
+            for label in rule.dismiss:
+                node = next((n for n in nodes
+                             if label in (n["text"], n["contentDescription"])), None)
+                if node is not None:
+                    return rule, node
+        return None, None
+
+    def fired(self, rule, how):
+        self.counts[rule.name] += 1
+        self.log.info(f"Dismissed popup: {rule.name} ({how})")
+
+    def describe(self):
+        return ", ".join(f"{name} x{n}" for name, n in self.counts.most_common())
+
+    # ── uiautomator2 background watcher ──
+
+    def install_native(self, d, interval=WATCHER_NATIVE_INTERVAL):
+        """
+        Register the rules with uiautomator2's watcher on `d` and start it.
+        False if `d` has none (the simulator) or no interval is set.
+        """
+        watcher = getattr(d, "watcher", None)
+        if not interval or watcher is None or not hasattr(watcher, "start"):
+            return False
+        for rule in self.rules:
+            shown = " or ".join(f'@text="{t}"' for t in rule.match)
+            labels = " or ".join(f'@text="{label}"' for label in rule.dismiss)
+            watcher(rule.name).when(f"//*[{shown}]").when(f"//*[{labels}]").call(
+                self._native_click(rule))
+        watcher.start(interval)
+        return True
+
+    def _native_click(self, rule):
+        def callback(selector):
+            selector.get_last_match().click()
+            self.fired(rule, "device watcher")
+        return callback
+
+    @staticmethod
+    def uninstall_native(d):
+        watcher = getattr(d, "watcher", None)
+        if watcher is not None and hasattr(watcher, "running") and watcher.running():
+            watcher.stop()
+            watcher.remove()
+
+
+# ── Device wrapper ──
+
+class WatchedSelector:
+    """Wraps a guarded selector; an empty `exists` first checks for a popup."""
+
+    def __init__(self, sel, device):
+        self._sel = sel
+        self._device = device
+
+    @property
+    def exists(self):
+        if self._sel.exists:
+            return True
+        if self._device.popups.due() and self._device.check():
+            return bool(self._sel.exists)
+        return False
+
+    def wait(self, *args, **kwargs):
+        if self._sel.wait(*args, **kwargs):
+            return True
+        if kwargs.get("exists", True) and self._device.check():
+            return self._sel.wait(*args, **kwargs)
+        return False
+
+    def __getitem__(self, index):
+        return WatchedSelector(self._sel[index], self._device)
+
+    def __getattr__(self, name):
+        return getattr(self._sel, name)
+
+
+class WatchedDevice:
+    """
+    Wraps a uiautomator2 device: dumps come back with popups already
+    dismissed, and empty GUARDED probes check for one now and then.
+    """
+
+    def __init__(self, d, popups):
+        self._d = d
+        self.popups = popups
+
+    def __call__(self, **selector):
+        sel = self._d(**selector)
+        return WatchedSelector(sel, self) if selector in GUARDED else sel
+
+    def dump_hierarchy(self, *args, **kwargs):
+        xml = self._d.dump_hierarchy(*args, **kwargs)
+        for _ in range(MAX_DISMISSALS):
+            rule, node = self.popups.match(xml)
+            if rule is None:
+                break
+            self._dismiss(rule, node)
+            xml = self._d.dump_hierarchy(*args, **kwargs)
+        return xml
+
+    def check(self):
+        """Dump once and dismiss any popup. True if one was dismissed."""
+        before = sum(self.popups.counts.values())
+        self.dump_hierarchy()
+        return sum(self.popups.counts.values()) > before
+
+    def _dismiss(self, rule, node):
+        b = node["bounds"]
+        self._d.click((b.get("left", 0) + b.get("right", 0)) // 2,
+                      (b.get("top", 0) + b.get("bottom", 0)) // 2)
+        self.popups.fired(rule, f"tapped {node['text'] or node['contentDescription']!r}")
+        # Let the dialog animate away before the next dump
+        self.popups.clock.sleep(0.5)
+
+    def __getattr__(self, name):
+        return getattr(self._d, name)
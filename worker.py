@@ -0,0 +1,235 @@
+"""
+Bot runners: in-process thread or separate worker process.
+
+Both expose the same interface to the server:
+    start(), stop(timeout), is_alive(), stats
+
+In process mode the bot runs in its own interpreter, so XML parsing and
+logging never compete with the dashboard for the GIL. Counters live in
+a shared-memory array the server reads directly; log lines come back
+over a pipe. stop() asks nicely first, then terminates the process, so
+a hung device call can't keep a bot alive.
+"""
+
+import multiprocessing as mp
+import signal
+import threading
+
+# Bot lifecycle states, stored in shared memory by index
+STATES = ("idle", "starting", "running", "stopping", "stopped", "error")
+
+# Seconds to wait for a clean exit after SIGTERM before SIGKILL
+KILL_GRACE = 3
+
+_ENTERED, _CHECKED, _STATE = range(3)
+
+
+class BotStats:
+    """Plain counters for a bot running in this process."""
+
+    def __init__(self):
+        self.giveaways_entered = 0
+        self.streams_checked = 0
+        self.state = "idle"
+
+    def as_dict(self):
+        return {
+            "giveaways_entered": self.giveaways_entered,
+            "streams_checked": self.streams_checked,
+            "state": self.state,
+        }
+
+
+class SharedStats(BotStats):
+    """
+    Counters in a shared-memory int64 array. Only the worker writes;
+    the server reads with no lock and no IPC round-trip.
+    """
+
+    def __init__(self, ctx=mp):
+        self._values = ctx.Array("q", 3, lock=False)
+
+    @property
+    def giveaways_entered(self):
+        return self._values[_ENTERED]
+
+    @giveaways_entered.setter
+    def giveaways_entered(self, value):
+        self._values[_ENTERED] = value
+
+    @property
+    def streams_checked(self):
+        return self._values[_CHECKED]
+
+    @streams_checked.setter
+    def streams_checked(self, value):
+        self._values[_CHECKED] = value
+
+    @property
+    def state(self):
+        return STATES[self._values[_STATE]]
+
+    @state.setter
+    def state(self, value):
+        self._values[_STATE] = STATES.index(value)
+
+
+# ── Thread runner ──
+
+class ThreadRunner:
+    """Runs the bot on a daemon thread inside the server process."""
+
+    def __init__(self, config, log_buffer, bot_id=None, **bot_kwargs):
+        self.config = config
+        self.log_buffer = log_buffer
+        self.bot_id = bot_id
+        self.bot_kwargs = bot_kwargs
+        self.stats = BotStats()
+        self.stop_event = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        from bot import WhatnotBot
+        try:
+            bot = WhatnotBot(
+                config=self.config,
+                stop_event=self.stop_event,
+                log_deque=self.log_buffer,
+                stats=self.stats,
+                bot_id=self.bot_id,
+                **self.bot_kwargs,
+            )
+            bot.run()
+        except Exception as e:
+            self.stats.state = "error"
+            self.log_buffer.append(f"SERVER ERROR: {e}")
+
+    def start(self):
+        self.stats.state = "starting"
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=30):
+        """Signal the bot and wait. A thread can't be killed: may return alive."""
+        self.stop_event.set()
+        if self.is_alive():
+            self.stats.state = "stopping"
+            self._thread.join(timeout=timeout)
+        return not self.is_alive()
+
+
+# ── Process runner ──
+
+class _PipeSink:
+    """LogBuffer stand-in inside the worker: ships each line to the parent."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def append(self, line):
+        self.conn.send(line)
+
+
+def _worker_main(config, stop_event, stats, conn, bot_id, bot_kwargs):
+    """Entry point of the worker process."""
+    # SIGTERM raises SystemExit even inside a blocking device call, so
+    # run()'s finally (CSV flush, recorder close) still gets a chance
+    def _terminate(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, _terminate)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from bot import WhatnotBot
+    try:
+        bot = WhatnotBot(
+            config=config,
+            stop_event=stop_event,
+            log_deque=_PipeSink(conn),
+            stats=stats,
+            bot_id=bot_id,
+            **bot_kwargs,
+        )
+        bot.run()
+    except Exception as e:
+        stats.state = "error"
+        conn.send(f"WORKER ERROR: {e}")
+    finally:
+        conn.close()
+
+
+class ProcessRunner:
+    """Runs the bot in a spawned worker process."""
+
+    def __init__(self, config, log_buffer, bot_id=None, **bot_kwargs):
+        # spawn, not fork: the server has live threads and an event loop
+        self._ctx = mp.get_context("spawn")
+        self.config = config
+        self.log_buffer = log_buffer
+        self.bot_id = bot_id
+        self.bot_kwargs = bot_kwargs
+        self.stats = SharedStats(self._ctx)
+        self.stop_event = self._ctx.Event()
+        self._process = None
+        self._reader = None
+
+    def start(self):
+        self.stats.state = "starting"
+        recv_conn, send_conn = self._ctx.Pipe(duplex=False)
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.config, self.stop_event, self.stats, send_conn,
+                  self.bot_id, self.bot_kwargs),
+            name=f"bot-{self.bot_id}",
+            daemon=True,
+        )
+        self._process.start()
+        # Parent keeps only the read end, so EOF arrives when the worker exits
+        send_conn.close()
+        self._reader = threading.Thread(
+            target=self._pump_logs, args=(recv_conn,), daemon=True)
+        self._reader.start()
+
+    def _pump_logs(self, conn):
+        try:
+            while True:
+                self.log_buffer.append(conn.recv())
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def stop(self, timeout=10):
+        """Signal the bot, then terminate (and kill) if it doesn't exit."""
+        self.stop_event.set()
+        if not self.is_alive():
+            return True
+        self.stats.state = "stopping"
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self.log_buffer.append(
+                f"Worker did not stop within {timeout}s, terminating")
+            self._process.terminate()
+            self._process.join(KILL_GRACE)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        if self.stats.state not in ("stopped", "error"):
+            self.stats.state = "stopped"
+        if self._reader:
+            self._reader.join(1.0)
+        return True
+
+
+RUNNERS = {"thread": ThreadRunner, "process": ProcessRunner}
+
+
+def make_runner(config, log_buffer, **kwargs):
+    """Runner for config["worker"] ("process" or "thread")."""
+    cls = RUNNERS.get(config.get("worker", "process"), ProcessRunner)
+    return cls(config, log_buffer, **kwargs)